@@ -0,0 +1,546 @@
+# vanilla python tool: selectivity-driven adaptive term ordering
+# online hit-rate / cost stats per term reorder the short-circuit loops, persisted as JSON
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+from multi_term_matcher_v1 import MATCH_MODE_SUBSTRING, make_benchmark_words
+
+"""
+- vanilla python, not pandas
+- same results as the declaration-order loops / MultiTermMatcher:
+      any required term, or n_terms optional terms, per match set
+      first aggregation group (in declared order) with a term in the text
+
+The loops test terms in declaration order, so a rare term listed first
+is tested on every row before the common one that ends the loop.
+Here every term test is counted (tests, hits, and on sampled rows
+its time), and every REORDER_EVERY rows each loop is re-sorted by
+expected cost per hit (seconds per test / hit rate, smoothed),
+so the terms most likely to end the loop, per unit of cost, go first:
+- required terms: stop at the first hit
+- optional terms: stop at the n-th hit, or when n can not be reached
+- group terms: stop at the first hit of the group
+
+What is reordered, and what is not (first match wins):
+- terms inside one loop: the result does not depend on their order
+- the group order is the result (a text can contain terms of two
+  groups, so no order other than the declared one is provably
+  result-preserving with substring terms) and is kept as declared;
+  what is provable is pruning: a term of a later group that contains
+  a term of an earlier group (or equals it) can never be the first
+  match, so it is dropped ("cats" after "cat")
+
+Persisted: save_order_stats() writes the per-term stats as JSON,
+load_order_stats() seeds the next run on similar data
+(the stats keep adapting from there).
+
+Use:
+    evaluator = AdaptiveRowEvaluator(match_sets, aggregation_groups, clean_function,
+                                     stats=load_order_stats("order_stats.json"))
+    clean_text = evaluator.clean(text)
+    if evaluator.passes_match_sets(clean_text):
+        group_name = evaluator.first_matching_group(clean_text)
+    save_order_stats("order_stats.json", evaluator.stats)
+
+Benchmark (declared order vs adaptive, skewed hit rates):
+    python adaptive_order_v1.py
+"""
+
+# rows between re-sorts of the loops
+REORDER_EVERY = 1000
+
+# every Nth row, each term test is timed (timing every test would cost more than it saves)
+TIME_SAMPLE_EVERY = 64
+
+ORDER_STATS_VERSION = 1
+
+
+def term_stats_key(layer, term):
+    """
+    Args:
+        layer (str): e.g. "required:cancel", "optional:cancel", "group:a"
+        term (str): Clean term
+
+    Returns:
+        str: Key of the term's stats
+    """
+    return f"{layer}|{term}"
+
+
+def expected_cost_per_hit(term_stats):
+    """
+    Sort key: seconds per test / hit rate (smoothed, so untested terms are tried).
+
+    Args:
+        term_stats (list): [tests, hits, timed tests, timed seconds]
+
+    Returns:
+        float: Lower first
+    """
+    tests, hits, timed_tests, timed_seconds = term_stats
+    hit_rate = (hits + 1) / (tests + 2)
+    seconds_per_test = timed_seconds / timed_tests if timed_tests else 1e-6
+    return seconds_per_test / hit_rate
+
+
+def prune_shadowed_group_terms(aggregation_groups):
+    """
+    Drops terms that can never be the first match: a term that contains
+    (or equals) a term of an earlier group always lets that group win first.
+
+    Args:
+        aggregation_groups (list): (group_name, clean terms) tuples, in priority order
+
+    Returns:
+        tuple: ((group_name, terms) tuples, number of terms dropped)
+    """
+    earlier_terms = []
+    pruned_groups = []
+    dropped_count = 0
+
+    for group_name, terms in aggregation_groups:
+        kept_terms = []
+        for term in dict.fromkeys(terms):
+            if any(earlier_term in term for earlier_term in earlier_terms):
+                dropped_count += 1
+                continue
+            kept_terms.append(term)
+        pruned_groups.append((group_name, kept_terms))
+        earlier_terms.extend(kept_terms)
+
+    return tuple(pruned_groups), dropped_count
+
+
+class AdaptiveRowEvaluator:
+    """
+    Short-circuit match-set and first-match-group loops over clean text,
+    in an order learned from the rows seen so far.
+
+    Args:
+        match_sets (list): (set_id, required_terms, optional_terms, n_terms) tuples
+        aggregation_groups (list): (group_name, terms) tuples, first match wins
+        clean_function (callable): Cleans text and terms, or None if already clean
+        stats (dict): {term_stats_key: [tests, hits, timed tests, timed seconds]} to start from
+        reorder_every (int): Rows between re-sorts
+    """
+
+    def __init__(self, match_sets=(), aggregation_groups=(), clean_function=None, stats=None,
+                 reorder_every=REORDER_EVERY):
+        self.clean_function = clean_function
+        self.reorder_every = max(1, reorder_every)
+        self.stats = {key: list(value) for key, value in (stats or {}).items()}
+        # stats since the last take_stats_delta(), for merging in the parent
+        self.stats_delta = {}
+
+        # loops: [layer, terms list (reordered in place), stats list per term]
+        self.match_sets = []
+        for set_id, required_terms, optional_terms, n_terms in match_sets:
+            self.match_sets.append((
+                self._make_loop(f"required:{set_id}", required_terms),
+                # duplicates count twice, as in the loops
+                self._make_loop(f"optional:{set_id}", optional_terms, keep_duplicates=True),
+                n_terms,
+            ))
+
+        clean_groups = [
+            (group_name, [self.clean_term(term) for term in terms])
+            for group_name, terms in aggregation_groups
+        ]
+        self.group_names = tuple(group_name for group_name, _ in clean_groups)
+        pruned_groups, self.pruned_term_count = prune_shadowed_group_terms(clean_groups)
+        self.aggregation_groups = [
+            (group_name, self._make_loop(f"group:{group_name}", terms, already_clean=True))
+            for group_name, terms in pruned_groups
+        ]
+
+        # the starting stats are not part of the first delta
+        self.stats_delta = {key: list(value) for key, value in self.stats.items()}
+
+        self.rows_seen = 0
+        self._timing_row = False
+
+    @classmethod
+    def from_matcher(cls, matcher, stats=None, reorder_every=REORDER_EVERY):
+        """
+        Same sets and groups as a MultiTermMatcher (its terms are already clean).
+
+        Args:
+            matcher (MultiTermMatcher): Compiled matcher
+            stats (dict): Stats to start from
+            reorder_every (int): Rows between re-sorts
+
+        Returns:
+            AdaptiveRowEvaluator
+        """
+        if matcher.match_mode != MATCH_MODE_SUBSTRING:
+            # the loops test `term in clean_text`
+            raise ValueError(f"Adaptive order needs a substring matcher, not match_mode {matcher.match_mode!r}")
+
+        terms = matcher.terms
+        evaluator = cls(
+            match_sets=[
+                (set_id, [terms[term_id] for term_id in required_ids], [terms[term_id] for term_id in optional_ids], n_terms)
+                for set_id, required_ids, optional_ids, n_terms in matcher.match_sets
+            ],
+            aggregation_groups=[
+                (group_name, [terms[term_id] for term_id in sorted(group_ids)])
+                for group_name, group_ids in matcher.aggregation_groups
+            ],
+            clean_function=None,
+            stats=stats,
+            reorder_every=reorder_every,
+        )
+        evaluator.clean_function = matcher.clean_function
+        return evaluator
+
+    def clean_term(self, term):
+        return self.clean_function(term) if self.clean_function else term
+
+    def clean(self, text):
+        """Cleans a row's text (non-text cells give '', which no non-empty term is in)."""
+        clean_text = self.clean_function(text) if self.clean_function else text
+        return clean_text if isinstance(clean_text, str) else ''
+
+    def _make_loop(self, layer, terms, keep_duplicates=False, already_clean=False):
+        clean_terms = [term if already_clean else self.clean_term(term) for term in terms or ()]
+        if not keep_duplicates:
+            clean_terms = list(dict.fromkeys(clean_terms))
+
+        loop_stats = []
+        for term in clean_terms:
+            key = term_stats_key(layer, term)
+            loop_stats.append(self.stats.setdefault(key, [0, 0, 0, 0.0]))
+
+        loop = [layer, clean_terms, loop_stats]
+        self._sort_loop(loop)
+        return loop
+
+    @staticmethod
+    def _sort_loop(loop):
+        layer, terms, loop_stats = loop
+        order = sorted(range(len(terms)), key=lambda position: expected_cost_per_hit(loop_stats[position]))
+        loop[1] = [terms[position] for position in order]
+        loop[2] = [loop_stats[position] for position in order]
+
+    def _all_loops(self):
+        for required_loop, optional_loop, _ in self.match_sets:
+            yield required_loop
+            yield optional_loop
+        for _, group_loop in self.aggregation_groups:
+            yield group_loop
+
+    def _test(self, loop, position, clean_text):
+        """One term test, counted (and timed on sampled rows)."""
+        term_stats = loop[2][position]
+        if self._timing_row:
+            start_time = time.perf_counter()
+            found = loop[1][position] in clean_text
+            term_stats[3] += time.perf_counter() - start_time
+            term_stats[2] += 1
+        else:
+            found = loop[1][position] in clean_text
+        term_stats[0] += 1
+        if found:
+            term_stats[1] += 1
+        return found
+
+    def start_row(self):
+        """Counts the row, re-sorts every reorder_every rows, picks timed rows."""
+        self.rows_seen += 1
+        self._timing_row = self.rows_seen % TIME_SAMPLE_EVERY == 0
+        if self.rows_seen % self.reorder_every == 0:
+            for loop in self._all_loops():
+                self._sort_loop(loop)
+
+    def passes_match_sets(self, clean_text):
+        """
+        Every match set: any required term, or n_terms optional terms
+        (True if there are no match sets).
+
+        Args:
+            clean_text (str): Cleaned row text
+
+        Returns:
+            bool
+        """
+        for required_loop, optional_loop, n_terms in self.match_sets:
+            if not self._passes_match_set(required_loop, optional_loop, n_terms, clean_text):
+                return False
+        return True
+
+    def evaluate_match_sets(self, clean_text):
+        """
+        Args:
+            clean_text (str): Cleaned row text
+
+        Returns:
+            dict: {set_id: bool}, like MultiTermMatcher.evaluate_match_sets()
+        """
+        return {
+            required_loop[0].partition(":")[2]: self._passes_match_set(required_loop, optional_loop, n_terms, clean_text)
+            for required_loop, optional_loop, n_terms in self.match_sets
+        }
+
+    def _passes_match_set(self, required_loop, optional_loop, n_terms, clean_text):
+        if self._timing_row:
+            return self._passes_match_set_timed(required_loop, optional_loop, n_terms, clean_text)
+
+        # untimed rows: counting inlined (most rows)
+        for term, term_stats in zip(required_loop[1], required_loop[2]):
+            term_stats[0] += 1
+            if term in clean_text:
+                term_stats[1] += 1
+                return True
+
+        optional_count = 0
+        remaining_count = len(optional_loop[1])
+        for term, term_stats in zip(optional_loop[1], optional_loop[2]):
+            remaining_count -= 1
+            term_stats[0] += 1
+            if term in clean_text:
+                term_stats[1] += 1
+                optional_count += 1
+                if optional_count >= n_terms:
+                    return True
+            elif optional_count + remaining_count < n_terms:
+                return False
+        return optional_count > 0 and optional_count >= n_terms
+
+    def _passes_match_set_timed(self, required_loop, optional_loop, n_terms, clean_text):
+        for position in range(len(required_loop[1])):
+            if self._test(required_loop, position, clean_text):
+                return True
+
+        optional_count = 0
+        term_count = len(optional_loop[1])
+        for position in range(term_count):
+            if self._test(optional_loop, position, clean_text):
+                optional_count += 1
+                if optional_count >= n_terms:
+                    return True
+            elif optional_count + term_count - position - 1 < n_terms:
+                # n_terms can not be reached any more
+                return False
+        # the loop only checks the count after a term is found
+        return optional_count > 0 and optional_count >= n_terms
+
+    def first_matching_group(self, clean_text):
+        """
+        Args:
+            clean_text (str): Cleaned row text
+
+        Returns:
+            str: First group (declared order) with a term in the text, or None
+        """
+        if self._timing_row:
+            for group_name, group_loop in self.aggregation_groups:
+                for position in range(len(group_loop[1])):
+                    if self._test(group_loop, position, clean_text):
+                        return group_name
+            return None
+
+        for group_name, (_, terms, loop_stats) in self.aggregation_groups:
+            for term, term_stats in zip(terms, loop_stats):
+                term_stats[0] += 1
+                if term in clean_text:
+                    term_stats[1] += 1
+                    return group_name
+        return None
+
+    def take_stats_delta(self):
+        """
+        Stats counted since the last call (for a parent process to merge).
+
+        Returns:
+            dict: {term_stats_key: [tests, hits, timed tests, timed seconds]}
+        """
+        delta = {}
+        for loop in self._all_loops():
+            layer = loop[0]
+            for term, term_stats in zip(loop[1], loop[2]):
+                key = term_stats_key(layer, term)
+                previous = self.stats_delta.get(key, [0, 0, 0, 0.0])
+                if term_stats[0] != previous[0]:
+                    delta[key] = [now - before for now, before in zip(term_stats, previous)]
+                    self.stats_delta[key] = list(term_stats)
+        return delta
+
+    def describe_order(self):
+        """
+        Returns:
+            str: Current term order and hit rates per loop
+        """
+        lines = []
+        for loop in self._all_loops():
+            layer, terms, loop_stats = loop
+            if not terms:
+                continue
+            term_texts = [
+                f"{term!r} {term_stats[1] / term_stats[0]:.0%}" if term_stats[0] else f"{term!r} -"
+                for term, term_stats in zip(terms, loop_stats)
+            ]
+            lines.append(f"  {layer}: {', '.join(term_texts[:8])}{' ...' if len(term_texts) > 8 else ''}")
+        if self.pruned_term_count:
+            lines.append(f"  {self.pruned_term_count} group terms pruned (shadowed by an earlier group)")
+        return "\n".join(lines)
+
+
+def merge_order_stats(total_stats, stats_delta):
+    """
+    Adds a stats delta (e.g. from a worker chunk) into total_stats, in place.
+
+    Args:
+        total_stats (dict): {term_stats_key: [tests, hits, timed tests, timed seconds]}
+        stats_delta (dict): Same layout
+    """
+    for key, delta in stats_delta.items():
+        term_stats = total_stats.setdefault(key, [0, 0, 0, 0.0])
+        for position, value in enumerate(delta):
+            term_stats[position] += value
+
+
+def load_order_stats(stats_path):
+    """
+    Args:
+        stats_path (str): JSON file from save_order_stats()
+
+    Returns:
+        dict: Term stats, empty if the file does not exist
+    """
+    if not stats_path or not os.path.exists(stats_path):
+        return {}
+
+    with open(stats_path, 'r', encoding='utf-8') as stats_file:
+        saved = json.load(stats_file)
+
+    if saved.get("version") != ORDER_STATS_VERSION:
+        print(f"Warning: ignoring order stats with version {saved.get('version')} in {stats_path}")
+        return {}
+
+    return {key: list(value) for key, value in saved["terms"].items()}
+
+
+def save_order_stats(stats_path, stats):
+    """
+    Args:
+        stats_path (str): JSON file to write
+        stats (dict): Term stats
+    """
+    temp_path = f"{stats_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as stats_file:
+        json.dump({"version": ORDER_STATS_VERSION, "terms": stats}, stats_file, indent=1, sort_keys=True)
+    os.replace(temp_path, stats_path)
+
+
+#############
+# Benchmark
+#############
+
+def declared_order_row(clean_text, match_sets, aggregation_groups):
+    """Baseline: declaration-order loops (terms already clean)."""
+    for _, required_terms, optional_terms, n_terms in match_sets:
+        passed = any(term in clean_text for term in required_terms)
+        if not passed:
+            n_term_counter = 0
+            for term in optional_terms:
+                if term in clean_text:
+                    n_term_counter += 1
+                    if n_term_counter >= n_terms:
+                        passed = True
+                        break
+        if not passed:
+            return None
+
+    for group_name, terms in aggregation_groups:
+        for term in terms:
+            if term in clean_text:
+                return group_name
+    return "none"
+
+
+def benchmark_adaptive_order(row_count=30000, repeats=3):
+    """
+    Prints rows/sec for declared order vs adaptive order, cold and with saved stats.
+    """
+    random_generator = random.Random(17)
+    vocabulary = make_benchmark_words(3000)
+    # rare terms declared first, the common ones last (worst case for the loops)
+    common_words = vocabulary[:20]
+    rare_terms = vocabulary[100:160]
+
+    def make_text():
+        words = [random_generator.choice(vocabulary[200:]) for _ in range(40)]
+        words.extend(random_generator.choice(common_words) for _ in range(3))
+        random_generator.shuffle(words)
+        return ' '.join(words)
+
+    texts = [make_text() for _ in range(row_count)]
+
+    match_sets = [("gate", rare_terms[:30] + common_words[:10], rare_terms[30:], 2)]
+    aggregation_groups = [
+        ("g1", rare_terms[:20] + common_words[10:13]),
+        ("g2", rare_terms[20:50] + common_words[13:17]),
+        ("g3", rare_terms[50:] + common_words[17:]),
+    ]
+
+    best = {"declared": None, "adaptive cold": None, "adaptive saved": None}
+    saved_stats = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        declared_results = [declared_order_row(text, match_sets, aggregation_groups) for text in texts]
+        seconds = time.perf_counter() - start_time
+        best["declared"] = seconds if best["declared"] is None else min(best["declared"], seconds)
+
+        for run_name, stats in (("adaptive cold", None), ("adaptive saved", saved_stats)):
+            evaluator = AdaptiveRowEvaluator(match_sets, aggregation_groups, stats=stats)
+            start_time = time.perf_counter()
+            adaptive_results = []
+            for text in texts:
+                evaluator.start_row()
+                if evaluator.passes_match_sets(text):
+                    adaptive_results.append(evaluator.first_matching_group(text) or "none")
+                else:
+                    adaptive_results.append(None)
+            seconds = time.perf_counter() - start_time
+            best[run_name] = seconds if best[run_name] is None else min(best[run_name], seconds)
+            if adaptive_results != declared_results:
+                print(f"Warning: {run_name} results differ")
+            if run_name == "adaptive cold":
+                saved_stats = evaluator.stats
+
+    print(f"{row_count} rows of 43 words; rare terms declared before common ones")
+    for run_name, seconds in best.items():
+        print(f"  {run_name:>15}: {row_count / seconds:>10,.0f} rows/s")
+    print("learned order:")
+    print(evaluator.describe_order())
+
+
+def main():
+    """
+    Prints a saved order, or runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Adaptive term order stats / benchmark')
+    parser.add_argument('--stats', help='Saved order stats (.json) to print', required=False)
+    args = parser.parse_args()
+
+    try:
+        if args.stats:
+            stats = load_order_stats(args.stats)
+            for key, (tests, hits, timed_tests, timed_seconds) in sorted(stats.items()):
+                hit_rate = hits / tests if tests else 0.0
+                seconds_per_test = timed_seconds / timed_tests if timed_tests else 0.0
+                print(f"{key}: {tests:,} tests, {hit_rate:.1%} hits, {seconds_per_test * 1e9:.0f} ns/test")
+        else:
+            benchmark_adaptive_order()
+    except Exception as e:
+        print(f"Error in adaptive order: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# vanilla python tool: per-batch failure isolation for process pool jobs
+# a failing row range is retried, then bisected down to the rows that fail, which are quarantined
+
+import os
+import sys
+import time
+import argparse
+import functools
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+"""
+- parallel
+- vanilla python, not pandas (the "rows" and "shared" engines of
+  pandas_cascading_filter_functions_alt_v2 run on it)
+
+Without it, one exception anywhere in executor.map() loses the whole
+job's results, and the usual fallback is to redo the whole job serially.
+
+Here the job is row ranges (start, stop), submitted a few at a time:
+- a range that raises is retried (max_retries times)
+- a range that still fails is bisected, each half tried once, down to
+  single rows; a single row that fails is quarantined
+  (quarantine_function(row_number, error)), the job goes on
+- every other range keeps running in parallel meanwhile
+
+A worker that dies (segfault, os._exit, OOM kill) breaks the whole
+ProcessPoolExecutor, and every range in flight fails with
+BrokenProcessPool, so which one killed it is unknown. The executor is
+replaced, and those ranges are re-run one at a time ("suspects"):
+a suspect that fails alone is the culprit (an attempt is counted),
+the others succeed, so an innocent range is never bisected or
+quarantined because it shared a pool with a poison row.
+
+The report counts batches, failed attempts, retries, bisections,
+quarantined rows and executor restarts (format_recovery_report()).
+
+Use:
+    recovery_report = run_range_batches(
+        create_executor, submit_batch, row_count, batch_rows,
+        result_function, quarantine_function)
+    print(format_recovery_report(recovery_report))
+
+Benchmark (poison rows: batch recovery vs whole-job serial fallback):
+    python batch_recovery_v1.py
+"""
+
+# times a failing range is re-run before it is bisected
+DEFAULT_MAX_BATCH_RETRIES = 1
+
+# ranges submitted per worker at a time
+IN_FLIGHT_BATCHES_PER_WORKER = 2
+
+
+def new_recovery_report():
+    """
+    Returns:
+        dict: Zeroed recovery counters
+    """
+    return {
+        "batches": 0,
+        "failed_attempts": 0,
+        "retries": 0,
+        "bisections": 0,
+        "quarantined_rows": 0,
+        "executor_restarts": 0,
+    }
+
+
+def run_range_batches(
+    create_executor,
+    submit_batch,
+    row_count,
+    batch_rows,
+    result_function,
+    quarantine_function,
+    max_retries=DEFAULT_MAX_BATCH_RETRIES,
+    max_in_flight=None,
+):
+    """
+    Runs rows 0..row_count-1 as ranges of batch_rows, isolating failures.
+
+    Args:
+        create_executor (callable): Returns a new (ProcessPoolExecutor, max_workers),
+                                    called again when a worker dies
+        submit_batch (callable): submit_batch(executor, start, stop) -> Future
+        row_count (int): Rows in the job
+        batch_rows (int): Rows per range
+        result_function (callable): result_function(start, stop, result), in the parent,
+                                    for every range that succeeds (in completion order)
+        quarantine_function (callable): quarantine_function(row_number, error) for a row
+                                        that failed on its own
+        max_retries (int): Re-runs of a failing range before it is bisected
+        max_in_flight (int): Ranges submitted at a time, defaults to 2 per worker
+
+    Returns:
+        dict: Recovery report (see new_recovery_report())
+    """
+    report = new_recovery_report()
+    batch_rows = max(1, batch_rows)
+
+    # (start, stop, failed attempts so far)
+    pending = deque((start, min(start + batch_rows, row_count), 0) for start in range(0, row_count, batch_rows))
+    report["batches"] = len(pending)
+
+    # ranges that were in flight when a worker died, re-run one at a time
+    suspects = deque()
+
+    def handle_failure(start, stop, attempts, error):
+        report["failed_attempts"] += 1
+        attempts += 1
+        # a range that killed its worker is re-run alone, so it cannot take others down with it
+        next_queue = suspects if isinstance(error, BrokenProcessPool) else pending
+        if attempts <= max_retries:
+            report["retries"] += 1
+            next_queue.appendleft((start, stop, attempts))
+        elif stop - start > 1:
+            report["bisections"] += 1
+            middle = (start + stop) // 2
+            # halves are tried once each, no retries
+            next_queue.appendleft((middle, stop, max_retries))
+            next_queue.appendleft((start, middle, max_retries))
+        else:
+            report["quarantined_rows"] += 1
+            quarantine_function(start, error)
+
+    executor, max_workers = create_executor()
+    if max_in_flight is None:
+        max_in_flight = max_workers * IN_FLIGHT_BATCHES_PER_WORKER
+    max_in_flight = max(1, max_in_flight)
+
+    # future -> (start, stop, attempts)
+    in_flight = {}
+    try:
+        while pending or suspects or in_flight:
+            # a suspect runs alone, so a failure is its own
+            if suspects:
+                if not in_flight:
+                    start, stop, attempts = suspects.popleft()
+                    in_flight[submit_batch(executor, start, stop)] = (start, stop, attempts)
+            else:
+                while pending and len(in_flight) < max_in_flight:
+                    start, stop, attempts = pending.popleft()
+                    in_flight[submit_batch(executor, start, stop)] = (start, stop, attempts)
+
+            running_alone = len(in_flight) == 1
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            pool_broken = False
+            for future in done:
+                start, stop, attempts = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    result_function(start, stop, future.result())
+                elif isinstance(error, BrokenProcessPool):
+                    pool_broken = True
+                    if running_alone:
+                        handle_failure(start, stop, attempts, error)
+                    else:
+                        suspects.append((start, stop, attempts))
+                else:
+                    handle_failure(start, stop, attempts, error)
+
+            if pool_broken:
+                # the rest of the ranges in flight fail with it
+                for future, (start, stop, attempts) in list(in_flight.items()):
+                    error = future.exception()
+                    if error is None:
+                        result_function(start, stop, future.result())
+                    else:
+                        suspects.append((start, stop, attempts))
+                in_flight.clear()
+
+                executor.shutdown(wait=True)
+                executor, _ = create_executor()
+                report["executor_restarts"] += 1
+
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return report
+
+
+def format_recovery_report(report):
+    """
+    Args:
+        report (dict): From run_range_batches()
+
+    Returns:
+        str: One line summary
+    """
+    return (
+        f"Batches: {report['batches']:,}, failed attempts {report['failed_attempts']:,}, "
+        f"retries {report['retries']:,}, bisections {report['bisections']:,}, "
+        f"quarantined rows {report['quarantined_rows']:,}, executor restarts {report['executor_restarts']:,}"
+    )
+
+
+#############
+# Benchmark
+#############
+
+def benchmark_row_function(text):
+    """Benchmark row function: some work, and a poison row raises (or kills the worker)."""
+    if text == "poison":
+        raise ValueError("poison row")
+    if text == "crash":
+        os._exit(1)
+    return sum(text.count(word) for word in ("cat", "eggs", "toast", "pets"))
+
+
+def benchmark_batch(texts, start, stop):
+    """Benchmark task: the results of rows start..stop-1."""
+    return [benchmark_row_function(text) for text in texts[start:stop]]
+
+
+def create_benchmark_executor(processes):
+    """Benchmark executor factory."""
+    return ProcessPoolExecutor(max_workers=processes), processes
+
+
+def submit_benchmark_batch(executor, start, stop, texts):
+    """Benchmark submit: the batch's rows only."""
+    return executor.submit(benchmark_batch, texts[start:stop], 0, stop - start)
+
+
+def benchmark_recovery(row_count=400000, batch_rows=10000, processes=None, crash=False):
+    """
+    Prints wall time with per-batch recovery vs the whole-job serial
+    fallback, for a job with a few poison rows.
+    """
+    processes = processes or os.cpu_count()
+    texts = ["my cat likes eggs and toast, pets " * 40] * row_count
+    poison_rows = [row_count // 7, row_count // 3, row_count // 3 + 1]
+    for row_number in poison_rows:
+        texts[row_number] = "poison"
+    if crash:
+        texts[row_count // 2] = "crash"
+
+    results = [None] * row_count
+    quarantined = []
+
+    def store_result(start, stop, batch_results):
+        results[start:stop] = batch_results
+
+    start_time = time.perf_counter()
+    report = run_range_batches(
+        functools.partial(create_benchmark_executor, processes),
+        functools.partial(submit_benchmark_batch, texts=texts),
+        row_count,
+        batch_rows,
+        store_result,
+        lambda row_number, error: quarantined.append((row_number, repr(error))),
+    )
+    recovery_seconds = time.perf_counter() - start_time
+
+    # the old way: the parallel job fails, then everything again in this process
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        try:
+            list(executor.map(
+                benchmark_batch,
+                (texts[start:start + batch_rows] for start in range(0, row_count, batch_rows)),
+                (0 for _ in range(0, row_count, batch_rows)),
+                (batch_rows for _ in range(0, row_count, batch_rows)),
+            ))
+        except Exception:
+            pass
+    serial_results = []
+    for text in texts:
+        try:
+            serial_results.append(benchmark_row_function(text) if text != "crash" else None)
+        except ValueError:
+            serial_results.append(None)
+    serial_seconds = time.perf_counter() - start_time
+
+    print(f"{row_count:,} rows, {processes} processes, batches of {batch_rows:,}, "
+          f"{len(poison_rows)} poison rows{', 1 crashing row' if crash else ''}")
+    print(f"  batch recovery: {recovery_seconds:6.2f} s  {format_recovery_report(report)}")
+    print(f"  quarantined: {[row_number for row_number, _ in quarantined]}")
+    print(f"  failed parallel run + serial rerun: {serial_seconds:6.2f} s")
+    if results != serial_results:
+        print("Warning: results differ")
+
+
+def main():
+    """
+    Runs the batch recovery benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Per-batch failure recovery benchmark')
+    parser.add_argument('--rows', '-r', type=int, default=400000, help='Rows')
+    parser.add_argument('--batch-rows', '-b', type=int, default=10000, help='Rows per batch')
+    parser.add_argument('--processes', '-p', type=int, default=None, help='Worker processes')
+    parser.add_argument('--crash', action='store_true', help='Add a row that kills its worker')
+    args = parser.parse_args()
+
+    try:
+        benchmark_recovery(args.rows, args.batch_rows, args.processes, args.crash)
+    except Exception as e:
+        print(f"Error in benchmark: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
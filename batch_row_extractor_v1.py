@@ -0,0 +1,333 @@
+# vanilla python .csv tool: batch row / cell extraction
+# many rows by index, in one pass, to one results file
+
+import csv
+import json
+from csv_record_parser_v1 import csv_line_ends_in_quotes
+from row_offset_index_v1 import (
+    BLANK_LINE_BYTES,
+    open_row_offset_index,
+    open_csv_record_index,
+    read_row_bytes,
+)
+
+"""
+- not parallel
+- vanilla python, not pandas
+- input: a file of row numbers (one per line), optional column indices
+- output: one .csv or .jsonl file, each result has its row index attached
+
+Row numbers are de-duplicated and sorted internally, then either:
+A. if a fresh sidecar index already exists (row_offset_index_v1):
+   one seek + one small read per row
+B. otherwise: a single forward pass over the file,
+   stopping after the last requested row
+
+Rows that are skipped are never decoded, only the selected rows are.
+
+Use:
+    row_numbers = read_row_numbers_file("ids_rows.txt")
+    extract_rows_batch("data.csv", row_numbers, "results/batch.csv")
+"""
+
+BATCH_OUTPUT_FORMATS = ("csv", "jsonl")
+
+
+def read_row_numbers_file(row_numbers_path):
+    """
+    Reads row numbers (one per line) from a text file.
+    Blank lines and lines that are not integers are skipped with a warning.
+
+    Args:
+        row_numbers_path (str): Path to the row numbers file
+
+    Returns:
+        list: Sorted, de-duplicated row numbers
+    """
+    row_numbers = set()
+    skipped_lines_count = 0
+
+    try:
+        with open(row_numbers_path, 'r', encoding='utf-8') as row_numbers_file:
+            for line in row_numbers_file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row_numbers.add(int(line))
+                except ValueError:
+                    skipped_lines_count += 1
+
+        if skipped_lines_count > 0:
+            print(f"Warning: skipped {skipped_lines_count} non-integer lines in {row_numbers_path}")
+
+        return sorted(row_numbers)
+
+    except Exception as e:
+        print(f"Error reading row numbers file: {str(e)}")
+        return []
+
+
+def iter_physical_rows(file_obj):
+    """
+    Yields the raw bytes of each physical line (split on b'\\n' only,
+    same rows as the .rowidx index).
+
+    Args:
+        file_obj: File opened in binary mode
+
+    Yields:
+        bytes: Each line, including its line ending
+    """
+    yield from file_obj
+
+
+def iter_csv_records(file_obj):
+    """
+    Yields the raw bytes of each logical csv record
+    (same records as the .recidx index):
+    physical lines are joined while inside a quoted field
+    (csv_record_parser_v1.csv_line_ends_in_quotes()),
+    and blank lines are skipped.
+
+    Args:
+        file_obj: File opened in binary mode
+
+    Yields:
+        bytes: Each record, including its line ending(s)
+    """
+    record_parts = []
+    in_quotes = False
+
+    for line in file_obj:
+        # same quote rule as the parser and the index: a quote only opens a field at a field start
+        if b'"' in line:
+            line_end = len(line) - 1 if line.endswith(b'\n') else len(line)
+            in_quotes = csv_line_ends_in_quotes(line, in_quotes, 0, line_end)
+
+        if in_quotes:
+            record_parts.append(line)
+            continue
+
+        if record_parts:
+            record_parts.append(line)
+            record = b''.join(record_parts)
+            record_parts = []
+        else:
+            record = line
+            # Skip blank lines (only strip when it starts with whitespace)
+            if record[0] in BLANK_LINE_BYTES and not record.strip():
+                continue
+
+        yield record
+
+    # unterminated quoted field at the end of the file
+    if record_parts:
+        yield b''.join(record_parts)
+
+
+def iter_selected_rows_forward(file_path, sorted_row_numbers, record_mode=False):
+    """
+    Single forward pass: yields only the requested rows,
+    stops reading after the last requested row.
+
+    Args:
+        file_path (str): Path to the source file
+        sorted_row_numbers (list): Sorted, unique 0 indexed row numbers
+        record_mode (bool): True for logical csv records, False for physical lines
+
+    Yields:
+        tuple: (row_number, row_bytes)
+    """
+    target_iterator = iter(sorted_row_numbers)
+    next_target = next(target_iterator, None)
+
+    if next_target is None:
+        return
+
+    with open(file_path, 'rb') as source_file:
+        if record_mode:
+            row_iterator = iter_csv_records(source_file)
+        else:
+            row_iterator = iter_physical_rows(source_file)
+
+        for row_number, row_bytes in enumerate(row_iterator):
+            if row_number == next_target:
+                yield row_number, row_bytes
+
+                next_target = next(target_iterator, None)
+                if next_target is None:
+                    break
+
+
+def iter_selected_rows_indexed(file_path, row_index, sorted_row_numbers):
+    """
+    Yields the requested rows using seeks into an open offset index.
+    Rows are read in sorted (file) order, so the reads move forward only.
+
+    Args:
+        file_path (str): Path to the source file
+        row_index (RowOffsetIndex): Open, fresh index for the file
+        sorted_row_numbers (list): Sorted, unique 0 indexed row numbers
+
+    Yields:
+        tuple: (row_number, row_bytes)
+    """
+    with open(file_path, 'rb') as source_file:
+        for row_number in sorted_row_numbers:
+            row_bytes = read_row_bytes(source_file, row_index, row_number)
+            if row_bytes is None:
+                break
+            yield row_number, row_bytes
+
+
+def write_batch_results(selected_rows, output_path, output_format, column_indices, split_function, row_number_base):
+    """
+    Streams selected rows to one results file.
+
+    csv:   row_index,row           or  row_index,col_3,col_7
+    jsonl: {"row_index": 12, "row": "..."}  or  {"row_index": 12, "cells": {"3": "...", "7": "..."}}
+
+    Args:
+        selected_rows (iterable): (row_number, row_bytes) tuples, 0 indexed
+        output_path (str): Path to the results file
+        output_format (str): "csv" or "jsonl"
+        column_indices (list): Column indices to extract, or None for the whole row
+        split_function (callable): split_function(row_string, row_counter) -> list of fields
+        row_number_base (int): Added to row numbers in the output (0 or 1)
+
+    Returns:
+        int: Number of rows written
+    """
+    written_count = 0
+
+    with open(output_path, 'w', encoding='utf-8', newline='') as output_file:
+        csv_writer = None
+        if output_format == "csv":
+            csv_writer = csv.writer(output_file)
+            if column_indices:
+                csv_writer.writerow(["row_index"] + [f"col_{index}" for index in column_indices])
+            else:
+                csv_writer.writerow(["row_index", "row"])
+
+        for row_number, row_bytes in selected_rows:
+            row_string = row_bytes.decode('utf-8').strip()
+            reported_row_number = row_number + row_number_base
+
+            if column_indices:
+                fields = split_function(row_string, reported_row_number) or []
+                cells = [
+                    fields[index].strip() if len(fields) > index else ''
+                    for index in column_indices
+                ]
+                if csv_writer:
+                    csv_writer.writerow([reported_row_number] + cells)
+                else:
+                    cells_dict = {str(index): cell for index, cell in zip(column_indices, cells)}
+                    output_file.write(json.dumps(
+                        {"row_index": reported_row_number, "cells": cells_dict},
+                        ensure_ascii=False,
+                    ) + '\n')
+
+            else:
+                if csv_writer:
+                    csv_writer.writerow([reported_row_number, row_string])
+                else:
+                    output_file.write(json.dumps(
+                        {"row_index": reported_row_number, "row": row_string},
+                        ensure_ascii=False,
+                    ) + '\n')
+
+            written_count += 1
+
+    return written_count
+
+
+def extract_rows_batch(
+    file_path,
+    row_numbers,
+    output_path,
+    column_indices=None,
+    split_function=None,
+    output_format="csv",
+    record_mode=False,
+    row_number_base=0,
+    use_index=True,
+):
+    """
+    Extracts many rows (or cells) in one pass and writes them to one file.
+
+    Args:
+        file_path (str): Path to the source file
+        row_numbers (list): Row numbers to extract, any order, duplicates ok
+        output_path (str): Path to the results file
+        column_indices (list): Column indices to extract, or None for the whole row
+        split_function (callable): split_function(row_string, row_counter) -> list of fields,
+                                   required when column_indices is set
+        output_format (str): "csv" or "jsonl"
+        record_mode (bool): True for logical csv records (quoted newlines),
+                            False for physical lines
+        row_number_base (int): Numbering of row_numbers: 0 (first line is 0)
+                               or 1 (first line / header is 1)
+        use_index (bool): Use a sidecar index if a fresh one already exists
+
+    Returns:
+        dict: Report with requested / written / missing counts and the path used
+    """
+    try:
+        if output_format not in BATCH_OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {BATCH_OUTPUT_FORMATS}")
+        if column_indices and split_function is None:
+            raise ValueError("split_function is required to extract columns")
+
+        sorted_row_numbers = sorted({
+            row_number - row_number_base
+            for row_number in row_numbers
+            if row_number - row_number_base >= 0
+        })
+
+        # only use an index that already exists and is fresh: for a
+        # one-off batch a single forward pass is cheaper than building one
+        row_index = None
+        if use_index:
+            if record_mode:
+                row_index = open_csv_record_index(file_path, rebuild_if_stale=False)
+            else:
+                row_index = open_row_offset_index(file_path, rebuild_if_stale=False)
+
+        if row_index is not None:
+            with row_index:
+                written_count = write_batch_results(
+                    iter_selected_rows_indexed(file_path, row_index, sorted_row_numbers),
+                    output_path,
+                    output_format,
+                    column_indices,
+                    split_function,
+                    row_number_base,
+                )
+        else:
+            written_count = write_batch_results(
+                iter_selected_rows_forward(file_path, sorted_row_numbers, record_mode),
+                output_path,
+                output_format,
+                column_indices,
+                split_function,
+                row_number_base,
+            )
+
+        report = {
+            "requested": len(sorted_row_numbers),
+            "written": written_count,
+            "missing": len(sorted_row_numbers) - written_count,
+            "access": "index" if row_index is not None else "forward_pass",
+            "output_path": output_path,
+        }
+
+        if report["missing"] > 0:
+            print(f"Warning: {report['missing']} requested rows are past the end of {file_path}")
+
+        return report
+
+    except Exception as e:
+        print(f"Error in extract_rows_batch(): {str(e)}")
+        return None
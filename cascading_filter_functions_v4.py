@@ -8,10 +8,16 @@ Results can be added to pandas DataFrames safely after parallel processing.
 import csv
 import argparse
 import os
-import re
+import io
+import time
+import random
+import contextlib
 
 from collections import Counter
 from datetime import datetime, UTC as datetime_UTC
+from multi_term_matcher_v1 import MultiTermMatcher
+from text_cleaning_v1 import CLEAN_MODE_ASCII, get_clean_text_function
+from match_set_config_v1 import CompiledMatchSets
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -50,15 +56,17 @@ MATCH_SETS = [
     ("2",""),
 ]
 
+# "ascii": a-z only, as before; "unicode": letters of every script (text_cleaning_v1)
+CLEAN_STRING_MODE = CLEAN_MODE_ASCII
+
 
 def clean_string(input_text):    
     """Remove all non-alphabetic characters and convert to lowercase."""
     try:
         if isinstance(input_text, str):
-            # Remove all non-alphabetic characters (keeping spaces)
-            cleaned = re.sub(r'[^a-zA-Z\s]', '', input_text)
-            # Convert to lowercase and strip extra whitespace
-            return ' '.join(cleaned.lower().split())
+            # one translate() pass + split/join (text_cleaning_v1),
+            # in "ascii" mode the same output as the old regex version
+            return get_clean_text_function(CLEAN_STRING_MODE)(input_text)
         else:
             print("in clean_string() warning, input not string, input returned be default")
             return input_text 
@@ -141,6 +149,63 @@ def has_n_optional_terms_boolean(
         return False
 
 
+# compiled matchers, keyed by the terms they were built from
+COMPILED_MATCH_SETS_CACHE = {}
+
+# matchers kept in COMPILED_MATCH_SETS_CACHE (the oldest is dropped first)
+COMPILED_MATCH_SETS_CACHE_SIZE = 64
+
+
+def get_compiled_term_lists(term_lists):
+    """
+    Compiles term lists into one MultiTermMatcher (multi_term_matcher_v1),
+    once: later calls with the same lists get the cached matcher.
+    The patterns are cleaned here, once, not per row.
+    
+    Args:
+        term_lists (list): (set_id, required_terms_list, optional_terms_list) tuples
+        
+    Returns:
+        tuple: (MultiTermMatcher, dict of set_id -> error message for sets without a required list)
+    """
+    # keyed by the terms themselves (not the list objects, whose id() is reused
+    # once they are freed, and whose items can be changed in place) and the clean mode
+    cache_key = (CLEAN_STRING_MODE,) + tuple(
+        (
+            set_id,
+            None if required_terms_list is None else tuple(required_terms_list),
+            None if optional_terms_list is None else tuple(optional_terms_list),
+        )
+        for set_id, required_terms_list, optional_terms_list in term_lists
+    )
+    
+    if cache_key not in COMPILED_MATCH_SETS_CACHE:
+        if len(COMPILED_MATCH_SETS_CACHE) >= COMPILED_MATCH_SETS_CACHE_SIZE:
+            # bounded: term lists built per call would otherwise grow it forever
+            del COMPILED_MATCH_SETS_CACHE[next(iter(COMPILED_MATCH_SETS_CACHE))]
+
+        set_errors = {}
+        compiled_sets = []
+        
+        for set_id, required_terms_list, optional_terms_list in term_lists:
+            # Validate that we found the term lists
+            if required_terms_list is None:
+                set_errors[set_id] = f"Could not find required terms list: REQUIRED_TERMS_LIST__{set_id}"
+                continue
+            
+            # Optional terms list might be empty, but should not be None
+            if optional_terms_list is None:
+                optional_terms_list = []
+                print(f"Warning: No optional terms list found for {set_id}, using empty list")
+            
+            compiled_sets.append((set_id, required_terms_list, optional_terms_list, 2))
+        
+        matcher = MultiTermMatcher(compiled_sets, clean_function=clean_string)
+        COMPILED_MATCH_SETS_CACHE[cache_key] = (matcher, set_errors)
+    
+    return COMPILED_MATCH_SETS_CACHE[cache_key]
+
+
 # Example of a specific row processor function
 def count_pattern_matches_in_text_boolean(
     required_substring_list, 
@@ -150,8 +215,15 @@ def count_pattern_matches_in_text_boolean(
     """
     Counts pattern matches in a text string using global pattern lists.
     
+    The text is cleaned once for both checks (prepared row),
+    the patterns once per list (compiled matcher). Matchers are cached by
+    the terms in the lists, so lists built per call, or edited in place,
+    get a matcher for their current terms (get_compiled_term_lists()).
+    
     Args:
-        text (str): Text string to analyze
+        required_substring_list (list): Terms, any of which must be present
+        optional_substring_list (list): Terms, of which at least 2 must be present
+        input_text (str or PreparedRow): Text string to analyze
         
     return boolean
     """
@@ -161,24 +233,16 @@ def count_pattern_matches_in_text_boolean(
         # Hard Filter
         ##############
         """
+        any required term, or 2 optional terms
         """
-        content_checks = False
-
-        hard_term_check = False
-        hard_term_check = has_required_terms_boolean(
-            input_text, 
-            required_substring_list
-        )
-        
-        optional_term_check = False
-        optional_term_check = has_n_optional_terms_boolean(
-            input_text, 
-            optional_substring_list, 
-            n_terms=2
+        matcher, set_errors = get_compiled_term_lists(
+            [("row", required_substring_list, optional_substring_list)]
         )
         
-        if optional_term_check or hard_term_check:
-            content_checks = True       
+        content_checks = False
+        if not set_errors:
+            prepared_row = matcher.prepare_row(input_text)
+            content_checks = matcher.evaluate_match_sets(prepared_row.found_term_ids)["row"]
 
         if content_checks is True:
         
@@ -194,6 +258,28 @@ def count_pattern_matches_in_text_boolean(
         return False
 
 
+def get_compiled_match_sets(match_sets):
+    """
+    Compiled matcher for all match sets (see get_compiled_term_lists()).
+    
+    The lists are still found by name in globals():
+    REQUIRED_TERMS_LIST__{set_id} and OPTIONAL_TERMS__{set_id}
+    
+    Args:
+        match_sets (list): List of tuples (set_id, set_description)
+        
+    Returns:
+        tuple: (MultiTermMatcher, dict of set_id -> error message for sets without a required list)
+    """
+    term_lists = []
+    for set_id, set_description in match_sets:
+        required_terms_list = globals().get(f"REQUIRED_TERMS_LIST__{set_id}")
+        optional_terms_list = globals().get(f"OPTIONAL_TERMS__{set_id}")
+        term_lists.append((set_id, required_terms_list, optional_terms_list))
+    
+    return get_compiled_term_lists(term_lists)
+
+
 def run_sets_of_match_tests(
     match_sets,
     input_text,
@@ -202,64 +288,62 @@ def run_sets_of_match_tests(
     Runs multiple sets of pattern matching tests on an input text and returns 
     a dictionary with the results.
     
-    This function iterates through each match set (identified by its set name and description),
-    fetches the corresponding required and optional term lists, and runs the pattern matching
-    test on the input text. Results are collected in a dictionary.
+    This function fetches the required and optional term lists of each
+    match set (identified by its set name and description), and tests them
+    all with one scan of the cleaned input text (multi_term_matcher_v1):
+    same results as count_pattern_matches_in_text_boolean() per set,
+    any required term or at least 2 optional terms.
+    
+    The row is cleaned once (prepared row) for all sets;
+    a PreparedRow can be passed in to reuse it across calls / layers.
+    
+    Instead of the globals() lists, match_sets can be a CompiledMatchSets
+    from a JSON / TOML config (match_set_config_v1.compile_match_set_config()).
     
     Args:
-        match_sets (list): List of tuples, each containing (set_id, set_description)
-                          that identify pattern matching rule sets to apply
-        input_text (str): Text string to analyze with all pattern matching rule sets
+        match_sets (list or CompiledMatchSets): List of tuples, each containing (set_id, set_description)
+                          that identify pattern matching rule sets to apply,
+                          or compiled match sets
+        input_text (str or PreparedRow): Text string to analyze with all pattern matching rule sets
         
     Returns:
         dict: Dictionary with match set IDs as keys and boolean match results as values
               Example: {'1': True, '2': False}
-    
-    Raises:
-        ValueError: If required term lists can't be found for a match set
     """
     try:
         # Initialize results dictionary
         results = {}
         
+        if isinstance(match_sets, CompiledMatchSets):
+            # compiled from a config: nothing to look up
+            matcher, set_errors = match_sets.matcher, {}
+            match_sets = match_sets.match_sets
+        else:
+            matcher, set_errors = get_compiled_match_sets(match_sets)
+        
+        # one clean, one scan for all match sets
+        prepared_row = matcher.prepare_row(input_text)
+        set_results = matcher.evaluate_match_sets(prepared_row.found_term_ids)
+        
         # Process each match set
         for set_id, set_description in match_sets:
-            # Construct the variable names for the required and optional term lists
-            required_terms_var_name = f"REQUIRED_TERMS_LIST__{set_id}"
-            optional_terms_var_name = f"OPTIONAL_TERMS__{set_id}"
-            
-            # Get the lists from the global namespace
-            # Using globals() to access variables dynamically by name
-            try:
-                required_terms_list = globals().get(required_terms_var_name)
-                optional_terms_list = globals().get(optional_terms_var_name)
-                
-                # Validate that we found the term lists
-                if required_terms_list is None:
-                    raise ValueError(f"Could not find required terms list: {required_terms_var_name}")
-                
-                # Optional terms list might be empty, but should not be None
-                if optional_terms_list is None:
-                    optional_terms_list = []
-                    print(f"Warning: No optional terms list found for {set_id}, using empty list")
-                
-                # Run the pattern matching test for this set
-                match_result = count_pattern_matches_in_text_boolean(
-                    required_terms_list,
-                    optional_terms_list,
-                    input_text
-                )
-                
-                # Store the result with the set ID as the key
-                results[set_id] = match_result
-                
-                # Log the result for debugging
-                print(f"Match set {set_id} ({set_description}): {match_result}")
-                
-            except Exception as e:
+            if set_id in set_errors:
                 # Log the error but continue processing other match sets
-                print(f"Error processing match set {set_id}: {str(e)}")
+                print(f"Error processing match set {set_id}: {set_errors[set_id]}")
                 results[set_id] = False  # Default to False on error
+                continue
+            
+            match_result = set_results.get(set_id, False)
+            
+            if not match_result:
+                print("failed hard test")
+                FAIL_HARD_FILTER_COUNTER.append(1)
+            
+            # Store the result with the set ID as the key
+            results[set_id] = match_result
+            
+            # Log the result for debugging
+            print(f"Match set {set_id} ({set_description}): {match_result}")
         
         return results
         
@@ -269,6 +353,82 @@ def run_sets_of_match_tests(
         return {}  # Return empty dict on error
 
 
+def benchmark_clean_calls(row_count=5000, repeats=3):
+    """
+    Microbenchmark: clean_string() calls (one regex sub each) and time per row,
+    for all MATCH_SETS.
+    
+    A. per predicate: has_required_terms_boolean() and has_n_optional_terms_boolean()
+       per set, as before; each one cleans the text and every pattern again
+    B. prepared row: run_sets_of_match_tests(), the row is cleaned once,
+       the patterns once when the matcher is compiled
+    """
+    global clean_string
+    
+    random_generator = random.Random(5)
+    words = ["my", "cat", "loves", "eggs", "and", "toast", "Pets!", "animal", "rights", "OJ", "2024", "the", "yarn"]
+    texts = [
+        ' '.join(random_generator.choice(words) for _ in range(random_generator.randint(5, 40)))
+        for _ in range(row_count)
+    ]
+    
+    original_clean_string = clean_string
+    clean_call_counter = [0]
+    
+    def counting_clean_string(input_text):
+        clean_call_counter[0] += 1
+        return original_clean_string(input_text)
+    
+    def per_predicate_row(text):
+        results = {}
+        for set_id, set_description in MATCH_SETS:
+            results[set_id] = (
+                has_required_terms_boolean(text, globals()[f"REQUIRED_TERMS_LIST__{set_id}"])
+                or has_n_optional_terms_boolean(text, globals().get(f"OPTIONAL_TERMS__{set_id}") or [], n_terms=2)
+            )
+        return results
+    
+    try:
+        clean_string = counting_clean_string
+        COMPILED_MATCH_SETS_CACHE.clear()
+        
+        # the matcher is compiled with the counting clean_string
+        get_compiled_match_sets(MATCH_SETS)
+        compile_clean_calls = clean_call_counter[0]
+        
+        timings = {}
+        call_counts = {}
+        results = {}
+        
+        # the old path prints every match
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path_name, row_function in (
+                ("per predicate", per_predicate_row),
+                ("prepared row", lambda text: run_sets_of_match_tests(MATCH_SETS, text)),
+            ):
+                for _ in range(repeats):
+                    clean_call_counter[0] = 0
+                    start_time = time.perf_counter()
+                    results[path_name] = [row_function(text) for text in texts]
+                    seconds = time.perf_counter() - start_time
+                    timings[path_name] = min(seconds, timings.get(path_name, seconds))
+                    call_counts[path_name] = clean_call_counter[0]
+    
+    finally:
+        clean_string = original_clean_string
+        COMPILED_MATCH_SETS_CACHE.clear()
+    
+    print(f"{row_count} rows, {len(MATCH_SETS)} match sets")
+    print(f"pattern cleaning at compile: {compile_clean_calls} clean_string() calls, once")
+    for path_name in ("per predicate", "prepared row"):
+        print(
+            f"{path_name:>14}: {call_counts[path_name] / row_count:.1f} clean_string() calls per row, "
+            f"{timings[path_name] / row_count * 1e6:.1f} us per row"
+        )
+    if results["per predicate"] != results["prepared row"]:
+        print("Warning: results differ")
+
+
 #########
 # test 1
 #########
@@ -306,3 +466,7 @@ results_2 = run_sets_of_match_tests(MATCH_SETS, test_text_2)
 
 print(f"Results for text 1: {results_1}")
 print(f"Results for text 2: {results_2}")
+
+
+if __name__ == "__main__":
+    benchmark_clean_calls()
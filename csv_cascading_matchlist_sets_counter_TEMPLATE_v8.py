@@ -2,14 +2,23 @@
 import csv
 import argparse
 import os
+import sys
 from pathlib import Path
-import re
 import multiprocessing
-from multiprocessing import Pool
-from itertools import islice
 import functools
 from collections import Counter
 from datetime import datetime, UTC as datetime_UTC
+from csv_record_parser_v1 import split_csv_record, iter_split_csv_records
+from csv_sharded_scan_v1 import scan_csv_sharded
+from parallel_pipeline_v1 import iter_pipelined_map, pipelined_group_counts
+from dedup_counts_v1 import pipelined_group_counts_dedup, format_dedup_report
+from multi_term_matcher_v1 import MATCH_MODE_SUBSTRING
+from token_matcher_v1 import MATCH_MODE_TOKEN, create_term_matcher
+from text_cleaning_v1 import CLEAN_MODE_ASCII, CLEAN_MODE_UNICODE, get_clean_text_function
+from match_set_config_v1 import compile_match_set_config
+from match_query_v1 import CompiledQueries
+from worker_bootstrap_v1 import create_bootstrapped_pool, collect_bootstrap_reports, format_bootstrap_report
+from adaptive_order_v1 import AdaptiveRowEvaluator, load_order_stats, save_order_stats, merge_order_stats
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -53,6 +62,12 @@ tuple_list_of_aggregation_lists_and_name = [
     ("b", b_list),
 ]
 
+# "ascii": a-z only, as before; "unicode": letters of every script (text_cleaning_v1)
+CLEAN_STRING_MODE = CLEAN_MODE_ASCII
+
+# "substring": a term anywhere in the text, as before; "token": whole words / phrases (token_matcher_v1)
+MATCH_MODE = MATCH_MODE_SUBSTRING
+
 REQUIRED_TERMS_CANCEL_LIST = [
     "cancel",
 ]
@@ -246,25 +261,8 @@ def split_csv_line(line, row_counter, max_field_length=20000):
         -> ['1', '2', 'hello,world', '3', '"quoted"', '4']
     """
     try:
-        pattern = r'(?:^|,)(?:"([^"]*(?:""[^"]*)*)"|([^,]*))'
-        
-        fields = []
-        for match in re.finditer(pattern, line):
-            # quoted field (group 1) or unquoted field (group 2)
-            field = match.group(1) or match.group(2)
-            
-            # Replace escaped quotes if it was a quoted field
-            if match.group(1) is not None:
-                field = field.replace('""', '"')
-            
-            # Truncate if longer than max_field_length
-            if len(field) > max_field_length:
-                print(f"Warning: row->{row_counter} Field truncated from {len(field)} to {max_field_length} characters")
-                field = field[:max_field_length]
-            
-            fields.append(field)
-            
-        return fields
+        # single pass delimiter/quote state machine, no regex (csv_record_parser_v1)
+        return split_csv_record(line, row_counter, max_field_length)
         
     except Exception as e:
         print(f"Error splitting CSV line: {str(e)}")
@@ -280,7 +278,10 @@ def csv_column_to_temp_file(file_path, column_index, max_field_length=MAX_ROW_SI
     not using python CSV standard library
     
     Reads a column from a CSV file and writes each row to a temporary file.
-    Using regex parsing instead of csv library.
+    Using state machine parsing (csv_record_parser_v1) instead of csv library,
+    a buffer of lines at a time, stopping each record after column_index.
+    Quoted fields containing newlines are kept in one record
+    (newlines in the value are written to the temp file as spaces).
     Truncates fields longer than max_field_length.
     
     Args:
@@ -300,24 +301,36 @@ def csv_column_to_temp_file(file_path, column_index, max_field_length=MAX_ROW_SI
         if not ensure_tmp_directory():
             return None
 
-        # Process file line by line and write to temp file
+        # Process file a buffer at a time and write to temp file
         with open(file_path, mode='r', encoding='utf-8') as csv_file:
             with open(temp_file_path, 'w', encoding='utf-8') as temp_file:
-                for line in csv_file:
-                    row_counter += 1
+                # read, assemble quoted multiline records and split, a buffer at a time;
+                # each record is only parsed up to column_index
+                for split_rows in iter_split_csv_records(csv_file, max_field_length, column_index, max_row_size=MAX_ROW_SIZE):
+                    row_counter += len(split_rows)
+                    
+                    field_values = [
+                        fields[column_index]
+                        for fields in split_rows
+                        if fields and len(fields) > column_index
+                    ]
                     
-                    # Skip empty lines
-                    if not line.strip():
+                    if not field_values:
                         continue
                     
-                    # Split the line properly
-                    fields = split_csv_line(line.strip(), row_counter, max_field_length)
+                    # only count truncations if any value reached the limit
+                    if max(map(len, field_values)) >= max_field_length:
+                        truncated_fields_count += sum(
+                            1 for field_value in field_values if len(field_value) == max_field_length
+                        )
+                    
+                    column_text = '\n'.join(field_values)
                     
-                    if fields and len(fields) > column_index:
-                        field_value = fields[column_index]
-                        if len(field_value) == max_field_length:
-                            truncated_fields_count += 1
-                        temp_file.write(f"{field_value}\n")
+                    # a quoted newline inside a value would break one-line-per-row in the temp file
+                    if column_text.count('\n') != len(field_values) - 1:
+                        column_text = '\n'.join(field_value.replace('\n', ' ') for field_value in field_values)
+                    
+                    temp_file.write(column_text + '\n')
         
         if truncated_fields_count > 0:
             print(f"Total fields truncated to {max_field_length} characters: {truncated_fields_count}")
@@ -350,10 +363,9 @@ def read_temp_file_lines(temp_file_path):
 def clean_string(text):
     """Remove all non-alphabetic characters and convert to lowercase."""
     if isinstance(text, str):
-        # Remove all non-alphabetic characters (keeping spaces)
-        cleaned = re.sub(r'[^a-zA-Z\s]', '', text)
-        # Convert to lowercase and strip extra whitespace
-        return ' '.join(cleaned.lower().split())
+        # one translate() pass + split/join (text_cleaning_v1),
+        # in "ascii" mode the same output as the old regex version
+        return get_clean_text_function(CLEAN_STRING_MODE)(text)
     return ''
 
 
@@ -563,14 +575,22 @@ def apply_row_processor_function(row, column_index, row_processor_function):
         return None
 
 
-def process_temp_file_in_parallel(temp_file_path, row_processor_function, chunk_size=1000):
+def process_temp_file_in_parallel(temp_file_path, row_processor_function, chunk_size=1000, max_in_flight=None, start_method=None):
     """
     Process rows from temp file in parallel.
     
+    Pipelined (parallel_pipeline_v1): up to max_in_flight chunks are
+    queued in the pool while the next chunk is read, so workers
+    do not wait for the parent or for the slowest row of a chunk.
+    
+    The compiled matcher is installed once per worker (worker_bootstrap_v1).
+    
     Args:
         temp_file_path (str): Path to temp file containing rows
         row_processor_function (callable): Function to process each row
         chunk_size (int): Size of chunks to process
+        max_in_flight (int): Chunks queued at a time, defaults to 2 per process
+        start_method (str): "fork", "spawn", "forkserver" or None for the default
         
     Returns:
         list: Results from processing
@@ -579,18 +599,27 @@ def process_temp_file_in_parallel(temp_file_path, row_processor_function, chunk_
         num_processes = multiprocessing.cpu_count()
         results = []
         
-        # Read chunks of line numbers
+        pool, startup = create_bootstrapped_pool(
+            num_processes,
+            install_pattern_matcher,
+            (get_pattern_matcher(), CLEAN_STRING_MODE, ROW_FILTER_QUERY, ADAPTIVE_ORDER_STATS),
+            start_method,
+        )
+        
+        # Read chunks of lines
         with open(temp_file_path, 'r') as f:
-            with Pool(processes=num_processes) as pool:
-                # Process chunks of line numbers
-                while True:
-                    lines = list(islice(f, chunk_size))
-                    if not lines:
-                        break
-                    
-                    # Process the chunk of lines
-                    chunk_results = pool.map(row_processor_function, lines)
-                    results.extend([r for r in chunk_results if r is not None])
+            with pool:
+                # results are summed, so chunks are taken in completion order
+                for chunk_results in iter_pipelined_map(
+                    pool,
+                    row_processor_function,
+                    f,
+                    chunk_size,
+                    max_in_flight,
+                ):
+                    results.extend(chunk_results)
+                
+                print(format_bootstrap_report(collect_bootstrap_reports(startup)))
                     
         return results
         
@@ -598,6 +627,87 @@ def process_temp_file_in_parallel(temp_file_path, row_processor_function, chunk_
         print(f"Error in parallel processing: {str(e)}")
         return []
 
+
+def count_temp_file_in_parallel(temp_file_path, row_processor_function, chunk_size=1000, max_in_flight=None, start_method=None, dedup_cache_size=0):
+    """
+    Counts pattern groups over the temp file in parallel,
+    with worker-side partial aggregation (parallel_pipeline_v1):
+    each worker folds its chunk into one count per group,
+    the parent only adds those up (no per-row dicts or results list).
+    
+    The compiled matcher is installed once per worker (worker_bootstrap_v1).
+    
+    With dedup_cache_size, each distinct row text is matched once
+    (per chunk, and an LRU of that many entries per worker, dedup_counts_v1),
+    and the hit rate and time saved are printed.
+    
+    With --adaptive-order, each chunk also returns the worker's term
+    stats, merged into ADAPTIVE_ORDER_STATS (adaptive_order_v1).
+    
+    Args:
+        temp_file_path (str): Path to temp file containing rows
+        row_processor_function (callable): Function returning a {group_name: 0/1} dict per row
+        chunk_size (int): Size of chunks to process
+        max_in_flight (int): Chunks queued at a time, defaults to 2 per process
+        start_method (str): "fork", "spawn", "forkserver" or None for the default
+        dedup_cache_size (int): LRU entries per worker, 0 for no dedup
+        
+    Returns:
+        tuple: (count_dict, number of rows where the function returned None),
+               or (None, 0) on failure
+    """
+    try:
+        num_processes = multiprocessing.cpu_count()
+        group_names = get_group_names()
+        
+        stats_function = merge_stats_function = None
+        if ADAPTIVE_ORDER_STATS is not None:
+            stats_function = take_adaptive_order_stats
+            merge_stats_function = functools.partial(merge_order_stats, ADAPTIVE_ORDER_STATS)
+        
+        pool, startup = create_bootstrapped_pool(
+            num_processes,
+            install_pattern_matcher,
+            (get_pattern_matcher(), CLEAN_STRING_MODE, ROW_FILTER_QUERY, ADAPTIVE_ORDER_STATS),
+            start_method,
+        )
+        
+        with open(temp_file_path, 'r') as f:
+            with pool:
+                if dedup_cache_size:
+                    group_counts, none_count, dedup_report = pipelined_group_counts_dedup(
+                        pool,
+                        row_processor_function,
+                        f,
+                        group_names,
+                        chunk_size,
+                        max_in_flight,
+                        dedup_cache_size,
+                        stats_function,
+                        merge_stats_function,
+                    )
+                    count_results = (group_counts, none_count)
+                    print(format_dedup_report(dedup_report))
+                else:
+                    count_results = pipelined_group_counts(
+                        pool,
+                        row_processor_function,
+                        f,
+                        group_names,
+                        chunk_size,
+                        max_in_flight,
+                        stats_function,
+                        merge_stats_function,
+                    )
+                
+                print(format_bootstrap_report(collect_bootstrap_reports(startup)))
+        
+        return count_results
+        
+    except Exception as e:
+        print(f"Error in parallel processing: {str(e)}")
+        return None, 0
+
 # def parallel_process_csv_rows(file_path, column_index, row_processor_function, chunk_size=1000):
 #     """
 #     Processes CSV rows in parallel, applying the given row_processor_function to each row.
@@ -638,6 +748,91 @@ def process_temp_file_in_parallel(temp_file_path, row_processor_function, chunk_
 #         return []
 
 
+# compiled once per process, see get_pattern_matcher()
+PATTERN_MATCHER = None
+
+# --query row filter (match_query_v1.CompiledQueries), or None
+ROW_FILTER_QUERY = None
+
+# --adaptive-order: term stats to start from (parent: merged from the workers), or None
+ADAPTIVE_ORDER_STATS = None
+
+# per worker: adaptive_order_v1.AdaptiveRowEvaluator, set by install_pattern_matcher()
+ADAPTIVE_EVALUATOR = None
+
+
+def get_pattern_matcher():
+    """
+    Compiles the cancel terms and all aggregation group terms into one
+    matcher (multi_term_matcher_v1, or token_matcher_v1 with --tokens), once per process:
+    the patterns are cleaned once, and one scan of the cleaned text
+    finds the terms of every group.
+    
+    Returns:
+        MultiTermMatcher: Compiled matcher
+    """
+    global PATTERN_MATCHER
+    if PATTERN_MATCHER is None:
+        PATTERN_MATCHER = create_term_matcher(
+            match_sets=[("cancel", REQUIRED_TERMS_CANCEL_LIST, OPTIONAL_CANCEL_TERMS, 2)],
+            aggregation_groups=tuple_list_of_aggregation_lists_and_name,
+            clean_function=clean_string,
+            match_mode=MATCH_MODE,
+        )
+    return PATTERN_MATCHER
+
+
+def install_pattern_matcher(pattern_matcher, clean_string_mode, row_filter_query=None, adaptive_order_stats=None):
+    """
+    Worker bootstrap (worker_bootstrap_v1): installs the matcher,
+    clean mode and row filter query compiled in the parent, once per
+    worker, so runtime settings (--unicode, --config, --query,
+    --adaptive-order) reach the workers under fork, spawn and forkserver alike.
+    
+    Args:
+        pattern_matcher (MultiTermMatcher): Matcher compiled by the parent
+        clean_string_mode (str): "ascii" or "unicode"
+        row_filter_query (CompiledQueries): --query filter, or None
+        adaptive_order_stats (dict): Term stats to start the adaptive order from, or None for off
+    """
+    global PATTERN_MATCHER, CLEAN_STRING_MODE, ROW_FILTER_QUERY, ADAPTIVE_EVALUATOR
+    PATTERN_MATCHER = pattern_matcher
+    CLEAN_STRING_MODE = clean_string_mode
+    ROW_FILTER_QUERY = row_filter_query
+    ADAPTIVE_EVALUATOR = None
+    if adaptive_order_stats is not None:
+        ADAPTIVE_EVALUATOR = AdaptiveRowEvaluator.from_matcher(pattern_matcher, stats=adaptive_order_stats)
+
+
+def take_adaptive_order_stats():
+    """Worker stats function: this worker's term stats since the last chunk."""
+    if ADAPTIVE_EVALUATOR is None:
+        return {}
+    return ADAPTIVE_EVALUATOR.take_stats_delta()
+
+
+def row_passes_filter_query(text, clean_text):
+    """
+    The --query row filter; the matcher's cleaned text is reused
+    when the query cleans the same way as the matcher.
+    
+    Args:
+        text (str): Row text
+        clean_text (str): Row text cleaned by get_pattern_matcher()
+        
+    Returns:
+        bool: True if the row matches the query
+    """
+    if get_pattern_matcher().clean_function is not clean_string or ROW_FILTER_QUERY.clean_mode != CLEAN_STRING_MODE:
+        clean_text = None
+    return ROW_FILTER_QUERY.matches(text, clean_text=clean_text)
+
+
+def get_group_names():
+    """Aggregation group names of the current matcher, in order."""
+    return [name for name, _ in get_pattern_matcher().aggregation_groups]
+
+
 # Example of a specific row processor function
 def count_pattern_matches_in_text(text):
     """
@@ -657,32 +852,42 @@ def count_pattern_matches_in_text(text):
         """
         Requires terminology for refunds, cancelations, etc.
         """
-        content_checks = False
-
-        hard_term_check = False
-        hard_term_check = is_required_cancelrefund_terms(text, REQUIRED_TERMS_CANCEL_LIST)
+        matcher = get_pattern_matcher()
+        evaluator = ADAPTIVE_EVALUATOR
         
-        optional_term_check = False
-        optional_term_check = is_optional_n_cancelrefund_terms(text, OPTIONAL_CANCEL_TERMS, n_terms=2)
+        if evaluator is not None:
+            # --adaptive-order (adaptive_order_v1): cleaned once, short-circuit
+            # term loops in the order learned from the rows so far
+            evaluator.start_row()
+            clean_text = evaluator.clean(text)
+        else:
+            # prepared row: cleaned once, one scan finds the cancel terms
+            # and the group terms, both layers read the same term ids
+            prepared_row = matcher.prepare_row(text)
+            clean_text = prepared_row.clean_text
+            found_term_ids = prepared_row.found_term_ids
         
-        if optional_term_check or hard_term_check:
-            content_checks = True       
+        if ROW_FILTER_QUERY is not None:
+            # --query (match_query_v1) replaces the cancel terms
+            content_checks = row_passes_filter_query(text, clean_text)
+        elif evaluator is not None:
+            content_checks = evaluator.passes_match_sets(clean_text)
+        else:
+            # any required cancel term, or 2 optional ones
+            # (with --config: every match set of the config must pass)
+            content_checks = all(matcher.evaluate_match_sets(found_term_ids).values())
 
         if content_checks is True:
         
-            result_dict = {name: 0 for name, _ in tuple_list_of_aggregation_lists_and_name}
-            clean_text = clean_string(text)
-            match_found = False
+            result_dict = {name: 0 for name, _ in matcher.aggregation_groups}
             
-            for group_name, patterns in tuple_list_of_aggregation_lists_and_name:
-                if match_found:
-                    break
-                
-                for pattern in patterns:
-                    if clean_string(pattern) in clean_text:
-                        result_dict[group_name] = 1
-                        match_found = True
-                        break
+            # first group (in list order) with a matching pattern
+            if evaluator is not None:
+                group_name = evaluator.first_matching_group(clean_text)
+            else:
+                group_name = matcher.first_matching_group(found_term_ids)
+            if group_name is not None:
+                result_dict[group_name] = 1
 
             return result_dict
             
@@ -797,11 +1002,66 @@ def main():
     parser = argparse.ArgumentParser(description='Process CSV file and count patterns in specified column.')
     parser.add_argument('--filepath', '-f', help='Input CSV file path', required=False)
     parser.add_argument('--column', '-c', type=int, help='Column index to count', required=False)
+    parser.add_argument('--sharded', '-s', action='store_true',
+                        help='Workers read their own byte ranges of the file (no temp file)')
+    parser.add_argument('--unicode', '-u', action='store_true',
+                        help='Keep non-ASCII letters when cleaning text and patterns (also sets a --config clean_mode)')
+    parser.add_argument('--tokens', '-w', action='store_true',
+                        help='Terms match whole words / phrases, not substrings (also sets a --config match_mode)')
+    parser.add_argument('--config', '-m', required=False,
+                        help='Match-set config (.json or .toml) instead of the lists in this file')
+    parser.add_argument('--start-method', choices=multiprocessing.get_all_start_methods(), default=None,
+                        help='Worker start method (default: platform default)')
+    parser.add_argument('--dedup', type=int, default=0, metavar='CACHE_SIZE',
+                        help='Match each distinct row text once, LRU entries per worker (0: off)')
+    parser.add_argument('--query', '-q', required=False,
+                        help='Row filter query, e.g. \'NEAR(5, cancel, subscription) OR ATLEAST(2, refund, "money back")\' (match_query_v1)')
+    parser.add_argument('--adaptive-order', required=False, metavar='STATS_PATH',
+                        help='Order term tests by observed hit rate, stats loaded from and saved to this JSON file')
     
     args = parser.parse_args()
 
+    if args.sharded and args.dedup:
+        parser.error("--dedup can not be used with --sharded (shard workers do not dedup)")
+    if args.sharded and args.adaptive_order:
+        parser.error("--adaptive-order can not be used with --sharded (shard workers' stats are not collected)")
+
+    global CLEAN_STRING_MODE, MATCH_MODE, PATTERN_MATCHER, ROW_FILTER_QUERY, ADAPTIVE_ORDER_STATS
+    if args.unicode:
+        # installed in every worker by the pool initializer
+        CLEAN_STRING_MODE = CLEAN_MODE_UNICODE
+    if args.tokens:
+        # part of the compiled matcher the workers get
+        MATCH_MODE = MATCH_MODE_TOKEN
+
     try:
+        if args.config:
+            # compiled once here, installed in every worker by the pool initializer
+            PATTERN_MATCHER = compile_match_set_config(
+                args.config,
+                match_mode=MATCH_MODE_TOKEN if args.tokens else None,
+                clean_mode=CLEAN_MODE_UNICODE if args.unicode else None,
+            ).matcher
+
+        if args.query:
+            # compiled once here (shared DAG), installed in every worker by the pool initializer
+            ROW_FILTER_QUERY = CompiledQueries(
+                [("filter", args.query)],
+                clean_mode=CLEAN_STRING_MODE,
+                match_mode=get_pattern_matcher().match_mode,
+            )
+            if ROW_FILTER_QUERY.columns != (None,):
+                raise ValueError("--query can only test the counted column (no column: prefixes)")
+            print(f"Row filter: {ROW_FILTER_QUERY.describe()}")
+
+        if args.adaptive_order:
+            if get_pattern_matcher().match_mode != MATCH_MODE_SUBSTRING:
+                raise ValueError("--adaptive-order reorders substring tests, it can not be used with token matching")
+            # seeds every worker's order, worker stats are merged back per chunk
+            ADAPTIVE_ORDER_STATS = load_order_stats(args.adaptive_order)
+
         start_time_whole_single_task = datetime.now()
+        empty_results_count = 0
 
         # Get Path Input - either from command line or user input
         if args.filepath:
@@ -820,18 +1080,43 @@ def main():
         else:
             column_index = int(input("\ncolumn index to count...\n"))
        
-        # Process CSV and write to temp file
-        temp_file_path = csv_column_to_temp_file(input_file_path, column_index)
+        if args.sharded:
+            # Byte-range shards: each worker reads, parses and matches
+            # its own part of the file and returns one Counter
+            # (header row included, same rows as the temp file)
+            shard_counts, shard_report = scan_csv_sharded(
+                input_file_path,
+                column_index,
+                count_pattern_matches_in_text,
+                skip_header=False,
+                start_method=args.start_method,
+                install_function=install_pattern_matcher,
+                install_args=(get_pattern_matcher(), CLEAN_STRING_MODE, ROW_FILTER_QUERY, ADAPTIVE_ORDER_STATS),
+            )
+            if shard_counts is None:
+                # nothing is saved from a scan with failed shards
+                if shard_report is not None:
+                    for shard_error in shard_report["shard_errors"]:
+                        print(f"Shard error: {shard_error}")
+                sys.exit(1)
+            print(f"Sharded scan: {shard_report}")
+            count_dict = {name: shard_counts.get(name, 0) for name in get_group_names()}
+            empty_results_count = shard_report["empty_results"]
+
+            temp_file_path = None
+        else:
+            # Process CSV and write to temp file
+            temp_file_path = csv_column_to_temp_file(input_file_path, column_index)
 
         if temp_file_path:
-            # Process temp file in parallel
-            individual_results = process_temp_file_in_parallel(
+            # Process temp file in parallel,
+            # each worker returns one partial count per chunk
+            count_dict, empty_results_count = count_temp_file_in_parallel(
                 temp_file_path,
-                count_pattern_matches_in_text  # Your row processing function
+                count_pattern_matches_in_text,  # Your row processing function
+                start_method=args.start_method,
+                dedup_cache_size=args.dedup,
             )
-            
-            # Combine results
-            count_dict = combine_results(individual_results)
 
         # make directory if not found
         if not os.path.exists("results"):
@@ -855,13 +1140,21 @@ def main():
             txtfile.write(str(descending_list) + '\n')
         
         print("Results saved to files in results directory")
+        
+        if args.adaptive_order:
+            save_order_stats(args.adaptive_order, ADAPTIVE_ORDER_STATS)
+            learned_order = AdaptiveRowEvaluator.from_matcher(get_pattern_matcher(), stats=ADAPTIVE_ORDER_STATS)
+            print(f"Adaptive term order saved to {args.adaptive_order}:")
+            print(learned_order.describe_order())
 
         end_time_whole_single_task = datetime.now()
         time_taken = duration_min_sec(start_time_whole_single_task, end_time_whole_single_task)
         print(time_taken)
         
+        # the row function returns None when the hard filter fails
+        # (FAIL_HARD_FILTER_COUNTER is only filled inside the workers)
         print("Number of hard filter fails:")
-        print(len(FAIL_HARD_FILTER_COUNTER))
+        print(empty_results_count)
 
     except ValueError as e:
         print(f"Invalid input: {str(e)}")
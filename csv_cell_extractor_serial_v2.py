@@ -5,8 +5,9 @@
 import csv
 import os
 from pathlib import Path
-import re
 from datetime import datetime, UTC as datetime_UTC
+from csv_record_parser_v1 import split_csv_record, iter_split_csv_records
+from row_offset_index_v1 import read_indexed_csv_record
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -20,8 +21,11 @@ from datetime import datetime, UTC as datetime_UTC
 
 
 
-Uses row by row file line reading 
-in case large .csv files are used.
+Uses a quote-aware sidecar record index (row_offset_index_v1)
+to seek() straight to the target record and parse only that record,
+so quoted fields containing newlines do not shift the row numbering.
+Falls back to row by row file line reading 
+in case the index cannot be built.
 """
 
 def ensure_x_directory(directory_name_input=None):
@@ -85,25 +89,8 @@ def split_csv_line(line, row_counter, max_field_length=20000):
         -> ['1', '2', 'hello,world', '3', '"quoted"', '4']
     """
     try:
-        pattern = r'(?:^|,)(?:"([^"]*(?:""[^"]*)*)"|([^,]*))'
-        
-        fields = []
-        for match in re.finditer(pattern, line):
-            # quoted field (group 1) or unquoted field (group 2)
-            field = match.group(1) or match.group(2)
-            
-            # Replace escaped quotes if it was a quoted field
-            if match.group(1) is not None:
-                field = field.replace('""', '"')
-            
-            # Truncate if longer than max_field_length
-            if len(field) > max_field_length:
-                print(f"Warning: row->{row_counter} Field truncated from {len(field)} to {max_field_length} characters")
-                field = field[:max_field_length]
-            
-            fields.append(field)
-            
-        return fields
+        # single pass delimiter/quote state machine, no regex (csv_record_parser_v1)
+        return split_csv_record(line, row_counter, max_field_length)
         
     except Exception as e:
         print(f"Error splitting CSV line: {str(e)}")
@@ -118,7 +105,10 @@ def csv_column_to_temp_file(file_path, column_index, max_field_length=20000):
     not using python CSV standard library
     
     Reads a column from a CSV file and writes each row to a temporary file.
-    Using regex parsing instead of csv library.
+    Using state machine parsing (csv_record_parser_v1) instead of csv library,
+    a buffer of lines at a time, stopping each record after column_index.
+    Quoted fields containing newlines are kept in one record
+    (newlines in the value are written to the temp file as spaces).
     Truncates fields longer than max_field_length.
     
     Args:
@@ -138,24 +128,36 @@ def csv_column_to_temp_file(file_path, column_index, max_field_length=20000):
         if not ensure_x_directory("tmp"):
             return None
 
-        # Process file line by line and write to temp file
+        # Process file a buffer at a time and write to temp file
         with open(file_path, mode='r', encoding='utf-8') as csv_file:
             with open(temp_file_path, 'w', encoding='utf-8') as temp_file:
-                for line in csv_file:
-                    row_counter += 1
+                # read, assemble quoted multiline records and split, a buffer at a time;
+                # each record is only parsed up to column_index
+                for split_rows in iter_split_csv_records(csv_file, max_field_length, column_index):
+                    row_counter += len(split_rows)
                     
-                    # Skip empty lines
-                    if not line.strip():
+                    field_values = [
+                        fields[column_index]
+                        for fields in split_rows
+                        if fields and len(fields) > column_index
+                    ]
+                    
+                    if not field_values:
                         continue
                     
-                    # Split the line properly
-                    fields = split_csv_line(line.strip(), row_counter, max_field_length)
+                    # only count truncations if any value reached the limit
+                    if max(map(len, field_values)) >= max_field_length:
+                        truncated_fields_count += sum(
+                            1 for field_value in field_values if len(field_value) == max_field_length
+                        )
+                    
+                    column_text = '\n'.join(field_values)
                     
-                    if fields and len(fields) > column_index:
-                        field_value = fields[column_index]
-                        if len(field_value) == max_field_length:
-                            truncated_fields_count += 1
-                        temp_file.write(f"{field_value}\n")
+                    # a quoted newline inside a value would break one-line-per-row in the temp file
+                    if column_text.count('\n') != len(field_values) - 1:
+                        column_text = '\n'.join(field_value.replace('\n', ' ') for field_value in field_values)
+                    
+                    temp_file.write(column_text + '\n')
         
         if truncated_fields_count > 0:
             print(f"Total fields truncated to {max_field_length} characters: {truncated_fields_count}")
@@ -218,6 +220,39 @@ def read_temp_file_lines(temp_file_path):
         print(f"Error reading temporary file: {str(e)}")
 
 
+def extract_cell_with_record_index(file_path, target_row, column_index, max_field_length=20000):
+    """
+    Seeks to one csv record via the record index and parses only that record.
+    
+    Row numbering matches main(): row 1 is the header row.
+    
+    Args:
+        file_path (str): Path to the CSV file
+        target_row (int): Row to extract (1 = header)
+        column_index (int): Index of the column to extract
+        max_field_length (int): Maximum length for any field, defaults to 20000
+    
+    Returns:
+        str: The cell text ('' if the row or column does not exist),
+             or None if the record index is unavailable
+    """
+    record_string = read_indexed_csv_record(file_path, max(target_row - 1, 0))
+    
+    if record_string is None:
+        return None
+    
+    if not record_string:
+        return ''
+    
+    # parse only up to the requested column
+    fields = split_csv_record(record_string, target_row, max_field_length, column_index)
+    
+    if fields and len(fields) > column_index:
+        return fields[column_index].strip()
+    
+    return ''
+
+
 def main():
     """
     Main function to run the CSV processing workflow.
@@ -236,13 +271,20 @@ def main():
         # Get column index, make type -> int
         target_row = int(input("\nFile row to extract...\n"))
         
-        # Process CSV and write to temp file
-        temp_file_path = csv_column_to_temp_file(input_file_path, column_index)
-        
         # preset reset
         row_counter = 1  # offset for header and zero indexing to match csv row
         cell_string = ''
+        temp_file_path = None
+        
+        # seek straight to the record using the sidecar record index
+        indexed_cell = extract_cell_with_record_index(input_file_path, target_row, column_index)
+        
+        if indexed_cell is not None:
+            cell_string = indexed_cell
         
+        else:
+            # Process CSV and write to temp file
+            temp_file_path = csv_column_to_temp_file(input_file_path, column_index)
         
         if temp_file_path:
             print("\nProcessing rows from temporary file:")
@@ -2,10 +2,12 @@
 
 
 import csv
+import argparse
 import os
 from pathlib import Path
-import re
 from datetime import datetime, UTC as datetime_UTC
+from csv_record_parser_v1 import split_csv_record, iter_split_csv_records
+from batch_row_extractor_v1 import read_row_numbers_file, extract_rows_batch
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -16,6 +18,8 @@ from datetime import datetime, UTC as datetime_UTC
 - user input
 - input args: column-index row-number
 - vanilla python, not pandas
+- batch mode: --rows-file of row numbers (row 1 = header),
+  optional --columns, one pass, one results .csv/.jsonl
 
 
 Uses row by row file line reading 
@@ -72,25 +76,8 @@ def split_csv_line(line, row_counter, max_field_length=20000):
         -> ['1', '2', 'hello,world', '3', '"quoted"', '4']
     """
     try:
-        pattern = r'(?:^|,)(?:"([^"]*(?:""[^"]*)*)"|([^,]*))'
-        
-        fields = []
-        for match in re.finditer(pattern, line):
-            # quoted field (group 1) or unquoted field (group 2)
-            field = match.group(1) or match.group(2)
-            
-            # Replace escaped quotes if it was a quoted field
-            if match.group(1) is not None:
-                field = field.replace('""', '"')
-            
-            # Truncate if longer than max_field_length
-            if len(field) > max_field_length:
-                print(f"Warning: row->{row_counter} Field truncated from {len(field)} to {max_field_length} characters")
-                field = field[:max_field_length]
-            
-            fields.append(field)
-            
-        return fields
+        # single pass delimiter/quote state machine, no regex (csv_record_parser_v1)
+        return split_csv_record(line, row_counter, max_field_length)
         
     except Exception as e:
         print(f"Error splitting CSV line: {str(e)}")
@@ -105,7 +92,10 @@ def csv_column_to_temp_file(file_path, column_index, max_field_length=20000):
     not using python CSV standard library
     
     Reads a column from a CSV file and writes each row to a temporary file.
-    Using regex parsing instead of csv library.
+    Using state machine parsing (csv_record_parser_v1) instead of csv library,
+    a buffer of lines at a time, stopping each record after column_index.
+    Quoted fields containing newlines are kept in one record
+    (newlines in the value are written to the temp file as spaces).
     Truncates fields longer than max_field_length.
     
     Args:
@@ -125,24 +115,36 @@ def csv_column_to_temp_file(file_path, column_index, max_field_length=20000):
         if not ensure_tmp_directory():
             return None
 
-        # Process file line by line and write to temp file
+        # Process file a buffer at a time and write to temp file
         with open(file_path, mode='r', encoding='utf-8') as csv_file:
             with open(temp_file_path, 'w', encoding='utf-8') as temp_file:
-                for line in csv_file:
-                    row_counter += 1
+                # read, assemble quoted multiline records and split, a buffer at a time;
+                # each record is only parsed up to column_index
+                for split_rows in iter_split_csv_records(csv_file, max_field_length, column_index):
+                    row_counter += len(split_rows)
                     
-                    # Skip empty lines
-                    if not line.strip():
+                    field_values = [
+                        fields[column_index]
+                        for fields in split_rows
+                        if fields and len(fields) > column_index
+                    ]
+                    
+                    if not field_values:
                         continue
                     
-                    # Split the line properly
-                    fields = split_csv_line(line.strip(), row_counter, max_field_length)
+                    # only count truncations if any value reached the limit
+                    if max(map(len, field_values)) >= max_field_length:
+                        truncated_fields_count += sum(
+                            1 for field_value in field_values if len(field_value) == max_field_length
+                        )
+                    
+                    column_text = '\n'.join(field_values)
+                    
+                    # a quoted newline inside a value would break one-line-per-row in the temp file
+                    if column_text.count('\n') != len(field_values) - 1:
+                        column_text = '\n'.join(field_value.replace('\n', ' ') for field_value in field_values)
                     
-                    if fields and len(fields) > column_index:
-                        field_value = fields[column_index]
-                        if len(field_value) == max_field_length:
-                            truncated_fields_count += 1
-                        temp_file.write(f"{field_value}\n")
+                    temp_file.write(column_text + '\n')
         
         if truncated_fields_count > 0:
             print(f"Total fields truncated to {max_field_length} characters: {truncated_fields_count}")
@@ -205,13 +207,72 @@ def read_temp_file_lines(temp_file_path):
         print(f"Error reading temporary file: {str(e)}")
 
 
+def run_batch_mode(input_file_path, rows_file_path, column_indices, output_format):
+    """
+    Extracts all rows listed in rows_file_path (row 1 = header)
+    in one pass over the .csv, writing one results file.
+    
+    Args:
+        input_file_path (str): Path to the CSV file
+        rows_file_path (str): Path to file of row numbers, one per line
+        column_indices (list): Column indices to extract, or None for whole rows
+        output_format (str): "csv" or "jsonl"
+    """
+    row_numbers = read_row_numbers_file(rows_file_path)
+    
+    # make directory if not found
+    if not os.path.exists("results"):
+        os.makedirs("results")
+    
+    # get time
+    sample_time = datetime.now(datetime_UTC)
+    # make readable string
+    readable_timesatamp = sample_time.strftime('%Y_%m_%d__%H_%M_%S%f')
+    
+    output_path = f"results/batch_cells_{readable_timesatamp}.{output_format}"
+    
+    report = extract_rows_batch(
+        input_file_path,
+        row_numbers,
+        output_path,
+        column_indices=column_indices,
+        split_function=split_csv_line,
+        output_format=output_format,
+        record_mode=True,
+        row_number_base=1,
+    )
+    
+    if report:
+        print(f"{report['written']} of {report['requested']} rows ({report['access']}) -> {output_path}")
+
+
 def main():
     """
     Main function to run the CSV processing workflow.
     """
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Extract a cell, or many rows/cells in batch, from a CSV file.')
+    parser.add_argument('--filepath', '-f', help='Input CSV file path', required=False)
+    parser.add_argument('--rows-file', '-r', help='Batch mode: file of row numbers, one per line (row 1 = header)', required=False)
+    parser.add_argument('--columns', '-c', help='Batch mode: comma separated column indices, e.g. 0,3', required=False)
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Batch mode output format')
+    
+    args = parser.parse_args()
+
     try:
-        # Get Path Input
-        input_file_path = input("\nEnter .csv path...\n")
+        # Get Path Input - either from command line or user input
+        if args.filepath:
+            input_file_path = args.filepath
+        else:
+            input_file_path = input("\nEnter .csv path...\n")
+
+        if args.rows_file:
+            column_indices = None
+            if args.columns:
+                column_indices = [int(index) for index in args.columns.split(',')]
+            
+            run_batch_mode(input_file_path, args.rows_file, column_indices, args.format)
+            return
 
         # Print the header with index numbers
         print("\nColumn indexes:")
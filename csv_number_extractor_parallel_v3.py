@@ -2,10 +2,17 @@
 
 
 import csv
+import argparse
 import os
 from pathlib import Path
 import re
+import multiprocessing
+from multiprocessing import Pool
+import functools
+from collections import Counter
 from datetime import datetime, UTC as datetime_UTC
+from csv_sharded_scan_v1 import scan_csv_sharded
+from parallel_pipeline_v1 import iter_pipelined_map
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -193,17 +200,6 @@ Uses row by row file line reading
 in case large .csv files are used.
 """
 
-import csv
-import os
-from pathlib import Path
-import re
-import multiprocessing
-from multiprocessing import Pool
-from itertools import islice
-import functools
-from collections import Counter
-
-from datetime import datetime, UTC as datetime_UTC
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -323,7 +319,7 @@ def process_row(row, column_index, function_to_process_row):
         return None
 
 
-def process_csv_parallel(file_path, column_index, function_to_process_row, chunk_size=1000):
+def process_csv_parallel(file_path, column_index, function_to_process_row, chunk_size=1000, max_in_flight=None):
     """
     Process CSV rows in parallel using multiprocessing.
     
@@ -332,6 +328,7 @@ def process_csv_parallel(file_path, column_index, function_to_process_row, chunk
         column_index (int): Index of the column to process
         function_to_process_row (callable): Function to process each row
         chunk_size (int): Size of chunks to process at once
+        max_in_flight (int): Chunks queued at a time, defaults to 2 per process
         
     Returns:
         list: Processed results
@@ -352,15 +349,18 @@ def process_csv_parallel(file_path, column_index, function_to_process_row, chunk
             next(csv_reader)  # Skip header
             
             with Pool(processes=num_processes) as pool:
-                # Process in chunks to handle large files efficiently
-                while True:
-                    chunk = list(islice(csv_reader, chunk_size))
-                    if not chunk:
-                        break
-                    
-                    # Process chunk in parallel
-                    chunk_results = pool.map(process_func, chunk)
-                    results.extend([r for r in chunk_results if r is not None])
+                # Pipelined chunks: the next chunk is read and queued while
+                # the workers process the others, bounded by max_in_flight;
+                # ordered=True keeps the results in row order
+                for chunk_results in iter_pipelined_map(
+                    pool,
+                    process_func,
+                    csv_reader,
+                    chunk_size,
+                    max_in_flight,
+                    ordered=True,
+                ):
+                    results.extend(chunk_results)
         
         return results
     
@@ -373,24 +373,50 @@ def main():
     """
     Main function to run the CSV processing workflow.
     """
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Extract and count numbers in a CSV column.')
+    parser.add_argument('--filepath', '-f', help='Input CSV file path', required=False)
+    parser.add_argument('--column', '-c', type=int, help='Column index to count', required=False)
+    parser.add_argument('--sharded', '-s', action='store_true',
+                        help='Workers read their own byte ranges of the file, only counts are returned')
+
+    args = parser.parse_args()
 
     try:
         start_time_whole_single_task = datetime.now()
 
-        # Get Path Input
-        input_file_path = input("\nEnter .csv path...\n")
+        # Get Path Input - either from command line or user input
+        if args.filepath:
+            input_file_path = args.filepath
+        else:
+            input_file_path = input("\nEnter .csv path...\n")
 
         # Print the header with index numbers
         print("\nColumn indexes:")
         print_header_with_index(input_file_path)
 
-        # Get column index, make type -> int
-        column_index = int(input("\ncolumn index to count...\n"))
-
-        # Process CSV in parallel
-        collection_list = process_csv_parallel(input_file_path, 
-                                            column_index, 
-                                            extract_numbers)
+        # Get column index - either from command line or user input
+        if args.column is not None:
+            column_index = args.column
+        else:
+            column_index = int(input("\ncolumn index to count...\n"))
+
+        if args.sharded:
+            # Byte-range shards: each worker reads, parses and extracts
+            # its own part of the file and returns one Counter,
+            # the per-row list is never built (no collection_listlist file)
+            shard_counts, shard_report = scan_csv_sharded(input_file_path,
+                                                          column_index,
+                                                          extract_numbers)
+            if shard_counts is None:
+                return
+            print(f"Sharded scan: {shard_report}")
+            collection_list = None
+        else:
+            # Process CSV in parallel
+            collection_list = process_csv_parallel(input_file_path, 
+                                                column_index, 
+                                                extract_numbers)
 
         # Create results directory if needed
         if not os.path.exists("results"):
@@ -407,8 +433,9 @@ def main():
         ## 1. Results list
         
         # Save results
-        with open(f"results/{filename_1_list}", 'w') as txtfile:
-            txtfile.write(str(collection_list) + '\n')
+        if collection_list is not None:
+            with open(f"results/{filename_1_list}", 'w') as txtfile:
+                txtfile.write(str(collection_list) + '\n')
             
         ## 2. counter dict
         
@@ -416,7 +443,11 @@ def main():
         counter_dict = None
         
         # make counter dict
-        counter_dict = list_of_lists_to_counter_dict(collection_list)
+        if collection_list is not None:
+            counter_dict = list_of_lists_to_counter_dict(collection_list)
+        else:
+            # same descending order as list_of_lists_to_counter_dict()
+            counter_dict = dict(shard_counts.most_common())
         
         # Save results
         with open(f"results/{filename_2_counterdict}", 'w') as txtfile:
@@ -0,0 +1,384 @@
+# vanilla python .csv tool: byte-range sharded parallel scan
+# workers open, seek, parse and match their own part of the file
+
+import io
+import mmap
+import multiprocessing
+from collections import Counter
+from worker_bootstrap_v1 import create_bootstrapped_pool, collect_bootstrap_reports, format_bootstrap_report
+from csv_record_parser_v1 import (
+    CSV_BUFFER_SIZE,
+    MAX_ROW_SIZE,
+    iter_split_csv_records,
+    csv_line_ends_in_quotes,
+    scan_csv_quote_state,
+    count_in_range,
+)
+
+"""
+- parallel
+- vanilla python, not pandas
+- no temp file, no rows read or pickled by the parent
+
+The parent only splits the file into N byte ranges (shards),
+each worker reads its own range and sends back one Counter.
+
+1. shard boundaries
+   Candidate offsets are evenly spaced over the file, each moved to the
+   next line start. The quote state at a line start depends on every
+   line before it, so each worker scans one candidate range assuming it
+   starts outside quotes (scan_csv_quote_state(): the parser's own rule,
+   a quote only opens a field at a field start, so a stray 5" does not
+   flip the state; lines without quotes are skipped at C speed), and the
+   parent chains the real states from the file start, rescanning a range
+   that actually starts inside a quoted field.
+   Each boundary is then moved forward to the next record start:
+   a quoted multiline value is never cut in two. The same pass counts
+   the record ends (newlines outside quotes) of the file.
+
+2. scan
+   Each worker opens the file, seeks to its start, and reads only up to
+   its end through the same buffered parser as csv_column_to_temp_file()
+   (iter_split_csv_records(), quoted newlines, column projection).
+   The row function is applied to the cell, the results are added
+   into a Counter, and only that Counter (plus row counts) is pickled back.
+
+There are more shards than processes (SHARDS_PER_PROCESS),
+so a shard of long rows does not leave the other processes idle at the end.
+
+If the shards together read a different number of records than the
+boundary pass counted (e.g. a stray quote left open past MAX_ROW_SIZE,
+or lone \r line endings), the scan fails: no counts are returned.
+
+Use:
+    counts, report = scan_csv_sharded("big.csv", 5, count_pattern_matches_in_text)
+"""
+
+# shards per worker process, for load balancing
+SHARDS_PER_PROCESS = 4
+
+# do not split the file into shards smaller than this
+MIN_SHARD_SIZE = 1024 * 1024
+
+
+class ByteRangeReader(io.RawIOBase):
+    """
+    Raw binary reader over one byte range of a file: reads stop at range_end.
+    Wrap in io.TextIOWrapper (see open_byte_range_text) to read text.
+    """
+
+    def __init__(self, file_path, range_start, range_end):
+        self._file = open(file_path, 'rb')
+        self._file.seek(range_start)
+        self._remaining = max(range_end - range_start, 0)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+
+        read_size = min(len(buffer), self._remaining)
+        with memoryview(buffer) as buffer_view:
+            bytes_read = self._file.readinto(buffer_view[:read_size])
+
+        self._remaining -= bytes_read
+        return bytes_read
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def open_byte_range_text(file_path, range_start, range_end, encoding='utf-8'):
+    """
+    Opens one byte range of a file as a text file object.
+
+    Args:
+        file_path (str): Path to the file
+        range_start (int): First byte of the range (a record start)
+        range_end (int): Byte after the range (a record start, or the file size)
+        encoding (str): Text encoding
+
+    Returns:
+        io.TextIOWrapper: Text file reading only that range
+    """
+    raw_reader = ByteRangeReader(file_path, range_start, range_end)
+    return io.TextIOWrapper(io.BufferedReader(raw_reader, CSV_BUFFER_SIZE), encoding=encoding)
+
+
+def scan_range_quote_state(range_task):
+    """
+    Pool task: quote state at the end of one byte range of a file,
+    assuming it starts outside quotes (the parent rescans the rare range
+    that starts inside a quoted field).
+
+    Args:
+        range_task (tuple): (file_path, range_start, range_end), both line starts
+                            (or the file size)
+
+    Returns:
+        tuple: (in_quotes at range_end, newlines inside quoted fields, newlines in the range)
+    """
+    file_path, range_start, range_end = range_task
+
+    if range_end <= range_start:
+        return False, 0, 0
+
+    with open(file_path, 'rb') as source_file:
+        with mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            in_quotes, quoted_newlines = scan_csv_quote_state(mapped_file, False, range_start, range_end, b'"', b'\n')
+            return in_quotes, quoted_newlines, count_in_range(mapped_file, b'\n', range_start, range_end)
+
+
+def find_record_start(mapped_file, line_start, in_quotes):
+    """
+    Finds the start of the next record after the line at line_start:
+    the byte after the first line end that is outside quotes.
+
+    Args:
+        mapped_file (mmap.mmap): Read-only mapping of the file
+        line_start (int): Byte offset of a line start
+        in_quotes (bool): Quote state at line_start
+
+    Returns:
+        int: Byte offset of the next record start, or the file size
+    """
+    file_size = len(mapped_file)
+    position = line_start
+
+    while position < file_size:
+        newline_position = mapped_file.find(b'\n', position)
+        if newline_position == -1:
+            return file_size
+
+        in_quotes = csv_line_ends_in_quotes(mapped_file, in_quotes, position, newline_position)
+        position = newline_position + 1
+
+        if not in_quotes:
+            return position
+
+    return file_size
+
+
+def compute_shard_ranges(file_path, shard_count, skip_header=True, pool=None):
+    """
+    Splits a csv file into byte ranges that start and end on record boundaries.
+
+    Args:
+        file_path (str): Path to the csv file
+        shard_count (int): Number of shards wanted (fewer for small files)
+        skip_header (bool): Start the first shard after the header record
+        pool (multiprocessing.Pool): Pool to scan the quote states in parallel, or None
+
+    Returns:
+        tuple: (list of (range_start, range_end) tuples in file order,
+                number of records in those ranges)
+    """
+    with open(file_path, 'rb') as source_file:
+        try:
+            mapped_file = mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file: cannot map zero bytes
+            return [], 0
+
+        with mapped_file:
+            file_size = len(mapped_file)
+
+            data_start = 0
+            if skip_header:
+                data_start = find_record_start(mapped_file, 0, False)
+
+            data_size = file_size - data_start
+            if data_size <= 0:
+                return [], 0
+
+            shard_count = max(1, min(shard_count, data_size // MIN_SHARD_SIZE))
+
+            # candidates at line starts, where the quote state is one bool
+            candidates = [data_start]
+            for shard_number in range(1, shard_count):
+                newline_position = mapped_file.find(b'\n', data_start + data_size * shard_number // shard_count)
+                if newline_position == -1 or newline_position + 1 >= file_size:
+                    break
+                if newline_position + 1 > candidates[-1]:
+                    candidates.append(newline_position + 1)
+
+            range_tasks = [
+                (file_path, range_start, range_end)
+                for range_start, range_end in zip(candidates, candidates[1:] + [file_size])
+            ]
+            if pool is not None:
+                range_states = pool.map(scan_range_quote_state, range_tasks)
+            else:
+                range_states = [scan_range_quote_state(range_task) for range_task in range_tasks]
+
+            boundaries = [data_start]
+            in_quotes = False
+            record_count = 0
+            for range_task, (end_in_quotes, quoted_newlines, newline_count) in zip(range_tasks, range_states):
+                _, candidate, range_end = range_task
+                # in_quotes: the real state at this candidate, chained from the data start
+                if candidate > boundaries[-1]:
+                    boundary = find_record_start(mapped_file, candidate, in_quotes)
+                    if boundary < file_size and boundary > boundaries[-1]:
+                        boundaries.append(boundary)
+
+                if in_quotes:
+                    # the worker assumed the range starts outside quotes
+                    end_in_quotes, quoted_newlines = scan_csv_quote_state(
+                        mapped_file, True, candidate, range_end, b'"', b'\n'
+                    )
+                in_quotes = end_in_quotes
+                record_count += newline_count - quoted_newlines
+
+            # last record without a line end (or an unterminated quoted field)
+            if in_quotes or mapped_file[file_size - 1:file_size] != b'\n':
+                record_count += 1
+
+            boundaries.append(file_size)
+
+    return list(zip(boundaries, boundaries[1:])), record_count
+
+
+def scan_csv_shard(shard_task):
+    """
+    Pool task: reads, parses and processes one shard, returns only aggregates.
+
+    Args:
+        shard_task (tuple): (file_path, range_start, range_end, column_index,
+                             row_processor_function, max_field_length)
+
+    Returns:
+        dict: {"counts": Counter, "records": records read (blank and short ones too),
+               "rows": rows processed, "empty_results": rows where the function returned None,
+               "error": error message or None}
+    """
+    file_path, range_start, range_end, column_index, row_processor_function, max_field_length = shard_task
+
+    shard_counts = Counter()
+    records_count = 0
+    rows_count = 0
+    empty_results_count = 0
+
+    try:
+        with open_byte_range_text(file_path, range_start, range_end) as shard_file:
+            for split_rows in iter_split_csv_records(shard_file, max_field_length, column_index, max_row_size=MAX_ROW_SIZE):
+                records_count += len(split_rows)
+                for fields in split_rows:
+                    if not fields or len(fields) <= column_index:
+                        continue
+
+                    rows_count += 1
+
+                    # same cell text as a temp file line (quoted newlines as spaces)
+                    row_result = row_processor_function(fields[column_index].replace('\n', ' '))
+
+                    if row_result is None:
+                        empty_results_count += 1
+                    else:
+                        # {name: count} results add up, list results count each item
+                        shard_counts.update(row_result)
+
+        error_message = None
+
+    except Exception as e:
+        print(f"Error scanning shard {range_start}-{range_end}: {str(e)}")
+        error_message = f"bytes {range_start}-{range_end}: {str(e)}"
+
+    return {
+        "counts": shard_counts,
+        "records": records_count,
+        "rows": rows_count,
+        "empty_results": empty_results_count,
+        "error": error_message,
+    }
+
+
+def scan_csv_sharded(
+    file_path,
+    column_index,
+    row_processor_function,
+    num_processes=None,
+    shards_per_process=SHARDS_PER_PROCESS,
+    skip_header=True,
+    max_field_length=MAX_ROW_SIZE,
+    start_method=None,
+    install_function=None,
+    install_args=(),
+):
+    """
+    Byte-range sharded parallel scan of one csv column.
+
+    Workers are started through worker_bootstrap_v1: install_function(*install_args)
+    runs once per worker (e.g. a compiled matcher), under any start method.
+
+    Args:
+        file_path (str): Path to the csv file
+        column_index (int): Index of the column to process
+        row_processor_function (callable): Module level (picklable) function applied to each cell,
+                                           returning a {name: count} dict, a list of items, or None
+        num_processes (int): Worker processes, defaults to the cpu count
+        shards_per_process (int): Shards per process, for load balancing
+        skip_header (bool): Do not process the header record
+        max_field_length (int): Maximum length for any field
+        start_method (str): "fork", "spawn", "forkserver" or None for the default
+        install_function (callable): Module level worker install function, or None
+        install_args (tuple): Compiled state for install_function
+
+    Returns:
+        tuple: (Counter of all results, report dict with the worker startup),
+               (None, report) if any shard failed, or the shards read a different
+               number of records than the boundary scan counted (partial counts
+               are not returned, report["shard_errors"] has the errors),
+               or (None, None) on failure
+    """
+    try:
+        num_processes = num_processes or multiprocessing.cpu_count()
+
+        total_counts = Counter()
+        report = {"shards": 0, "records": 0, "rows": 0, "empty_results": 0, "failed_shards": 0, "shard_errors": []}
+
+        pool, startup = create_bootstrapped_pool(num_processes, install_function, install_args, start_method)
+
+        with pool:
+            shard_ranges, expected_records = compute_shard_ranges(file_path, num_processes * shards_per_process, skip_header, pool)
+            report["shards"] = len(shard_ranges)
+
+            shard_tasks = [
+                (file_path, range_start, range_end, column_index, row_processor_function, max_field_length)
+                for range_start, range_end in shard_ranges
+            ]
+
+            # merge each shard's Counter as soon as it is done
+            for shard_result in pool.imap_unordered(scan_csv_shard, shard_tasks):
+                total_counts.update(shard_result["counts"])
+                report["records"] += shard_result["records"]
+                report["rows"] += shard_result["rows"]
+                report["empty_results"] += shard_result["empty_results"]
+                if shard_result["error"] is not None:
+                    report["failed_shards"] += 1
+                    report["shard_errors"].append(shard_result["error"])
+
+            report["startup"] = format_bootstrap_report(collect_bootstrap_reports(startup))
+
+        if report["failed_shards"] > 0:
+            # counts missing whole shards look like real counts, so none are returned
+            print(f"Error: {report['failed_shards']} of {report['shards']} shards failed, no counts returned")
+            return None, report
+
+        if report["records"] != expected_records:
+            # a shard boundary was not a record start for the shard parser
+            report["shard_errors"].append(
+                f"shards read {report['records']:,} records, the boundary scan counted {expected_records:,}"
+            )
+            print(f"Error: {report['shard_errors'][-1]}, no counts returned")
+            return None, report
+
+        return total_counts, report
+
+    except Exception as e:
+        print(f"Error in sharded scan: {str(e)}")
+        return None, None
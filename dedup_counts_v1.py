@@ -0,0 +1,365 @@
+# vanilla python tool: duplicate-value collapsing for group counts
+# each distinct cell text is matched once, its counts multiplied by its frequency
+
+import sys
+import time
+import random
+import hashlib
+import argparse
+import functools
+import multiprocessing
+from collections import Counter, OrderedDict
+
+from parallel_pipeline_v1 import iter_pipelined_chunks, iter_sequenced_chunks, pipelined_group_counts
+from multi_term_matcher_v1 import MultiTermMatcher
+from text_cleaning_v1 import clean_text_ascii
+
+"""
+- parallel
+- vanilla python, not pandas
+- same counts as pipelined_group_counts() (parallel_pipeline_v1)
+  for row functions that only depend on the cell text
+
+Text columns are often highly repetitive (templated messages,
+canned replies), but the row function cleans and matches every copy.
+
+Two stages, both inside the worker:
+- per chunk: Counter of the cell values, so each distinct value
+  in a chunk runs the row function once and its group counts
+  are multiplied by the value's count (pre-aggregation)
+- across chunks: a bounded LRU per worker, cell hash -> row result,
+  so a value seen in an earlier chunk is not matched again;
+  keyed by a 16-byte blake2b digest, so long texts are not kept
+
+Side effects of the row function (e.g. printing "failed hard test")
+happen once per distinct value, the None results are still counted per row.
+
+Each chunk also returns its dedup stats, summed by the parent:
+rows, values matched, LRU hits, and the time spent matching,
+from which the time saved is estimated (matched time per value
+x rows not matched).
+
+Use:
+    group_counts, none_count, dedup_report = pipelined_group_counts_dedup(
+        pool, row_function, reader, group_names, cache_size=100000)
+    print(format_dedup_report(dedup_report))
+
+Benchmark (repetitive column, with and without dedup):
+    python dedup_counts_v1.py
+"""
+
+# LRU entries per worker (one entry: 16-byte key + the row result)
+DEFAULT_DEDUP_CACHE_SIZE = 100000
+
+# set in each worker on first use, see get_worker_result_cache()
+WORKER_RESULT_CACHE = None
+
+
+class LRUResultCache:
+    """
+    Bounded least-recently-used map of cell key -> row result.
+
+    Args:
+        max_entries (int): Entries kept, the least recently used is dropped first
+        owner (str): Row function the results belong to
+    """
+
+    def __init__(self, max_entries, owner=None):
+        self.max_entries = max(1, max_entries)
+        self.owner = owner
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        """
+        Returns:
+            tuple: (True, result) if cached (and marks it recently used), else (False, None)
+        """
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            return True, entries[key]
+        return False, None
+
+    def store(self, key, result):
+        """Caches a result, dropping the least recently used entry when full."""
+        entries = self._entries
+        entries[key] = result
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+def cell_key(value):
+    """
+    Args:
+        value: Cell value (str)
+
+    Returns:
+        bytes: 16-byte blake2b digest of the text
+    """
+    return hashlib.blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def get_worker_result_cache(cache_size, row_function):
+    """
+    This worker's LRU, made on first use (and again for another row function or size).
+
+    Args:
+        cache_size (int): LRU entries
+        row_function (callable): Row function the cached results come from
+
+    Returns:
+        LRUResultCache: Cache for this worker process
+    """
+    global WORKER_RESULT_CACHE
+
+    owner = f"{getattr(row_function, '__module__', '')}.{getattr(row_function, '__qualname__', repr(row_function))}"
+    if (
+        WORKER_RESULT_CACHE is None
+        or WORKER_RESULT_CACHE.owner != owner
+        or WORKER_RESULT_CACHE.max_entries != cache_size
+    ):
+        WORKER_RESULT_CACHE = LRUResultCache(cache_size, owner)
+
+    return WORKER_RESULT_CACHE
+
+
+def count_chunk_groups_dedup(chunk, row_function, group_names, cache_size=DEFAULT_DEDUP_CACHE_SIZE,
+                             stats_function=None):
+    """
+    Pool task: like count_chunk_groups() (parallel_pipeline_v1), but runs
+    row_function once per distinct value of the chunk not already in the LRU.
+
+    Args:
+        chunk (list): Cell values (str)
+        row_function (callable): Module level (picklable) function for one value,
+                                 returning a {group_name: count} dict or None
+        group_names (tuple): Group names, the order of the partial counts
+        cache_size (int): LRU entries per worker
+        stats_function (callable): Module level function called in the worker
+                                   after the chunk, its result goes in stats["worker_stats"]
+
+    Returns:
+        tuple: (list of counts indexed like group_names, number of None results, stats dict)
+    """
+    group_positions = {group_name: position for position, group_name in enumerate(group_names)}
+    partial_counts = [0] * len(group_names)
+    none_count = 0
+
+    result_cache = get_worker_result_cache(cache_size, row_function)
+    value_counts = Counter(chunk)
+
+    cache_hits = 0
+    matched_values = 0
+    match_seconds = 0.0
+
+    for value, value_count in value_counts.items():
+        if isinstance(value, str):
+            key = cell_key(value)
+            found, row_result = result_cache.lookup(key)
+        else:
+            key, found = None, False
+
+        if found:
+            cache_hits += 1
+        else:
+            start_time = time.perf_counter()
+            row_result = row_function(value)
+            match_seconds += time.perf_counter() - start_time
+            matched_values += 1
+            if key is not None:
+                result_cache.store(key, row_result)
+
+        if row_result is None:
+            none_count += value_count
+            continue
+
+        for group_name, count in row_result.items():
+            if count:
+                partial_counts[group_positions[group_name]] += count * value_count
+
+    stats = {
+        "rows": len(chunk),
+        "distinct_in_chunk": len(value_counts),
+        "cache_hits": cache_hits,
+        "matched_values": matched_values,
+        "match_seconds": match_seconds,
+    }
+    if stats_function is not None:
+        stats["worker_stats"] = stats_function()
+    return partial_counts, none_count, stats
+
+
+def pipelined_group_counts_dedup(pool, row_function, iterable, group_names, chunk_size=1000,
+                                 max_in_flight=None, cache_size=DEFAULT_DEDUP_CACHE_SIZE,
+                                 stats_function=None, merge_stats_function=None):
+    """
+    pipelined_group_counts() with duplicate-value collapsing
+    (and the same optional per-chunk worker stats hook).
+
+    Args:
+        pool (multiprocessing.Pool): Open pool
+        row_function (callable): Module level (picklable) function for one value,
+                                 returning a {group_name: count} dict or None
+        iterable: Cell values, read lazily by the parent
+        group_names (list): Group names to count
+        chunk_size (int): Values per chunk
+        max_in_flight (int): Chunk limit, defaults to 2 per cpu
+        cache_size (int): LRU entries per worker
+        stats_function (callable): Module level (picklable) worker stats function, or None
+        merge_stats_function (callable): Parent function taking each chunk's stats
+
+    Returns:
+        tuple: ({group_name: total count}, number of None results, dedup report dict)
+    """
+    group_names = tuple(group_names)
+    chunk_function = functools.partial(
+        count_chunk_groups_dedup,
+        row_function=row_function,
+        group_names=group_names,
+        cache_size=cache_size,
+        stats_function=stats_function,
+    )
+
+    total_counts = [0] * len(group_names)
+    total_none_count = 0
+    dedup_report = {
+        "rows": 0,
+        "distinct_in_chunk": 0,
+        "cache_hits": 0,
+        "matched_values": 0,
+        "match_seconds": 0.0,
+    }
+
+    for _, (partial_counts, none_count, stats) in iter_pipelined_chunks(
+        pool,
+        chunk_function,
+        iter_sequenced_chunks(iterable, chunk_size),
+        max_in_flight,
+    ):
+        for position, count in enumerate(partial_counts):
+            total_counts[position] += count
+        total_none_count += none_count
+        worker_stats = stats.pop("worker_stats", None)
+        if stats_function is not None and merge_stats_function is not None:
+            merge_stats_function(worker_stats)
+        for stat_name, value in stats.items():
+            dedup_report[stat_name] += value
+
+    return dict(zip(group_names, total_counts)), total_none_count, dedup_report
+
+
+def format_dedup_report(dedup_report):
+    """
+    Args:
+        dedup_report (dict): From pipelined_group_counts_dedup()
+
+    Returns:
+        str: Hit rates and estimated time saved, one line
+    """
+    rows = dedup_report["rows"]
+    matched_values = dedup_report["matched_values"]
+    if not rows:
+        return "Dedup: no rows"
+
+    # rows not matched, either a duplicate within the chunk or an LRU hit
+    row_hit_rate = 1 - matched_values / rows
+    distinct_in_chunk = dedup_report["distinct_in_chunk"]
+    cache_hit_rate = dedup_report["cache_hits"] / distinct_in_chunk if distinct_in_chunk else 0.0
+    seconds_per_match = dedup_report["match_seconds"] / matched_values if matched_values else 0.0
+    saved_seconds = seconds_per_match * (rows - matched_values)
+
+    return (
+        f"Dedup: {rows:,} rows, {matched_values:,} matched ({row_hit_rate:.1%} not re-matched), "
+        f"LRU hit rate {cache_hit_rate:.1%} of chunk-distinct values, "
+        f"~{saved_seconds:.2f} s matching saved (worker time)"
+    )
+
+
+#############
+# Benchmark
+#############
+
+# compiled on first use in each worker
+BENCHMARK_MATCHER = None
+
+
+def benchmark_row_function(text):
+    """Benchmark row function: clean + match, like count_pattern_matches_in_text()."""
+    global BENCHMARK_MATCHER
+    if BENCHMARK_MATCHER is None:
+        BENCHMARK_MATCHER = MultiTermMatcher(
+            aggregation_groups=[("cancel", ["cancel", "unsubscribe"]), ("refund", ["refund", "money back"])],
+            clean_function=clean_text_ascii,
+        )
+
+    matcher = BENCHMARK_MATCHER
+    result_dict = {name: 0 for name, _ in matcher.aggregation_groups}
+    group_name = matcher.first_matching_group(matcher.prepare_row(text).found_term_ids)
+    if group_name is None:
+        return None
+    result_dict[group_name] = 1
+    return result_dict
+
+
+def make_benchmark_column(row_count=200000, template_count=300, unique_share=0.1, seed=5):
+    """Templated replies (with a share of unique free texts)."""
+    random_generator = random.Random(seed)
+    words = ["please", "cancel", "my", "order", "refund", "thanks", "account", "money", "back", "help", "issue"]
+
+    def make_text():
+        return ' '.join(random_generator.choice(words) for _ in range(random_generator.randint(10, 80))) + '\n'
+
+    templates = [make_text() for _ in range(template_count)]
+    return [
+        make_text() if random_generator.random() < unique_share else random_generator.choice(templates)
+        for _ in range(row_count)
+    ]
+
+
+def benchmark_dedup(processes=None):
+    """
+    Prints counts and wall time with and without dedup on a repetitive column.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    column = make_benchmark_column()
+    group_names = ["cancel", "refund"]
+
+    with multiprocessing.Pool(processes=processes) as pool:
+        start_time = time.perf_counter()
+        plain_counts, plain_none = pipelined_group_counts(pool, benchmark_row_function, column, group_names)
+        plain_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        dedup_counts, dedup_none, dedup_report = pipelined_group_counts_dedup(
+            pool, benchmark_row_function, column, group_names
+        )
+        dedup_seconds = time.perf_counter() - start_time
+
+    print(f"{len(column):,} rows, {processes} processes")
+    print(f"  plain: {plain_seconds:.2f} s  {plain_counts} none={plain_none}")
+    print(f"  dedup: {dedup_seconds:.2f} s  {dedup_counts} none={dedup_none}")
+    print(f"  {format_dedup_report(dedup_report)}")
+    if (plain_counts, plain_none) != (dedup_counts, dedup_none):
+        print("Warning: results differ")
+
+
+def main():
+    """
+    Runs the dedup benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Duplicate-value collapsing benchmark')
+    parser.add_argument('--processes', '-p', type=int, default=None, help='Worker processes')
+    args = parser.parse_args()
+
+    try:
+        benchmark_dedup(args.processes)
+    except Exception as e:
+        print(f"Error in benchmark: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import os
 from pathlib import Path
 import re
 from datetime import datetime, UTC as datetime_UTC
+from row_offset_index_v1 import read_indexed_row
+from mmap_row_extractor_v1 import read_row_mmap
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -19,8 +21,12 @@ from datetime import datetime, UTC as datetime_UTC
 - vanilla python, not pandas
 
 
-Uses row by row file line reading 
-in case large .csv files are used.
+Uses a sidecar row offset index (row_offset_index_v1)
+to seek() straight to the target row;
+the index is built on first use and rebuilt if the file changes.
+Falls back to mmap + bytes.count (mmap_row_extractor_v1),
+then to row by row file line reading,
+in case the index cannot be built.
 """
 
 def ensure_tmp_directory():
@@ -85,10 +91,23 @@ def main():
         # preset reset
         row_counter = 0  # offset for header and zero indexing to match csv row
         cell_string = ''
+        indexed_line = None
         
         
         if input_file_path:
-            print("\nProcessing rows from temporary file:")
+            # seek straight to the row using the sidecar offset index
+            indexed_line = read_indexed_row(input_file_path, max(target_row, 0))
+            
+        if input_file_path and indexed_line is None:
+            # no index: count newlines over the memory-mapped file
+            indexed_line, lookup_seconds = read_row_mmap(input_file_path, target_row)
+            print(f"mmap row lookup -> {lookup_seconds:.4f}_sec")
+            
+        if input_file_path and indexed_line is not None:
+            cell_string = indexed_line
+
+        elif input_file_path:
+            print("\nProcessing rows from file (no index):")
 
             # Example of reading and processing the temporary file
             for line in read_file_lines(input_file_path):
@@ -2,10 +2,13 @@
 
 
 import csv
+import argparse
 import os
 from pathlib import Path
 import re
 from datetime import datetime, UTC as datetime_UTC
+from batch_row_extractor_v1 import read_row_numbers_file, extract_rows_batch
+from mmap_row_extractor_v1 import read_row_mmap
 # # get time
 # sample_time = datetime.now(datetime_UTC)
 # # make readable string
@@ -16,10 +19,13 @@ from datetime import datetime, UTC as datetime_UTC
 - user input
 - input args: column-index row-number
 - vanilla python, not pandas
+- batch mode: --rows-file of row numbers (row 0 = first line),
+  one pass, one results .csv/.jsonl
 
 
-Uses row by row file line reading 
-in case large .csv files are used.
+Single row: uses mmap + bytes.count (mmap_row_extractor_v1)
+in case large .csv files are used,
+falls back to row by row file line reading.
 """
 
 def ensure_tmp_directory():
@@ -70,13 +76,64 @@ def read_file_lines(temp_file_path):
         print(f"Error reading temporary file: {str(e)}")
 
 
+def run_batch_mode(input_file_path, rows_file_path, output_format):
+    """
+    Extracts all rows listed in rows_file_path (row 0 = first line)
+    in one pass over the file, writing one results file.
+    
+    Args:
+        input_file_path (str): Path to the file
+        rows_file_path (str): Path to file of row numbers, one per line
+        output_format (str): "csv" or "jsonl"
+    """
+    row_numbers = read_row_numbers_file(rows_file_path)
+    
+    # make directory if not found
+    if not os.path.exists("results"):
+        os.makedirs("results")
+    
+    # get time
+    sample_time = datetime.now(datetime_UTC)
+    # make readable string
+    readable_timesatamp = sample_time.strftime('%Y_%m_%d__%H_%M_%S%f')
+    
+    output_path = f"results/batch_rows_{readable_timesatamp}.{output_format}"
+    
+    report = extract_rows_batch(
+        input_file_path,
+        row_numbers,
+        output_path,
+        output_format=output_format,
+        record_mode=False,
+        row_number_base=0,
+    )
+    
+    if report:
+        print(f"{report['written']} of {report['requested']} rows ({report['access']}) -> {output_path}")
+
+
 def main():
     """
     Main function to run the CSV processing workflow.
     """
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Extract a row, or many rows in batch, from a file.')
+    parser.add_argument('--filepath', '-f', help='Input file path', required=False)
+    parser.add_argument('--rows-file', '-r', help='Batch mode: file of row numbers, one per line (row 0 = first line)', required=False)
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Batch mode output format')
+    
+    args = parser.parse_args()
+
     try:
-        # Get Path Input
-        input_file_path = input("\nEnter file path...\n")
+        # Get Path Input - either from command line or user input
+        if args.filepath:
+            input_file_path = args.filepath
+        else:
+            input_file_path = input("\nEnter file path...\n")
+
+        if args.rows_file:
+            run_batch_mode(input_file_path, args.rows_file, args.format)
+            return
 
         # Get column index, make type -> int
         target_row = int(input("\nFile row to extract...\n"))
@@ -84,10 +141,18 @@ def main():
         # preset reset
         row_counter = 0  # offset for header and zero indexing to match csv row
         cell_string = ''
-        
+        mmap_line = None
         
         if input_file_path:
-            print("\nProcessing rows from temporary file:")
+            # count newlines over the memory-mapped file, decode only the target row
+            mmap_line, lookup_seconds = read_row_mmap(input_file_path, target_row)
+            print(f"mmap row lookup -> {lookup_seconds:.4f}_sec")
+        
+        if input_file_path and mmap_line is not None:
+            cell_string = mmap_line
+        
+        elif input_file_path:
+            print("\nProcessing rows from file (mmap failed):")
 
             # Example of reading and processing the temporary file
             for line in read_file_lines(input_file_path):
@@ -0,0 +1,1023 @@
+# vanilla python tool: boolean match query language
+# queries compiled to one shared evaluation DAG, cheapest / most selective first
+
+import re
+import sys
+import time
+import heapq
+import random
+import argparse
+
+from multi_term_matcher_v1 import MATCH_MODE_SUBSTRING, make_benchmark_words
+from token_matcher_v1 import create_term_matcher
+from text_cleaning_v1 import CLEAN_MODE_ASCII, get_clean_text_function
+
+"""
+- vanilla python, not pandas
+- same term semantics as the matchers: cleaned term in cleaned text
+  (substring, or whole words / phrases with match_mode "token"
+  (token_matcher_v1); clean_mode of text_cleaning_v1)
+
+The cascade was hard-coded: any required term OR >= 2 optional terms,
+plus (v8) a separate cancel gate in front of the groups.
+Here a filter is a query:
+
+    "cancel" OR ATLEAST(2, refund, "money back", unsubscribe)
+    subject:(refund OR chargeback) AND NOT body:"free trial"
+    ALL(cancel, subscription) AND -"do not cancel"
+
+    term        word or "quoted phrase"
+    column:x    x (a term or a parenthesised query) tested in that column
+                (name for dict rows, index for list rows; no column: the text)
+    NOT x, -x   exclusion
+    a AND b     (AND binds tighter than OR), ALL(a, b, ...)
+    a OR b      ANY(a, b, ...)
+    ATLEAST(n, a, b, ...)   at least n of the arguments (N-of-M)
+    NEAR(n, a, b, ...)      terms (words / phrases, one column) whose word
+                            positions are at most n apart ("cancel" within
+                            5 words of "subscription": NEAR(5, cancel, subscription))
+    keywords are upper case, lower case words are terms
+
+Compilation (CompiledQueries, one object for all named queries):
+- parse, then normalize: nested AND / OR flattened, duplicates and
+  constants removed, NOT NOT x -> x, ATLEAST(1, ..) -> OR
+- hash-consing: every distinct sub-expression is one DAG node,
+  shared by all queries (common sub-expression elimination);
+  nodes with more than one parent are evaluated once per row (memo)
+- all terms of a column go into one term matcher: a column is
+  cleaned and scanned once per row, and only if a predicate needs it
+- each node gets a cost and a probability estimate (terms: 1 test,
+  plus the column scan shared by its terms; term_probabilities or
+  DEFAULT_TERM_PROBABILITY), and AND / OR / ATLEAST arguments are
+  ordered so the cheapest, most selective ones run first:
+      AND: cost / P(false) ascending, stops at the first False
+      OR:  cost / P(true) ascending, stops at the first True
+      ATLEAST: stops once n are True or n can no longer be reached
+- nodes are compiled to python closures (no tree walking per row)
+- NEAR: a column with NEAR terms is scanned once with positions
+  (find_term_positions(), same single scan), so every NEAR rule on it
+  reads the same positions: a rule costs a lookup of its terms and,
+  only if all are present, one linear merge of their position lists;
+  in an OR, many NEAR rules are indexed by their rarest term, so only
+  the rules whose term is in the row are tried;
+  the scan does not grow with the number of rules
+
+Picklable: only the query texts and settings are pickled,
+each worker recompiles (worker_bootstrap_v1 installs it once).
+
+Use:
+    queries = CompiledQueries([("cancel", '"cancel" OR ATLEAST(2, refund, "money back")')])
+    queries.matches("Please cancel my order")          # first / named query -> bool
+    queries.evaluate({"subject": "...", "body": "..."})  # {name: bool}
+
+Benchmark (each query compiled alone vs one shared DAG):
+    python match_query_v1.py
+    python match_query_v1.py --proximity   (NEAR rules: post-pass vs shared positional scan)
+"""
+
+# estimate for a term without statistics: most terms are rare
+DEFAULT_TERM_PROBABILITY = 0.1
+
+# relative costs: one found-set lookup vs cleaning + scanning a column
+TERM_TEST_COST = 1.0
+COLUMN_SCAN_COST = 20.0
+
+QUERY_KEYWORDS = ("AND", "OR", "NOT", "ATLEAST", "ANY", "ALL", "NEAR")
+
+QUERY_TOKEN_PATTERN = re.compile(
+    r'\s*(?:'
+    r'(?P<lparen>\()|(?P<rparen>\))|(?P<comma>,)|(?P<minus>-)'
+    r'|(?P<phrase>"(?:[^"\\]|\\.)*")'
+    r'|(?P<word>[^\s(),"]+)'
+    r')'
+)
+
+# from this many NEAR rules on one column in an OR, the rules are indexed
+# by their rarest term and only those whose term is in the row are tried
+NEAR_INDEX_MIN_RULES = 8
+
+TRUE_NODE = ("true",)
+FALSE_NODE = ("false",)
+
+
+def tokenize_query(query_text):
+    """
+    Args:
+        query_text (str): Query
+
+    Returns:
+        list: (kind, value) tokens, kind in lparen / rparen / comma / minus / phrase / word
+    """
+    tokens = []
+    position = 0
+    query_text = query_text.rstrip()
+
+    while position < len(query_text):
+        match = QUERY_TOKEN_PATTERN.match(query_text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Query error at character {position}: {query_text[position:position + 20]!r}")
+
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "phrase":
+            value = re.sub(r'\\(.)', r'\1', value[1:-1])
+        tokens.append((kind, value))
+        position = match.end()
+
+    return tokens
+
+
+class QueryParser:
+    """
+    Recursive descent parser: query text -> nested tuples
+    ("term", column, text), ("not", x), ("and", [..]), ("or", [..]), ("atleast", n, [..]),
+    ("near", n, [terms]).
+
+    Args:
+        query_text (str): Query
+    """
+
+    def __init__(self, query_text):
+        self.query_text = query_text
+        self.tokens = tokenize_query(query_text)
+        self.position = 0
+
+    def error(self, message):
+        raise ValueError(f"Query error at token {self.position} in {self.query_text!r}: {message}")
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self, kind=None, value=None):
+        token_kind, token_value = self.peek()
+        if token_kind is None or (kind and token_kind != kind) or (value and token_value != value):
+            self.error(f"expected {value or kind}, got {token_value!r}")
+        self.position += 1
+        return token_value
+
+    def at_keyword(self, keyword):
+        return self.peek() == ("word", keyword)
+
+    def parse(self):
+        if not self.tokens:
+            self.error("empty query")
+        expression = self.parse_or(None)
+        if self.position != len(self.tokens):
+            self.error(f"unexpected {self.peek()[1]!r}")
+        return expression
+
+    def parse_or(self, column):
+        arguments = [self.parse_and(column)]
+        while self.at_keyword("OR"):
+            self.take()
+            arguments.append(self.parse_and(column))
+        return arguments[0] if len(arguments) == 1 else ("or", arguments)
+
+    def parse_and(self, column):
+        arguments = [self.parse_not(column)]
+        while self.at_keyword("AND"):
+            self.take()
+            arguments.append(self.parse_not(column))
+        return arguments[0] if len(arguments) == 1 else ("and", arguments)
+
+    def parse_not(self, column):
+        if self.at_keyword("NOT") or self.peek()[0] == "minus":
+            self.take()
+            return ("not", self.parse_not(column))
+        return self.parse_atom(column)
+
+    def parse_arguments(self, column):
+        """( x, y, ... ) of ANY / ALL"""
+        self.take("lparen")
+        arguments = [self.parse_or(column)]
+        while self.peek()[0] == "comma":
+            self.take()
+            arguments.append(self.parse_or(column))
+        self.take("rparen")
+        return arguments
+
+    def parse_atom(self, column):
+        kind, value = self.peek()
+
+        if kind == "lparen":
+            self.take()
+            expression = self.parse_or(column)
+            self.take("rparen")
+            return expression
+
+        if kind == "phrase":
+            self.take()
+            return ("term", column, value)
+
+        if kind != "word":
+            self.error(f"expected a term, got {value!r}")
+
+        if value in ("ANY", "ALL"):
+            self.take()
+            return ("or" if value == "ANY" else "and", self.parse_arguments(column))
+
+        if value == "ATLEAST":
+            self.take()
+            self.take("lparen")
+            count_text = self.take("word")
+            if not count_text.isdigit():
+                self.error(f"ATLEAST needs a count, got {count_text!r}")
+            arguments = []
+            while self.peek()[0] == "comma":
+                self.take()
+                arguments.append(self.parse_or(column))
+            self.take("rparen")
+            if not arguments:
+                self.error("ATLEAST needs arguments")
+            return ("atleast", int(count_text), arguments)
+
+        if value == "NEAR":
+            self.take()
+            self.take("lparen")
+            window_text = self.take("word")
+            if not window_text.isdigit():
+                self.error(f"NEAR needs a word distance, got {window_text!r}")
+            arguments = []
+            while self.peek()[0] == "comma":
+                self.take()
+                argument = self.parse_atom(column)
+                if argument[0] != "term":
+                    self.error("NEAR arguments must be terms or phrases")
+                arguments.append(argument)
+            self.take("rparen")
+            if len(arguments) < 2:
+                self.error("NEAR needs at least two terms")
+            return ("near", int(window_text), arguments)
+
+        if value in QUERY_KEYWORDS:
+            self.error(f"unexpected {value}")
+
+        self.take()
+        if ":" in value:
+            column_name, _, rest = value.partition(":")
+            if not column_name:
+                self.error(f"empty column name in {value!r}")
+            column_name = int(column_name) if column_name.isdigit() else column_name
+            if rest:
+                return ("term", column_name, rest)
+            # column:"phrase" or column:( ... )
+            return self.parse_atom(column_name)
+
+        return ("term", column, value)
+
+
+def parse_query(query_text):
+    """
+    Args:
+        query_text (str): Query
+
+    Returns:
+        tuple: Parsed expression
+    """
+    return QueryParser(query_text).parse()
+
+
+class CompiledQueries:
+    """
+    Named queries compiled into one evaluation DAG.
+
+    Args:
+        queries (list): (name, query_text) tuples
+        clean_mode (str): text_cleaning_v1 mode for terms and text
+        match_mode (str): "substring" or "token" (token_matcher_v1)
+        default_column: Column of terms without column: for dict / list rows
+                        (str rows are that column)
+        term_probabilities (dict): {(column, clean term): P(term in text)} estimates
+    """
+
+    def __init__(self, queries, clean_mode=CLEAN_MODE_ASCII, default_column=None, term_probabilities=None,
+                 match_mode=MATCH_MODE_SUBSTRING):
+        self.queries = tuple((str(name), query_text) for name, query_text in queries)
+        self.clean_mode = clean_mode
+        self.default_column = default_column
+        self.term_probabilities = dict(term_probabilities or {})
+        self.match_mode = match_mode
+        self._compile()
+
+    def __getstate__(self):
+        # closures do not pickle: send the settings, recompile on arrival
+        return (self.queries, self.clean_mode, self.default_column, self.term_probabilities, self.match_mode)
+
+    def __setstate__(self, state):
+        self.queries, self.clean_mode, self.default_column, self.term_probabilities, self.match_mode = state
+        self._compile()
+
+    def _compile(self):
+        """Parse, normalize, hash-cons, estimate, order and compile to closures."""
+        self.clean_function = get_clean_text_function(self.clean_mode)
+
+        # DAG: node key -> node id; key is the canonical form (children as ids)
+        self.node_ids = {}
+        self.node_keys = []
+        self.root_ids = {}
+
+        for name, query_text in self.queries:
+            if name in self.root_ids:
+                raise ValueError(f"Duplicate query name: {name!r}")
+            self.root_ids[name] = self._add_expression(parse_query(query_text))
+
+        self._count_references()
+
+        self._compile_columns()
+        self._estimate_nodes()
+
+        self._node_functions = [None] * len(self.node_keys)
+        self._root_functions = {name: self._node_function(root_id) for name, root_id in self.root_ids.items()}
+        self.names = tuple(self.root_ids)
+
+    def _intern(self, key):
+        """Node id of a canonical key (hash-consing: one node per distinct expression)."""
+        node_id = self.node_ids.get(key)
+        if node_id is None:
+            node_id = len(self.node_keys)
+            self.node_ids[key] = node_id
+            self.node_keys.append(key)
+        return node_id
+
+    def _count_references(self):
+        """
+        Parents per node, counting only nodes reachable from the queries
+        (normalization leaves some intermediate nodes unused).
+        """
+        self.reference_counts = [0] * len(self.node_keys)
+        self.reachable_ids = set()
+
+        pending_ids = list(self.root_ids.values())
+        for root_id in pending_ids:
+            self.reference_counts[root_id] += 1
+
+        while pending_ids:
+            node_id = pending_ids.pop()
+            if node_id in self.reachable_ids:
+                continue
+            self.reachable_ids.add(node_id)
+            for child_id in self._child_ids(self.node_keys[node_id]):
+                self.reference_counts[child_id] += 1
+                pending_ids.append(child_id)
+
+    @staticmethod
+    def _child_ids(key):
+        if key[0] in ("and", "or"):
+            return key[1]
+        if key[0] in ("atleast", "near"):
+            return key[2]
+        if key[0] == "not":
+            return (key[1],)
+        return ()
+
+    def _add_expression(self, expression):
+        """Normalized node id of a parsed expression."""
+        kind = expression[0]
+
+        if kind == "term":
+            _, column, term = expression
+            if column is None:
+                column = self.default_column
+            clean_term = self.clean_function(term)
+            if not clean_term:
+                # '' is in every text, as with `in`
+                return self._intern(TRUE_NODE)
+            return self._intern(("term", column, clean_term))
+
+        if kind == "not":
+            child_id = self._add_expression(expression[1])
+            child_key = self.node_keys[child_id]
+            if child_key == TRUE_NODE:
+                return self._intern(FALSE_NODE)
+            if child_key == FALSE_NODE:
+                return self._intern(TRUE_NODE)
+            if child_key[0] == "not":
+                return child_key[1]
+            return self._intern(("not", child_id))
+
+        if kind == "atleast":
+            _, needed, arguments = expression
+            child_ids = sorted(self._add_expression(argument) for argument in arguments)
+            needed -= sum(1 for child_id in child_ids if self.node_keys[child_id] == TRUE_NODE)
+            child_ids = [child_id for child_id in child_ids if self.node_keys[child_id] not in (TRUE_NODE, FALSE_NODE)]
+            if needed <= 0:
+                return self._intern(TRUE_NODE)
+            if needed > len(child_ids):
+                return self._intern(FALSE_NODE)
+            if needed == 1:
+                return self._make_junction("or", child_ids)
+            if needed == len(child_ids) and len(set(child_ids)) == len(child_ids):
+                return self._make_junction("and", child_ids)
+            return self._intern(("atleast", needed, tuple(child_ids)))
+
+        if kind == "near":
+            _, window, arguments = expression
+            # '' terms are in every text, at every position
+            child_ids = sorted({
+                child_id for child_id in (self._add_expression(argument) for argument in arguments)
+                if self.node_keys[child_id] != TRUE_NODE
+            })
+            if len({self.node_keys[child_id][1] for child_id in child_ids}) > 1:
+                raise ValueError("NEAR terms must be in one column")
+            if not child_ids:
+                return self._intern(TRUE_NODE)
+            if len(child_ids) == 1:
+                return child_ids[0]
+            return self._intern(("near", window, tuple(child_ids)))
+
+        # and / or
+        return self._make_junction(kind, [self._add_expression(argument) for argument in expression[1]])
+
+    def _make_junction(self, kind, child_ids):
+        """AND / OR node: flattened, duplicates and constants removed."""
+        absorbing, neutral = (FALSE_NODE, TRUE_NODE) if kind == "and" else (TRUE_NODE, FALSE_NODE)
+
+        flat_ids = set()
+        for child_id in child_ids:
+            child_key = self.node_keys[child_id]
+            if child_key == absorbing:
+                return self._intern(absorbing)
+            if child_key == neutral:
+                continue
+            if child_key[0] == kind:
+                flat_ids.update(child_key[1])
+            else:
+                flat_ids.add(child_id)
+
+        if not flat_ids:
+            return self._intern(neutral)
+        if len(flat_ids) == 1:
+            return flat_ids.pop()
+        return self._intern((kind, tuple(sorted(flat_ids))))
+
+    def _compile_columns(self):
+        """One matcher per column with all its terms: one clean + scan per column and row."""
+        column_terms = {}
+        position_columns = set()
+        for node_id in sorted(self.reachable_ids):
+            key = self.node_keys[node_id]
+            if key[0] == "term":
+                column_terms.setdefault(key[1], []).append(key[2])
+            elif key[0] == "near":
+                position_columns.add(self.node_keys[key[2][0]][1])
+
+        self.columns = tuple(column_terms)
+        self._column_slots = {column: slot for slot, column in enumerate(self.columns)}
+        # columns scanned with find_term_positions() (for NEAR)
+        self._position_slots = frozenset(self._column_slots[column] for column in position_columns)
+        self._column_matchers = []
+        self._term_ids = {}
+        self._column_term_counts = {}
+
+        for column, terms in column_terms.items():
+            matcher = create_term_matcher(aggregation_groups=[("terms", terms)], match_mode=self.match_mode)
+            self._column_matchers.append(matcher)
+            self._column_term_counts[column] = len(terms)
+            for term_id, term in enumerate(matcher.terms):
+                self._term_ids[(column, term)] = term_id
+
+    def _estimate_nodes(self):
+        """Cost and P(true) per node, bottom up (children have lower ids)."""
+        self.node_costs = [0.0] * len(self.node_keys)
+        self.node_probabilities = [0.0] * len(self.node_keys)
+        self.node_orders = [()] * len(self.node_keys)
+
+        for node_id, key in enumerate(self.node_keys):
+            kind = key[0]
+            if node_id not in self.reachable_ids:
+                continue
+
+            if kind in ("true", "false"):
+                self.node_probabilities[node_id] = 1.0 if kind == "true" else 0.0
+                continue
+
+            if kind == "term":
+                _, column, term = key
+                self.node_costs[node_id] = TERM_TEST_COST + COLUMN_SCAN_COST / self._column_term_counts[column]
+                self.node_probabilities[node_id] = self.term_probabilities.get((column, term), DEFAULT_TERM_PROBABILITY)
+                continue
+
+            if kind == "not":
+                self.node_costs[node_id] = self.node_costs[key[1]]
+                self.node_probabilities[node_id] = 1.0 - self.node_probabilities[key[1]]
+                continue
+
+            if kind == "near":
+                # rarest term looked up first; P is an upper bound (all terms present)
+                order = sorted(key[2], key=lambda child_id: self.node_probabilities[child_id])
+                probability = 1.0
+                for child_id in order:
+                    probability *= self.node_probabilities[child_id]
+                self.node_costs[node_id] = sum(self.node_costs[child_id] for child_id in order)
+                self.node_probabilities[node_id] = probability
+                self.node_orders[node_id] = tuple(order)
+                continue
+
+            child_ids = self._child_ids(key)
+            costs = self.node_costs
+            probabilities = self.node_probabilities
+
+            if kind == "and":
+                # most likely to fail per unit of cost first
+                order = sorted(child_ids, key=lambda child_id: costs[child_id] / max(1.0 - probabilities[child_id], 1e-9))
+                expected_cost, reach = 0.0, 1.0
+                for child_id in order:
+                    expected_cost += reach * costs[child_id]
+                    reach *= probabilities[child_id]
+                probability = reach
+            else:
+                # or / atleast: most likely to succeed per unit of cost first
+                order = sorted(child_ids, key=lambda child_id: costs[child_id] / max(probabilities[child_id], 1e-9))
+                if kind == "or":
+                    expected_cost, reach = 0.0, 1.0
+                    for child_id in order:
+                        expected_cost += reach * costs[child_id]
+                        reach *= 1.0 - probabilities[child_id]
+                    probability = 1.0 - reach
+                else:
+                    # upper bound; P(at least n) from the count distribution
+                    expected_cost = sum(costs[child_id] for child_id in order)
+                    count_distribution = [1.0]
+                    for child_id in order:
+                        p = probabilities[child_id]
+                        count_distribution = [
+                            (count_distribution[count] if count < len(count_distribution) else 0.0) * (1 - p)
+                            + (count_distribution[count - 1] * p if count > 0 else 0.0)
+                            for count in range(len(count_distribution) + 1)
+                        ]
+                    probability = sum(count_distribution[key[1]:])
+
+            self.node_costs[node_id] = expected_cost
+            self.node_probabilities[node_id] = probability
+            self.node_orders[node_id] = tuple(order)
+
+    def _node_function(self, node_id):
+        """Closure evaluating a node for a RowState (memoized if the node is shared)."""
+        if self._node_functions[node_id] is not None:
+            return self._node_functions[node_id]
+
+        key = self.node_keys[node_id]
+        kind = key[0]
+
+        if kind == "true":
+            def evaluate(state):
+                return True
+        elif kind == "false":
+            def evaluate(state):
+                return False
+        elif kind == "term":
+            slot = self._column_slots[key[1]]
+            term_id = self._term_ids[(key[1], key[2])]
+
+            def evaluate(state):
+                found = state.found_sets[slot]
+                if found is None:
+                    found = state.scan_column(slot)
+                return term_id in found
+        elif kind == "near":
+            window = key[1]
+            slot = self._column_slots[self.node_keys[key[2][0]][1]]
+            term_ids = tuple(self._term_ids[self.node_keys[child_id][1:]] for child_id in self.node_orders[node_id])
+
+            def evaluate(state):
+                term_positions = state.found_sets[slot]
+                if term_positions is None:
+                    term_positions = state.scan_column(slot)
+                for term_id in term_ids:
+                    if term_id not in term_positions:
+                        return False
+                return positions_within_window([term_positions[term_id] for term_id in term_ids], window)
+        elif kind == "not":
+            child = self._node_function(key[1])
+
+            def evaluate(state):
+                return not child(state)
+        elif kind == "and":
+            children = tuple(self._node_function(child_id) for child_id in self.node_orders[node_id])
+
+            def evaluate(state):
+                for child in children:
+                    if not child(state):
+                        return False
+                return True
+        elif kind == "or":
+            child_ids, near_indexes = self._index_near_children(self.node_orders[node_id])
+            children = tuple(self._node_function(child_id) for child_id in child_ids)
+
+            if not near_indexes:
+                def evaluate(state):
+                    for child in children:
+                        if child(state):
+                            return True
+                    return False
+            else:
+                def evaluate(state):
+                    for child in children:
+                        if child(state):
+                            return True
+                    # NEAR rules: only those whose rarest term is in the row
+                    for slot, rules_by_term in near_indexes:
+                        term_positions = state.found_sets[slot]
+                        if term_positions is None:
+                            term_positions = state.scan_column(slot)
+                        for term_id in term_positions:
+                            rules = rules_by_term.get(term_id)
+                            if rules is not None:
+                                for rule in rules:
+                                    if rule(state):
+                                        return True
+                    return False
+        else:
+            needed = key[1]
+            children = tuple(self._node_function(child_id) for child_id in self.node_orders[node_id])
+            child_count = len(children)
+
+            def evaluate(state):
+                true_count = 0
+                for position, child in enumerate(children):
+                    if child(state):
+                        true_count += 1
+                        if true_count >= needed:
+                            return True
+                    elif true_count + child_count - position - 1 < needed:
+                        return False
+                return False
+
+        if self.reference_counts[node_id] > 1 and kind not in ("true", "false", "term"):
+            # shared sub-expression: once per row
+            unshared = evaluate
+
+            def evaluate(state):
+                memo = state.memo
+                if node_id in memo:
+                    return memo[node_id]
+                result = memo[node_id] = unshared(state)
+                return result
+
+        self._node_functions[node_id] = evaluate
+        return evaluate
+
+    def _index_near_children(self, child_ids):
+        """
+        Splits OR children into the ones tried in order and, per column
+        with at least NEAR_INDEX_MIN_RULES NEAR rules, {rarest term id: rule functions}.
+
+        Returns:
+            tuple: (child ids, ((column slot, rules by term id), ...))
+        """
+        near_ids_by_column = {}
+        for child_id in child_ids:
+            key = self.node_keys[child_id]
+            if key[0] == "near":
+                near_ids_by_column.setdefault(self.node_keys[key[2][0]][1], []).append(child_id)
+
+        near_indexes = []
+        indexed_ids = set()
+        for column, near_ids in near_ids_by_column.items():
+            if len(near_ids) < NEAR_INDEX_MIN_RULES:
+                continue
+            rules_by_term = {}
+            for near_id in near_ids:
+                rarest_term_key = self.node_keys[self.node_orders[near_id][0]]
+                rules_by_term.setdefault(self._term_ids[rarest_term_key[1:]], []).append(self._node_function(near_id))
+            near_indexes.append((self._column_slots[column], rules_by_term))
+            indexed_ids.update(near_ids)
+
+        return tuple(child_id for child_id in child_ids if child_id not in indexed_ids), tuple(near_indexes)
+
+    def get_cell(self, row, column):
+        """Cell of a column: str rows are the default column, dict by name, list by index."""
+        if isinstance(row, str):
+            return row if column == self.default_column else None
+        if isinstance(row, dict):
+            return row.get(column)
+        if isinstance(column, int) and column < len(row):
+            return row[column]
+        return None
+
+    def new_row_state(self, row, clean_text=None):
+        """
+        Args:
+            row: str, dict or list row
+            clean_text (str): Already cleaned default-column text (same clean_mode), or None
+
+        Returns:
+            RowState: Per-row scan results and memo
+        """
+        state = RowState(self, row)
+        if clean_text is not None and self.default_column in self._column_slots:
+            state.scan_clean_text(self._column_slots[self.default_column], clean_text)
+        return state
+
+    def evaluate(self, row, clean_text=None):
+        """
+        Args:
+            row: str (default column), dict (by column name) or list (by column index)
+            clean_text (str): Already cleaned default-column text, or None
+
+        Returns:
+            dict: {query name: bool}
+        """
+        state = self.new_row_state(row, clean_text)
+        return {name: root_function(state) for name, root_function in self._root_functions.items()}
+
+    def matches(self, row, name=None, clean_text=None):
+        """
+        Args:
+            row: str, dict or list row
+            name (str): Query name, defaults to the first query
+            clean_text (str): Already cleaned default-column text, or None
+
+        Returns:
+            bool: The query's result for this row
+        """
+        root_function = self._root_functions[name if name is not None else self.names[0]]
+        return root_function(self.new_row_state(row, clean_text))
+
+    def describe(self):
+        """
+        Returns:
+            str: Node, shared node and column counts, and each query's normalized, ordered form
+        """
+        shared_count = sum(
+            1 for node_id in self.reachable_ids
+            if self.reference_counts[node_id] > 1 and self.node_keys[node_id][0] not in ("term", "true", "false")
+        )
+        lines = [
+            f"{len(self.reachable_ids)} nodes ({shared_count} shared sub-expressions), "
+            f"{len(self._term_ids)} terms in {len(self.columns)} column(s)"
+        ]
+        for name, root_id in self.root_ids.items():
+            lines.append(f"  {name}: {self.format_node(root_id)}  (P~{self.node_probabilities[root_id]:.3f})")
+        return "\n".join(lines)
+
+    def format_node(self, node_id):
+        """Normalized query text of a node, arguments in evaluation order."""
+        key = self.node_keys[node_id]
+        kind = key[0]
+        if kind in ("true", "false"):
+            return kind.upper()
+        if kind == "term":
+            column_prefix = f"{key[1]}:" if key[1] != self.default_column else ""
+            return f'{column_prefix}"{key[2]}"'
+        if kind == "not":
+            return f"NOT {self.format_node(key[1])}"
+        arguments = ", ".join(self.format_node(child_id) for child_id in self.node_orders[node_id])
+        if kind == "atleast":
+            return f"ATLEAST({key[1]}, {arguments})"
+        if kind == "near":
+            return f"NEAR({key[1]}, {arguments})"
+        return f"{'ALL' if kind == 'and' else 'ANY'}({arguments})"
+
+
+class RowState:
+    """
+    One row being evaluated: lazily scanned columns and the memo of shared nodes.
+    """
+
+    __slots__ = ("queries", "row", "found_sets", "memo")
+
+    def __init__(self, queries, row):
+        self.queries = queries
+        self.row = row
+        self.found_sets = [None] * len(queries.columns)
+        self.memo = {}
+
+    def scan_column(self, slot):
+        """Cleans and scans one column, once per row."""
+        queries = self.queries
+        cell = queries.get_cell(self.row, queries.columns[slot])
+        if isinstance(cell, str):
+            return self.scan_clean_text(slot, queries.clean_function(cell))
+        self.found_sets[slot] = frozenset()
+        return self.found_sets[slot]
+
+    def scan_clean_text(self, slot, clean_text):
+        """
+        Scans a column's clean text: found term ids, or for a column
+        with NEAR terms {term id: word positions} (same `in` test).
+        """
+        queries = self.queries
+        matcher = queries._column_matchers[slot]
+        if slot in queries._position_slots:
+            found = matcher.find_term_positions(clean_text)
+        else:
+            found = matcher.find_term_ids(clean_text)
+        self.found_sets[slot] = found
+        return found
+
+
+def positions_within_window(position_lists, window):
+    """
+    True if one position from each list can be picked with
+    max - min <= window: one sliding window over the merged lists,
+    linear in the number of positions.
+
+    Args:
+        position_lists (list): Ascending position lists, one per term
+        window (int): Largest allowed distance
+
+    Returns:
+        bool
+    """
+    if len(position_lists) == 2:
+        # two terms: two pointers
+        first_positions, second_positions = position_lists
+        first_index = second_index = 0
+        while first_index < len(first_positions) and second_index < len(second_positions):
+            first_position = first_positions[first_index]
+            second_position = second_positions[second_index]
+            if abs(first_position - second_position) <= window:
+                return True
+            if first_position < second_position:
+                first_index += 1
+            else:
+                second_index += 1
+        return False
+
+    merged = list(heapq.merge(*(
+        [(position, list_index) for position in positions]
+        for list_index, positions in enumerate(position_lists)
+    )))
+    counts = [0] * len(position_lists)
+    covered = 0
+    left = 0
+    for position, list_index in merged:
+        if counts[list_index] == 0:
+            covered += 1
+        counts[list_index] += 1
+        while merged[left][0] < position - window:
+            left_index = merged[left][1]
+            counts[left_index] -= 1
+            if counts[left_index] == 0:
+                covered -= 1
+            left += 1
+        if covered == len(position_lists):
+            return True
+    return False
+
+
+def match_set_query(required_terms, optional_terms, n_terms=2):
+    """
+    The classic cascade as a query: any required term, or n_terms optional terms.
+
+    Args:
+        required_terms (list): Terms, any of which is enough
+        optional_terms (list): Terms, n_terms of which are enough
+        n_terms (int): Optional terms needed
+
+    Returns:
+        str: Query text
+    """
+    def quote(term):
+        return '"' + term.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    parts = []
+    if required_terms:
+        parts.append(f"ANY({', '.join(quote(term) for term in required_terms)})")
+    if optional_terms:
+        parts.append(f"ATLEAST({n_terms}, {', '.join(quote(term) for term in optional_terms)})")
+    return " OR ".join(parts) if parts else "NOT \"\""
+
+
+#############
+# Benchmark
+#############
+
+def make_benchmark_queries(vocabulary, query_count, random_generator):
+    """Queries that share an exclusion and a common gate, like per-team match sets."""
+    shared_gate = f'ANY({", ".join(vocabulary[:5])})'
+    shared_exclusion = f'NOT ANY("{vocabulary[5]} {vocabulary[6]}", {vocabulary[7]})'
+    queries = []
+    for query_number in range(query_count):
+        terms = random_generator.sample(vocabulary[10:400], 8)
+        queries.append((
+            f"q{query_number}",
+            f"{shared_gate} AND {shared_exclusion} AND (ANY({terms[0]}, {terms[1]}) OR ATLEAST(2, {', '.join(terms[2:])}))",
+        ))
+    return queries
+
+
+def evaluate_queries_separately(query_sets, text):
+    """Baseline: every query compiled on its own (no sharing), text cleaned and scanned per query."""
+    return {name: compiled.matches(text) for name, compiled in query_sets}
+
+
+def benchmark_queries(row_count=3000, repeats=3):
+    """
+    Prints rows/sec: queries evaluated one by one vs one shared DAG.
+    """
+    random_generator = random.Random(13)
+    vocabulary = make_benchmark_words(2000)
+    texts = [
+        ' '.join(random_generator.choice(vocabulary[:600]) for _ in range(50))
+        for _ in range(row_count)
+    ]
+
+    print(f"{row_count} rows of 50 words; queries share a gate and an exclusion")
+    print(f"{'queries':>8} {'separate rows/s':>16} {'shared DAG rows/s':>18}  DAG")
+
+    for query_count in (1, 4, 16, 64):
+        queries = make_benchmark_queries(vocabulary, query_count, random_generator)
+        shared = CompiledQueries(queries)
+        separate = [(name, CompiledQueries([(name, query_text)])) for name, query_text in queries]
+
+        best = {"separate": None, "shared": None}
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            separate_results = [evaluate_queries_separately(separate, text) for text in texts]
+            seconds = time.perf_counter() - start_time
+            best["separate"] = seconds if best["separate"] is None else min(best["separate"], seconds)
+
+            start_time = time.perf_counter()
+            shared_results = [shared.evaluate(text) for text in texts]
+            seconds = time.perf_counter() - start_time
+            best["shared"] = seconds if best["shared"] is None else min(best["shared"], seconds)
+
+        if separate_results != shared_results:
+            print("Warning: results differ")
+
+        print(
+            f"{query_count:>8} {row_count / best['separate']:>16,.0f} {row_count / best['shared']:>18,.0f}"
+            f"  {shared.describe().splitlines()[0]}"
+        )
+
+
+def post_pass_near(text, rules):
+    """Baseline: a per-rule post-pass, words and positions found again for every rule."""
+    words = text.split()
+    for window, terms in rules:
+        position_lists = [[position for position, word in enumerate(words) if word == term] for term in terms]
+        if all(position_lists) and positions_within_window(position_lists, window):
+            return True
+    return False
+
+
+def benchmark_proximity(row_count=3000, repeats=3):
+    """
+    Prints rows/sec of an ANY(NEAR(...), ...) filter as the number of
+    rules grows: per-rule post-pass vs one positional scan shared by all rules.
+    """
+    random_generator = random.Random(17)
+    vocabulary = make_benchmark_words(2000)
+    texts = [
+        ' '.join(random_generator.choice(vocabulary[:600]) for _ in range(50))
+        for _ in range(row_count)
+    ]
+
+    print(f"{row_count} rows of 50 words; filter: any of n NEAR(5, a, b) rules")
+    print(f"{'rules':>6} {'post-pass rows/s':>17} {'shared scan rows/s':>19} {'rows passing':>13}")
+
+    for rule_count in (1, 10, 100, 1000):
+        rules = [(5, tuple(random_generator.sample(vocabulary[:600], 2))) for _ in range(rule_count)]
+        queries = CompiledQueries([
+            ("near", f"ANY({', '.join(f'NEAR({window}, {first}, {second})' for window, (first, second) in rules)})"),
+        ], match_mode="token")
+
+        best = {"post_pass": None, "shared": None}
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            post_pass_results = [post_pass_near(text, rules) for text in texts]
+            seconds = time.perf_counter() - start_time
+            best["post_pass"] = seconds if best["post_pass"] is None else min(best["post_pass"], seconds)
+
+            start_time = time.perf_counter()
+            shared_results = [queries.matches(text) for text in texts]
+            seconds = time.perf_counter() - start_time
+            best["shared"] = seconds if best["shared"] is None else min(best["shared"], seconds)
+
+        if post_pass_results != shared_results:
+            print("Warning: results differ")
+
+        print(
+            f"{rule_count:>6} {row_count / best['post_pass']:>17,.0f} {row_count / best['shared']:>19,.0f}"
+            f" {sum(shared_results):>13}"
+        )
+
+
+def main():
+    """
+    Prints a compiled query, or runs a benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Compile a match query, or benchmark the DAG')
+    parser.add_argument('--query', '-q', action='append', help='Query (repeat for several)', required=False)
+    parser.add_argument('--proximity', action='store_true', help='Benchmark NEAR rules instead')
+    args = parser.parse_args()
+
+    try:
+        if args.query:
+            compiled_queries = CompiledQueries([(f"q{position}", query) for position, query in enumerate(args.query)])
+            print(compiled_queries.describe())
+        elif args.proximity:
+            benchmark_proximity()
+        else:
+            benchmark_queries()
+    except Exception as e:
+        print(f"Error in match query: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
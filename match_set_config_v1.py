@@ -0,0 +1,379 @@
+# vanilla python tool: declarative match-set config
+# JSON / TOML match sets compiled once into an immutable, picklable matcher
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import functools
+import tomllib
+from typing import NamedTuple
+
+from multi_term_matcher_v1 import MultiTermMatcher, MATCH_MODE_SUBSTRING
+from token_matcher_v1 import MATCH_MODES, create_term_matcher
+from text_cleaning_v1 import CLEAN_MODE_ASCII, CLEAN_MODES, get_clean_text_function
+
+"""
+- vanilla python, not pandas
+- no source edits per job: match sets come from a .json or .toml file
+
+run_sets_of_match_tests() found its term lists by name in globals():
+    REQUIRED_TERMS_LIST__{set_id}, OPTIONAL_TERMS__{set_id}
+so every job meant editing the module, and every worker
+re-resolved (and re-cleaned) the lists from its own module globals.
+
+Here a config file is loaded, checked and compiled once:
+term cleaning (text_cleaning_v1, clean_mode), the one-scan automaton
+(multi_term_matcher_v1) and n_terms per set. The result, CompiledMatchSets,
+is a NamedTuple of tuples / frozensets (nothing changes after compile)
+and pickles as one object, so it is sent to each worker once
+with a pool initializer (install_compiled_match_sets) instead of per row.
+
+Config (TOML; JSON has the same keys):
+
+    clean_mode = "ascii"      # or "unicode", optional
+    match_mode = "substring"  # or "token" (whole words / phrases), optional
+    n_terms = 2               # default per set, optional
+
+    [[match_sets]]
+    id = "1"
+    description = "Cat-related content"
+    required = ["cat"]
+    optional = ["pets", "animal rights"]
+    n_terms = 2               # optional
+
+    [[aggregation_groups]]    # optional, first match wins (counters)
+    name = "a"
+    terms = ["cancel", "refund"]
+
+Use:
+    compiled_match_sets = compile_match_set_config("match_sets.toml")
+    results = evaluate_compiled_match_sets(compiled_match_sets, text)  # {'1': True, ...}
+
+    with Pool(processes=n, initializer=install_compiled_match_sets,
+              initargs=(compiled_match_sets,)) as pool:
+        ...  # in workers: get_installed_match_sets()
+
+Check / time a config:
+    python match_set_config_v1.py --config match_sets.toml
+"""
+
+DEFAULT_N_TERMS = 2
+
+# set in each worker by the pool initializer
+INSTALLED_MATCH_SETS = None
+
+
+class CompiledMatchSets(NamedTuple):
+    """
+    Match sets compiled from one config, immutable and picklable.
+
+    Fields:
+        matcher (MultiTermMatcher): All terms of all sets and groups, cleaned and compiled
+        match_sets (tuple): (set_id, description) tuples, in config order
+        group_names (tuple): Aggregation group names, in config order
+        clean_mode (str): "ascii" or "unicode" (text_cleaning_v1)
+        source (str): Config file path, or "<dict>"
+        match_mode (str): "substring" or "token" (token_matcher_v1)
+    """
+    matcher: MultiTermMatcher
+    match_sets: tuple
+    group_names: tuple
+    clean_mode: str
+    source: str
+    match_mode: str = MATCH_MODE_SUBSTRING
+
+
+def clean_text_or_keep(text, clean_function):
+    """
+    Cleans text, leaves anything else (None, NaN) as is:
+    the matcher finds no terms in a non-str clean result.
+
+    Args:
+        text: Cell value
+        clean_function (callable): text_cleaning_v1 cleaner
+
+    Returns:
+        str or the input unchanged
+    """
+    if isinstance(text, str):
+        return clean_function(text)
+    return text
+
+
+def read_config_file(config_path):
+    """
+    Reads a .json or .toml config file.
+
+    Args:
+        config_path (str): Path to the config file
+
+    Returns:
+        dict: Parsed config
+    """
+    extension = os.path.splitext(config_path)[1].lower()
+
+    if extension == ".json":
+        with open(config_path, 'r', encoding='utf-8') as config_file:
+            return json.load(config_file)
+
+    if extension == ".toml":
+        with open(config_path, 'rb') as config_file:
+            return tomllib.load(config_file)
+
+    raise ValueError(f"Config file must be .json or .toml: {config_path}")
+
+
+def check_term_list(terms, where):
+    """
+    Args:
+        terms: Config value that should be a list of strings
+        where (str): Location for the error message
+
+    Returns:
+        tuple: The terms
+    """
+    if not isinstance(terms, list) or not all(isinstance(term, str) for term in terms):
+        raise ValueError(f"{where} must be a list of strings")
+    return tuple(terms)
+
+
+def normalize_match_set_config(config):
+    """
+    Checks a parsed config and fills in the defaults.
+
+    Args:
+        config (dict): Parsed config
+
+    Returns:
+        dict: {"clean_mode", "match_mode", "match_sets": [(set_id, description, required, optional, n_terms)],
+               "aggregation_groups": [(group_name, terms)]}
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Config must be a table / object")
+
+    clean_mode = config.get("clean_mode", CLEAN_MODE_ASCII)
+    if clean_mode not in CLEAN_MODES:
+        raise ValueError(f"clean_mode must be one of {CLEAN_MODES}")
+
+    match_mode = config.get("match_mode", MATCH_MODE_SUBSTRING)
+    if match_mode not in MATCH_MODES:
+        raise ValueError(f"match_mode must be one of {MATCH_MODES}")
+
+    default_n_terms = config.get("n_terms", DEFAULT_N_TERMS)
+
+    match_sets = []
+    seen_set_ids = set()
+    for position, match_set in enumerate(config.get("match_sets", [])):
+        where = f"match_sets[{position}]"
+        if not isinstance(match_set, dict) or "id" not in match_set:
+            raise ValueError(f"{where} needs an id")
+
+        set_id = str(match_set["id"])
+        if set_id in seen_set_ids:
+            raise ValueError(f"{where}: duplicate id {set_id!r}")
+        seen_set_ids.add(set_id)
+
+        n_terms = match_set.get("n_terms", default_n_terms)
+        if not isinstance(n_terms, int) or isinstance(n_terms, bool) or n_terms < 1:
+            raise ValueError(f"{where}.n_terms must be a positive integer")
+
+        match_sets.append((
+            set_id,
+            str(match_set.get("description", "")),
+            check_term_list(match_set.get("required", []), f"{where}.required"),
+            check_term_list(match_set.get("optional", []), f"{where}.optional"),
+            n_terms,
+        ))
+
+    aggregation_groups = []
+    seen_group_names = set()
+    for position, group in enumerate(config.get("aggregation_groups", [])):
+        where = f"aggregation_groups[{position}]"
+        if not isinstance(group, dict) or "name" not in group:
+            raise ValueError(f"{where} needs a name")
+
+        group_name = str(group["name"])
+        if group_name in seen_group_names:
+            raise ValueError(f"{where}: duplicate name {group_name!r}")
+        seen_group_names.add(group_name)
+
+        aggregation_groups.append((group_name, check_term_list(group.get("terms", []), f"{where}.terms")))
+
+    if not match_sets and not aggregation_groups:
+        raise ValueError("Config has no match_sets and no aggregation_groups")
+
+    return {
+        "clean_mode": clean_mode,
+        "match_mode": match_mode,
+        "match_sets": match_sets,
+        "aggregation_groups": aggregation_groups,
+    }
+
+
+def compile_match_set_config(config, match_mode=None, clean_mode=None):
+    """
+    Loads (if a path), checks and compiles a match-set config, once.
+
+    Args:
+        config (str or dict): Path to a .json / .toml file, or a parsed config
+        match_mode (str): "substring" or "token", None for the config's match_mode
+        clean_mode (str): "ascii" or "unicode", None for the config's clean_mode
+
+    Returns:
+        CompiledMatchSets: Immutable, picklable compiled match sets
+    """
+    source = "<dict>"
+    if isinstance(config, (str, os.PathLike)):
+        source = os.fspath(config)
+        config = read_config_file(source)
+
+    if match_mode is not None and isinstance(config, dict):
+        config = dict(config, match_mode=match_mode)
+    if clean_mode is not None and isinstance(config, dict):
+        config = dict(config, clean_mode=clean_mode)
+    normalized = normalize_match_set_config(config)
+
+    clean_function = functools.partial(
+        clean_text_or_keep,
+        clean_function=get_clean_text_function(normalized["clean_mode"]),
+    )
+
+    matcher = create_term_matcher(
+        [
+            (set_id, required_terms, optional_terms, n_terms)
+            for set_id, _, required_terms, optional_terms, n_terms in normalized["match_sets"]
+        ],
+        normalized["aggregation_groups"],
+        clean_function=clean_function,
+        match_mode=normalized["match_mode"],
+    )
+
+    return CompiledMatchSets(
+        matcher=matcher,
+        match_sets=tuple((set_id, description) for set_id, description, _, _, _ in normalized["match_sets"]),
+        group_names=tuple(group_name for group_name, _ in normalized["aggregation_groups"]),
+        clean_mode=normalized["clean_mode"],
+        source=source,
+        match_mode=normalized["match_mode"],
+    )
+
+
+def match_set_config_from_namespace(match_sets, namespace, aggregation_groups=(),
+                                    n_terms=DEFAULT_N_TERMS, clean_mode=CLEAN_MODE_ASCII):
+    """
+    Builds a config from the old module-globals layout
+    (REQUIRED_TERMS_LIST__{set_id}, OPTIONAL_TERMS__{set_id}),
+    e.g. to write it out once with json.dump().
+
+    Args:
+        match_sets (list): (set_id, description) tuples
+        namespace (dict): Where the term lists are, e.g. globals() of a module
+        aggregation_groups (list): (group_name, terms) tuples
+        n_terms (int): Optional terms needed per set
+        clean_mode (str): "ascii" or "unicode"
+
+    Returns:
+        dict: Config for compile_match_set_config()
+    """
+    config_match_sets = []
+    for set_id, description in match_sets:
+        required_terms = namespace.get(f"REQUIRED_TERMS_LIST__{set_id}")
+        if required_terms is None:
+            raise ValueError(f"Could not find required terms list: REQUIRED_TERMS_LIST__{set_id}")
+
+        config_match_sets.append({
+            "id": set_id,
+            "description": description,
+            "required": list(required_terms),
+            "optional": list(namespace.get(f"OPTIONAL_TERMS__{set_id}") or []),
+        })
+
+    return {
+        "clean_mode": clean_mode,
+        "n_terms": n_terms,
+        "match_sets": config_match_sets,
+        "aggregation_groups": [
+            {"name": group_name, "terms": list(terms)} for group_name, terms in aggregation_groups
+        ],
+    }
+
+
+def evaluate_compiled_match_sets(compiled_match_sets, input_text):
+    """
+    Any required term, or at least n_terms optional terms, per match set:
+    one clean and one scan for all sets.
+
+    Args:
+        compiled_match_sets (CompiledMatchSets): Compiled config
+        input_text (str or PreparedRow): Text to analyze
+
+    Returns:
+        dict: {set_id: bool}
+    """
+    matcher = compiled_match_sets.matcher
+    return matcher.evaluate_match_sets(matcher.prepare_row(input_text).found_term_ids)
+
+
+def install_compiled_match_sets(compiled_match_sets):
+    """
+    Pool initializer: keeps the compiled match sets in this worker process.
+
+    Args:
+        compiled_match_sets (CompiledMatchSets): Compiled config (pickled once per worker)
+    """
+    global INSTALLED_MATCH_SETS
+    INSTALLED_MATCH_SETS = compiled_match_sets
+
+
+def get_installed_match_sets():
+    """
+    Returns:
+        CompiledMatchSets: The match sets installed by the pool initializer
+    """
+    if INSTALLED_MATCH_SETS is None:
+        raise RuntimeError("No compiled match sets installed in this process (pool initializer missing)")
+    return INSTALLED_MATCH_SETS
+
+
+#############
+# Check / time
+#############
+
+def main():
+    """
+    Compiles a config and prints its sets, groups, compile time and pickled size.
+    """
+    parser = argparse.ArgumentParser(description='Check and compile a match-set config')
+    parser.add_argument('--config', '-m', help='Match-set config (.json or .toml)', required=True)
+    args = parser.parse_args()
+
+    try:
+        start_time = time.perf_counter()
+        compiled_match_sets = compile_match_set_config(args.config)
+        compile_seconds = time.perf_counter() - start_time
+
+        pickled = pickle.dumps(compiled_match_sets)
+        start_time = time.perf_counter()
+        pickle.loads(pickled)
+        unpickle_seconds = time.perf_counter() - start_time
+
+        print(f"config: {compiled_match_sets.source} (clean_mode {compiled_match_sets.clean_mode}, "
+              f"match_mode {compiled_match_sets.match_mode})")
+        for set_id, description in compiled_match_sets.match_sets:
+            print(f"  match set {set_id}: {description}")
+        for group_name in compiled_match_sets.group_names:
+            print(f"  aggregation group {group_name}")
+        print(f"distinct terms: {len(compiled_match_sets.matcher.terms)}")
+        print(f"compile: {compile_seconds * 1000:.1f} ms, "
+              f"pickled: {len(pickled):,} bytes, unpickle (per worker): {unpickle_seconds * 1000:.1f} ms")
+
+    except Exception as e:
+        print(f"Error in match-set config: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+# vanilla python tool: multi-term matcher
+# one scan of the cleaned text finds every term of every match set
+
+import re
+import time
+import random
+
+"""
+- vanilla python, not pandas
+- same results as the per-term loops:
+      any(clean_string(term) in clean_text for term in required_terms)
+      count(clean_string(term) in clean_text for term in optional_terms) >= n_terms
+      first aggregation group with a term in clean_text
+  (substring semantics, a term inside a longer word still matches)
+
+The per-term loops cost O(terms x text) per row, and run again for every
+match set. Here all required, optional and aggregation terms of all sets
+are compiled once into one automaton, and one scan of the cleaned text
+returns the ids of all terms found; each match set is then only
+a set intersection / count over those ids.
+
+Automaton (Aho-Corasick style, run by the C regex engine):
+- the terms go into a trie, single-child chains are merged (radix trie)
+- the trie is written as one regex inside a lookahead, so it is tried
+  at every text position and the matches can overlap / nest
+  ("animal rights" and "rights" are both found)
+- at a given position the text follows exactly one path down the trie;
+  going deeper after a term end is optional (greedy), nodes that do not
+  end a term are required, so the single group captures the longest
+  term starting there, and the lookahead only matches where a term starts
+- the terms that are prefixes of it (e.g. "cat" for "cats")
+  are precomputed per term (prefix closure)
+
+So the scanning loop runs in C (pattern.findall, no match objects),
+and python only sees one string per term occurrence. Terms that clean to '' are in every text (as with `in`).
+
+Few terms: below SCAN_MIN_TERMS distinct terms, a plain `in` per term
+(C fastsearch, no per-position work) is faster than the scan,
+so the matcher uses that instead; same ids, same API.
+
+Benchmark (rows/sec, per-term loops vs one scan, growing term lists):
+    python multi_term_matcher_v1.py
+"""
+
+# below this many distinct (non-empty) terms, `term in text` per term beats the scan
+SCAN_MIN_TERMS = 128
+
+# a term matches anywhere in the clean text ("cat" in "education"),
+# see token_matcher_v1 for whole words / phrases
+MATCH_MODE_SUBSTRING = "substring"
+
+
+def build_term_trie(terms):
+    """
+    Builds a character trie of terms.
+
+    Args:
+        terms (list): Non-empty term strings, the list position is the term id
+
+    Returns:
+        dict: Root node {"children": {char: node}, "term_id": None}
+    """
+    root = {"children": {}, "term_id": None}
+
+    for term_id, term in enumerate(terms):
+        node = root
+        for char in term:
+            node = node["children"].setdefault(char, {"children": {}, "term_id": None})
+        node["term_id"] = term_id
+
+    return root
+
+
+def trie_branches_regex(node):
+    """
+    Writes the children of a trie node as a regex alternation.
+
+    Args:
+        node (dict): Trie node
+
+    Returns:
+        str: Regex alternation (no outer group)
+    """
+    alternatives = []
+
+    for first_char in sorted(node["children"]):
+        child = node["children"][first_char]
+
+        # merge single-child chains that do not end a term into one literal
+        label = first_char
+        while child["term_id"] is None and len(child["children"]) == 1:
+            (next_char, next_child), = child["children"].items()
+            label += next_char
+            child = next_child
+
+        alternative = re.escape(label)
+
+        if child["children"]:
+            branches = trie_branches_regex(child)
+            if child["term_id"] is not None:
+                # a term ends here: going deeper is optional (greedy)
+                alternative += f"(?:{branches})?"
+            else:
+                alternative += f"(?:{branches})"
+
+        alternatives.append(alternative)
+
+    return "|".join(alternatives)
+
+
+def compile_term_trie_regex(terms):
+    """
+    Compiles terms into one overlapping-match trie regex.
+
+    pattern.findall(text) returns, for every position where a term starts,
+    the longest term starting there.
+
+    Args:
+        terms (list): Non-empty term strings, the list position is the term id
+
+    Returns:
+        tuple: (compiled pattern or None if there are no terms,
+                dict {term: ids of all terms that are prefixes of it, itself included})
+    """
+    if not terms:
+        return None, {}
+
+    trie_root = build_term_trie(terms)
+
+    prefix_term_ids = {}
+    for term in terms:
+        path_term_ids = []
+        node = trie_root
+        for char in term:
+            node = node["children"][char]
+            if node["term_id"] is not None:
+                path_term_ids.append(node["term_id"])
+        prefix_term_ids[term] = tuple(path_term_ids)
+
+    # one group: no per-term groups, so a match does not copy thousands of marks
+    pattern = re.compile(f"(?=({trie_branches_regex(trie_root)}))")
+
+    return pattern, prefix_term_ids
+
+
+class PreparedRow:
+    """
+    One row, cleaned once and scanned once: every match set and layer
+    (required / optional / aggregation groups) reads the same found term ids.
+
+    Made by MultiTermMatcher.prepare_row().
+    """
+
+    __slots__ = ("text", "clean_text", "found_term_ids", "matcher")
+
+    def __init__(self, text, clean_text, found_term_ids, matcher):
+        self.text = text
+        self.clean_text = clean_text
+        self.found_term_ids = found_term_ids
+        self.matcher = matcher
+
+
+class MultiTermMatcher:
+    """
+    All terms of all match sets and aggregation groups, compiled once.
+
+    Term lists are cleaned with clean_function once, here, not per row.
+    Picklable (module level clean_function), so it can be sent to workers.
+
+    Args:
+        match_sets (list): (set_id, required_terms, optional_terms, n_terms) tuples
+        aggregation_groups (list): (group_name, terms) tuples, first match wins
+        clean_function (callable): Cleans a term the same way as the text,
+                                   or None if the terms are already clean
+    """
+
+    match_mode = MATCH_MODE_SUBSTRING
+
+    def __init__(self, match_sets=(), aggregation_groups=(), clean_function=None):
+        self.clean_function = clean_function
+
+        self.terms = []
+        self._term_ids = {}
+
+        self.match_sets = tuple(
+            (
+                set_id,
+                frozenset(self._add_terms(required_terms)),
+                # a list, not a set: duplicates count twice, like the loop
+                tuple(self._add_terms(optional_terms)),
+                n_terms,
+            )
+            for set_id, required_terms, optional_terms, n_terms in match_sets
+        )
+
+        self.aggregation_groups = tuple(
+            (group_name, frozenset(self._add_terms(group_terms)))
+            for group_name, group_terms in aggregation_groups
+        )
+
+        self.terms = tuple(self.terms)
+        del self._term_ids
+
+        self._compile_terms()
+
+    def _compile_terms(self):
+        """Compiles self.terms for find_term_ids()."""
+        # '' is in every string
+        self._always_term_ids = frozenset(
+            term_id for term_id, term in enumerate(self.terms) if not term
+        )
+
+        # empty terms stay in the id numbering, but not in the trie
+        trie_terms = [term for term in self.terms if term]
+        trie_term_ids = [term_id for term_id, term in enumerate(self.terms) if term]
+        self._loop_terms = ()
+        if len(trie_terms) < SCAN_MIN_TERMS:
+            # few terms: `in` per term, no automaton
+            self._loop_terms = tuple(zip(trie_terms, trie_term_ids))
+            trie_terms = []
+
+        self._pattern, prefix_trie_ids = compile_term_trie_regex(trie_terms)
+        self._prefix_term_ids = {
+            term: tuple(trie_term_ids[trie_id] for trie_id in trie_ids)
+            for term, trie_ids in prefix_trie_ids.items()
+        }
+
+    def _add_terms(self, raw_terms):
+        """Cleans terms and returns their ids, adding new terms."""
+        term_ids = []
+        for raw_term in raw_terms or ():
+            term = self.clean_function(raw_term) if self.clean_function else raw_term
+            if term not in self._term_ids:
+                self._term_ids[term] = len(self.terms)
+                self.terms.append(term)
+            term_ids.append(self._term_ids[term])
+        return term_ids
+
+    def find_term_ids(self, clean_text):
+        """
+        One scan: the ids of every term found in the text.
+
+        Args:
+            clean_text (str): Text cleaned with the same clean_function as the terms
+
+        Returns:
+            set: Term ids (positions in self.terms)
+        """
+        found_term_ids = set(self._always_term_ids)
+
+        for term, term_id in self._loop_terms:
+            if term in clean_text:
+                found_term_ids.add(term_id)
+
+        if self._pattern is not None and clean_text:
+            # longest term at each position (C loop, no match objects),
+            # then the terms that are prefixes of it
+            for longest_term in set(self._pattern.findall(clean_text)):
+                found_term_ids.update(self._prefix_term_ids[longest_term])
+
+        return found_term_ids
+
+    def find_term_positions(self, clean_text):
+        """
+        Same scan as find_term_ids(), keeping where each term is:
+        the number of the word (0-based, words separated by single spaces
+        as in cleaned text) each occurrence starts in.
+
+        Args:
+            clean_text (str): Text cleaned with the same clean_function as the terms
+
+        Returns:
+            dict: {term id: ascending word positions} for every term found
+                  (terms that clean to '' have no positions)
+        """
+        term_positions = {term_id: [] for term_id in self._always_term_ids}
+
+        for term, term_id in self._loop_terms:
+            offset = clean_text.find(term)
+            if offset < 0:
+                continue
+            # word number: spaces before the offset, counted incrementally (C loops)
+            positions = term_positions[term_id] = []
+            word_position = clean_text.count(' ', 0, offset)
+            while offset >= 0:
+                # terms found inside one word are at that word once
+                if not positions or positions[-1] != word_position:
+                    positions.append(word_position)
+                next_offset = clean_text.find(term, offset + 1)
+                if next_offset >= 0:
+                    word_position += clean_text.count(' ', offset, next_offset)
+                offset = next_offset
+
+        if self._pattern is not None and clean_text:
+            # matches come in text order, so the word count is one pass
+            word_position = 0
+            last_offset = 0
+            for match in self._pattern.finditer(clean_text):
+                offset = match.start()
+                word_position += clean_text.count(' ', last_offset, offset)
+                last_offset = offset
+                for term_id in self._prefix_term_ids[match.group(1)]:
+                    positions = term_positions.setdefault(term_id, [])
+                    if not positions or positions[-1] != word_position:
+                        positions.append(word_position)
+
+        return term_positions
+
+    def prepare_row(self, text):
+        """
+        Cleans the text once (clean_function) and scans it once.
+
+        Args:
+            text (str): Raw row text, or a PreparedRow (its clean text is reused,
+                        and it is only scanned again if it came from another matcher)
+
+        Returns:
+            PreparedRow: Row with clean_text and found_term_ids
+        """
+        if isinstance(text, PreparedRow):
+            if text.matcher is self:
+                return text
+            clean_text = text.clean_text
+            text = text.text
+        elif self.clean_function:
+            clean_text = self.clean_function(text)
+        else:
+            clean_text = text
+
+        if isinstance(clean_text, str):
+            found_term_ids = self.find_term_ids(clean_text)
+        else:
+            # not text: nothing matches (the loops raised and returned False)
+            found_term_ids = set()
+
+        return PreparedRow(text, clean_text, found_term_ids, self)
+
+    def evaluate_match_sets(self, found_term_ids):
+        """
+        Any required term, or at least n_terms optional terms, per match set.
+
+        Args:
+            found_term_ids (set): Result of find_term_ids()
+
+        Returns:
+            dict: {set_id: bool}
+        """
+        results = {}
+        for set_id, required_term_ids, optional_term_ids, n_terms in self.match_sets:
+            if not required_term_ids.isdisjoint(found_term_ids):
+                results[set_id] = True
+                continue
+
+            optional_count = sum(1 for term_id in optional_term_ids if term_id in found_term_ids)
+            # the loop only checks the count after a term is found
+            results[set_id] = optional_count > 0 and optional_count >= n_terms
+
+        return results
+
+    def first_matching_group(self, found_term_ids):
+        """
+        First aggregation group (in order) with a term in the text.
+
+        Args:
+            found_term_ids (set): Result of find_term_ids()
+
+        Returns:
+            str: Group name, or None
+        """
+        for group_name, group_term_ids in self.aggregation_groups:
+            if not group_term_ids.isdisjoint(found_term_ids):
+                return group_name
+        return None
+
+
+#############
+# Benchmark
+#############
+
+def regex_clean_string(text):
+    """The counters' clean_string(): regex sub, lower, split/join."""
+    return ' '.join(re.sub(r'[^a-zA-Z\s]', '', text).lower().split())
+
+
+def current_loop_match_set(text, required_terms, optional_terms, n_terms=2):
+    """Per-term loop as it runs now: text and every term cleaned on each call."""
+    clean_text = regex_clean_string(text)
+    for term in required_terms:
+        if regex_clean_string(term) in clean_text:
+            return True
+
+    clean_text = regex_clean_string(text)
+    n_term_counter = 0
+    for term in optional_terms:
+        if regex_clean_string(term) in clean_text:
+            n_term_counter += 1
+            if n_term_counter >= n_terms:
+                return True
+    return False
+
+
+def loop_match_set(clean_text, required_terms, optional_terms, n_terms=2):
+    """Per-term loop baseline with terms already clean (best case of the loop)."""
+    for term in required_terms:
+        if term in clean_text:
+            return True
+
+    n_term_counter = 0
+    for term in optional_terms:
+        if term in clean_text:
+            n_term_counter += 1
+            if n_term_counter >= n_terms:
+                return True
+    return False
+
+
+def make_benchmark_words(word_count, seed=7):
+    """Random lowercase words, 3 to 9 letters."""
+    random_generator = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        ''.join(random_generator.choice(letters) for _ in range(random_generator.randint(3, 9)))
+        for _ in range(word_count)
+    ]
+
+
+def benchmark_matchers(row_count=2000, set_count=4, repeats=3):
+    """
+    Prints rows/sec for the per-term loops vs one scan, as term lists grow.
+    """
+    vocabulary = make_benchmark_words(20000)
+    random_generator = random.Random(11)
+    texts = [
+        ' '.join(random_generator.choice(vocabulary) for _ in range(60))
+        for _ in range(row_count)
+    ]
+
+    print(f"{row_count} rows of ~60 words, {set_count} match sets")
+    print("rows/sec: current loops (cleaning per call), loops over pre-cleaned terms, one scan")
+    print(f"{'terms/set':>10} {'current':>14} {'clean loops':>14} {'scan':>14}")
+
+    for terms_per_set in (2, 5, 10, 50, 200, 1000):
+        match_sets = []
+        for set_number in range(set_count):
+            set_terms = random_generator.sample(vocabulary, terms_per_set * 2)
+            match_sets.append((str(set_number), set_terms[:terms_per_set], set_terms[terms_per_set:], 2))
+
+        matcher = MultiTermMatcher(match_sets)
+
+        timings = {"current": None, "loop": None, "scan": None}
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            current_results = [
+                {set_id: current_loop_match_set(text, required, optional, n_terms)
+                 for set_id, required, optional, n_terms in match_sets}
+                for text in texts
+            ]
+            timings["current"] = min_seconds(timings["current"], time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            loop_results = [
+                {set_id: loop_match_set(text, required, optional, n_terms)
+                 for set_id, required, optional, n_terms in match_sets}
+                for text in texts
+            ]
+            timings["loop"] = min_seconds(timings["loop"], time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            scan_results = [
+                matcher.evaluate_match_sets(matcher.find_term_ids(text))
+                for text in texts
+            ]
+            timings["scan"] = min_seconds(timings["scan"], time.perf_counter() - start_time)
+
+        if not (current_results == loop_results == scan_results):
+            print("Warning: results differ")
+
+        print(
+            f"{terms_per_set * 2:>10}"
+            f" {row_count / timings['current']:>14,.0f}"
+            f" {row_count / timings['loop']:>14,.0f}"
+            f" {row_count / timings['scan']:>14,.0f}"
+        )
+
+
+def min_seconds(best_seconds, seconds):
+    """Best (lowest) time so far."""
+    return seconds if best_seconds is None else min(best_seconds, seconds)
+
+
+def main():
+    """
+    Runs the matcher benchmark.
+    """
+    try:
+        benchmark_matchers()
+    except Exception as e:
+        print(f"Error in benchmark: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,50 @@ String Pattern Matching Module
 This module provides functionality for matching various patterns in text data,
 with support for required terms and optional terms using a cascading filtering approach.
 Results can be added to pandas DataFrames safely after parallel processing.
+
+pandas and numpy are imported by the functions that use them, not at
+module load, so the stdlib "python" engine (add_pattern_match_fields(),
+stream_pattern_match_csv_python()) and short CLI runs do not pay for them.
 """
 
+from __future__ import annotations
+
 import csv
+import sys
 import argparse
 import os
-import re
+import time
+import random
 import logging
-import pandas as pd
-from concurrent.futures import ProcessPoolExecutor
+import resource
+import subprocess
 from functools import partial
 from collections import Counter
 from datetime import datetime, UTC as datetime_UTC
-from typing import List, Dict, Tuple, Any, Optional, Union
+from importlib.util import find_spec
+from typing import List, Dict, Tuple, Any, Optional, Union, Callable, Iterable, TYPE_CHECKING
+from multi_term_matcher_v1 import MultiTermMatcher, MATCH_MODE_SUBSTRING, build_term_trie, trie_branches_regex
+from token_matcher_v1 import MATCH_MODE_TOKEN
+from text_cleaning_v1 import CLEAN_MODE_ASCII, get_clean_text_function
+from match_set_config_v1 import (
+    CompiledMatchSets,
+    compile_match_set_config,
+    install_compiled_match_sets,
+    get_installed_match_sets,
+)
+from worker_bootstrap_v1 import (
+    create_bootstrapped_executor,
+    create_bootstrapped_pool,
+    collect_bootstrap_reports,
+    format_bootstrap_report,
+)
+from parallel_pipeline_v1 import iter_pipelined_chunks
+from shared_text_column_v1 import SharedTextColumn, flag_row_range, DEFAULT_SHARED_BATCH_ROWS
+from batch_recovery_v1 import run_range_batches, format_recovery_report, DEFAULT_MAX_BATCH_RETRIES
+
+if TYPE_CHECKING:
+    # annotations only, see the functions for the deferred imports
+    import pandas as pd
 
 # Configure logging
 logging.basicConfig(
@@ -48,6 +79,39 @@ MATCH_SETS = [
     ("2", "Breakfast-related content"),
 ]
 
+# "ascii": a-z only, as before; "unicode": letters of every script (text_cleaning_v1)
+CLEAN_STRING_MODE: str = CLEAN_MODE_ASCII
+
+# add_pattern_match_columns() engines:
+# "vectorized": whole-column masks, "rows": iterrows() + run_sets_of_match_tests() per row,
+# "shared": run_sets_of_match_tests() per row in workers, text column in a mapped file
+ENGINE_VECTORIZED = "vectorized"
+ENGINE_ROWS = "rows"
+ENGINE_SHARED = "shared"
+ENGINES = (ENGINE_VECTORIZED, ENGINE_ROWS, ENGINE_SHARED)
+
+# stdlib-only engine for lists of dicts and CSV files, no pandas / numpy import
+# (add_pattern_match_fields(), stream_pattern_match_csv_python())
+ENGINE_PYTHON = "python"
+
+# fewer records than this are matched in this process by the "python" engine
+# (worker startup costs more than it saves)
+PYTHON_ENGINE_PARALLEL_MIN_ROWS = 10_000
+
+# stream_pattern_match_csv() output formats ("parquet" needs pyarrow)
+OUTPUT_FORMAT_CSV = "csv"
+OUTPUT_FORMAT_PARQUET = "parquet"
+OUTPUT_FORMATS = (OUTPUT_FORMAT_CSV, OUTPUT_FORMAT_PARQUET)
+
+# rows read, tagged and written at a time by stream_pattern_match_csv()
+DEFAULT_STREAM_CHUNK_ROWS = 100_000
+
+# source row number (0 indexed, header not counted) in the streamed output
+STREAM_ROW_NUMBER_COLUMN = "row_number"
+
+# rows that fail on their own in a worker ("rows" and "shared" engines), {timestamp}: UTC start of the run
+DEFAULT_QUARANTINE_PATH = "pattern_match_quarantine_{timestamp}.csv"
+
 
 def clean_string(input_text: Any) -> str:
     """
@@ -64,10 +128,9 @@ def clean_string(input_text: Any) -> str:
             logger.warning(f"Expected string input but got {type(input_text)}. Returning as is.")
             return str(input_text)
             
-        # Remove all non-alphabetic characters (keeping spaces)
-        cleaned = re.sub(r'[^a-zA-Z\s]', '', input_text)
-        # Convert to lowercase and strip extra whitespace
-        return ' '.join(cleaned.lower().split())
+        # One translate() pass + split/join (text_cleaning_v1),
+        # in "ascii" mode the same output as the old regex version
+        return get_clean_text_function(CLEAN_STRING_MODE)(input_text)
     except Exception as e:
         logger.error(f"Error cleaning string: {str(e)}")
         return str(input_text)
@@ -185,16 +248,118 @@ def count_pattern_matches_in_text_boolean(
         return False
 
 
+# Compiled matchers, keyed by the match sets and term lists they were built from
+COMPILED_MATCH_SETS_CACHE: Dict[tuple, Tuple[MultiTermMatcher, Dict[str, str]]] = {}
+
+# matchers kept in COMPILED_MATCH_SETS_CACHE (the oldest is dropped first)
+COMPILED_MATCH_SETS_CACHE_SIZE = 64
+
+
+def get_compiled_match_sets(
+    match_sets: List[Tuple[str, str]]
+) -> Tuple[MultiTermMatcher, Dict[str, str]]:
+    """
+    Compile the term lists of all match sets into one MultiTermMatcher, once.
+    
+    The lists are found by name in globals() (REQUIRED_TERMS_LIST__{set_id},
+    OPTIONAL_TERMS__{set_id}); lists whose terms change (replaced,
+    appended to or edited in place) get a new matcher.
+    
+    Args:
+        match_sets: List of tuples (set_id, set_description) defining rule sets to apply
+        
+    Returns:
+        tuple: (matcher, dict of set_id -> error message for sets without a required list)
+    """
+    term_lists = [
+        (
+            set_id,
+            globals().get(f"REQUIRED_TERMS_LIST__{set_id}"),
+            globals().get(f"OPTIONAL_TERMS__{set_id}"),
+        )
+        for set_id, _ in match_sets
+    ]
+    
+    # keyed by the terms themselves (not the list objects, whose id() is reused
+    # once they are freed, and whose items can be changed in place) and the clean mode
+    cache_key = (CLEAN_STRING_MODE,) + tuple(
+        (
+            set_id,
+            None if required is None else tuple(required),
+            None if optional is None else tuple(optional),
+        )
+        for set_id, required, optional in term_lists
+    )
+    
+    if cache_key not in COMPILED_MATCH_SETS_CACHE:
+        if len(COMPILED_MATCH_SETS_CACHE) >= COMPILED_MATCH_SETS_CACHE_SIZE:
+            # bounded: term lists built per call would otherwise grow it forever
+            del COMPILED_MATCH_SETS_CACHE[next(iter(COMPILED_MATCH_SETS_CACHE))]
+
+        set_errors = {}
+        compiled_sets = []
+        
+        for set_id, required_terms_list, optional_terms_list in term_lists:
+            # Validate that we found the term lists
+            if required_terms_list is None:
+                set_errors[set_id] = f"Could not find required terms list: REQUIRED_TERMS_LIST__{set_id}"
+                continue
+            
+            # Optional terms list might be empty, but should not be None
+            if optional_terms_list is None:
+                optional_terms_list = []
+                logger.warning(f"No optional terms list found for {set_id}, using empty list")
+            
+            compiled_sets.append((set_id, required_terms_list, optional_terms_list, 2))
+        
+        matcher = MultiTermMatcher(compiled_sets, clean_function=clean_string)
+        COMPILED_MATCH_SETS_CACHE[cache_key] = (matcher, set_errors)
+    
+    return COMPILED_MATCH_SETS_CACHE[cache_key]
+
+
+def resolve_match_sets(
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets, None]
+) -> Tuple[MultiTermMatcher, Dict[str, str], List[Tuple[str, str]]]:
+    """
+    The compiled matcher behind any accepted form of match_sets.
+    
+    Args:
+        match_sets: List of tuples (set_id, set_description) (term lists from module globals),
+                    CompiledMatchSets, or None for the ones installed in this worker
+        
+    Returns:
+        tuple: (matcher, dict of set_id -> error message, list of (set_id, set_description))
+    """
+    if match_sets is None:
+        # Shipped once per worker by the pool initializer
+        match_sets = get_installed_match_sets()
+    
+    if isinstance(match_sets, CompiledMatchSets):
+        # Compiled from a config: nothing to look up
+        return match_sets.matcher, {}, list(match_sets.match_sets)
+    
+    matcher, set_errors = get_compiled_match_sets(match_sets)
+    return matcher, set_errors, list(match_sets)
+
+
 def run_sets_of_match_tests(
-    match_sets: List[Tuple[str, str]],
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets, None],
     input_text: str
 ) -> Dict[str, bool]:
     """
     Run multiple sets of pattern matching tests on an input text.
     
+    All match sets are tested with one scan of the cleaned text
+    (multi_term_matcher_v1), with the same results as
+    count_pattern_matches_in_text_boolean() per set.
+    The text is cleaned once per row; a PreparedRow is reused as is.
+    
     Args:
         match_sets: List of tuples (set_id, set_description) defining rule sets to apply
-        input_text: Text to analyze with all pattern matching rule sets
+                    (term lists from module globals), CompiledMatchSets from a config
+                    (match_set_config_v1), or None for the ones installed in this worker
+        input_text: Text (or PreparedRow) to analyze with all pattern matching rule sets
         
     Returns:
         dict: Dictionary with match set IDs as keys and boolean match results as values
@@ -203,42 +368,26 @@ def run_sets_of_match_tests(
         # Initialize results dictionary
         results = {}
         
+        matcher, set_errors, match_sets = resolve_match_sets(match_sets)
+        
+        # One clean, one scan for all match sets (prepared row)
+        prepared_row = matcher.prepare_row(input_text)
+        set_results = matcher.evaluate_match_sets(prepared_row.found_term_ids)
+        
         # Process each match set
         for set_id, set_description in match_sets:
-            # Construct the variable names for the required and optional term lists
-            required_terms_var_name = f"REQUIRED_TERMS_LIST__{set_id}"
-            optional_terms_var_name = f"OPTIONAL_TERMS__{set_id}"
-            
-            # Get the lists from the global namespace
-            try:
-                required_terms_list = globals().get(required_terms_var_name)
-                optional_terms_list = globals().get(optional_terms_var_name)
-                
-                # Validate that we found the term lists
-                if required_terms_list is None:
-                    raise ValueError(f"Could not find required terms list: {required_terms_var_name}")
-                
-                # Optional terms list might be empty, but should not be None
-                if optional_terms_list is None:
-                    optional_terms_list = []
-                    logger.warning(f"No optional terms list found for {set_id}, using empty list")
-                
-                # Run the pattern matching test for this set
-                match_result = count_pattern_matches_in_text_boolean(
-                    required_terms_list,
-                    optional_terms_list,
-                    input_text
-                )
-                
-                # Store the result with the set ID as the key
-                results[set_id] = match_result
-                
-                logger.debug(f"Match set {set_id} ({set_description}): {match_result}")
-                
-            except Exception as e:
+            if set_id in set_errors:
                 # Log the error but continue processing other match sets
-                logger.error(f"Error processing match set {set_id}: {str(e)}")
+                logger.error(f"Error processing match set {set_id}: {set_errors[set_id]}")
                 results[set_id] = False  # Default to False on error
+                continue
+            
+            match_result = set_results.get(set_id, False)
+            
+            # Store the result with the set ID as the key
+            results[set_id] = match_result
+            
+            logger.debug(f"Match set {set_id} ({set_description}): {match_result}")
         
         return results
         
@@ -250,7 +399,8 @@ def run_sets_of_match_tests(
 def process_batch(
     df_batch: pd.DataFrame, 
     text_column: str, 
-    match_sets: List[Tuple[str, str]]
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets, None],
+    raise_errors: bool = False
 ) -> pd.DataFrame:
     """
     Process a batch of DataFrame rows, adding pattern match results as new columns.
@@ -258,7 +408,10 @@ def process_batch(
     Args:
         df_batch: Pandas DataFrame batch to process
         text_column: Column name containing text to analyze
-        match_sets: List of match sets to apply
+        match_sets: List of match sets to apply, CompiledMatchSets,
+                    or None for the ones installed in this worker
+        raise_errors: Raise instead of returning the batch unchanged
+                      (the batch is retried / bisected by the caller)
         
     Returns:
         pd.DataFrame: DataFrame with new match result columns added
@@ -270,90 +423,1053 @@ def process_batch(
         # Process each row
         for idx, row in result_df.iterrows():
             text_to_analyze = row[text_column]
-            match_results = run_sets_of_match_tests(match_sets, text_to_analyze)
+            if isinstance(text_to_analyze, str):
+                match_results = run_sets_of_match_tests(match_sets, text_to_analyze)
+            else:
+                # not a str (None, NaN): no match, as in the other engines
+                match_results = {set_id: False for set_id, _ in resolve_match_sets(match_sets)[2]}
             
             # Add results as new columns
             for set_id, result in match_results.items():
                 result_df.at[idx, f'match_set_{set_id}'] = result
+        
+        if result_df.empty:
+            # no rows to add them: the (empty) columns, as the other engines return
+            for set_id, _ in resolve_match_sets(match_sets)[2]:
+                result_df[f'match_set_{set_id}'] = False
                 
         return result_df
         
     except Exception as e:
         logger.error(f"Error processing batch: {str(e)}")
+        if raise_errors:
+            raise
         return df_batch  # Return original on error
 
 
+def any_term_mask(
+    clean_series: pd.Series,
+    is_text: pd.Series,
+    terms: List[str],
+    match_mode: str = MATCH_MODE_SUBSTRING
+) -> pd.Series:
+    """
+    Rows whose clean text contains any of the (clean) terms, as one
+    str.contains() pass with the terms compiled into a trie alternation
+    (multi_term_matcher_v1), so shared prefixes are tested once.
+    
+    Args:
+        clean_series: Cleaned text column
+        is_text: Boolean mask of the rows whose text is a str
+        terms: Clean terms
+        match_mode: "substring", or "token" for whole words / phrases
+        
+    Returns:
+        pd.Series: Boolean mask
+    """
+    import pandas as pd  # deferred: only pandas code paths pay for the import
+    terms = list(dict.fromkeys(terms))
+    if not terms:
+        return pd.Series(False, index=clean_series.index)
+    
+    # '' is in every text (a term of no words, in token mode)
+    if any((not term.split()) if match_mode == MATCH_MODE_TOKEN else (not term) for term in terms):
+        return is_text.copy()
+    
+    alternation = trie_branches_regex(build_term_trie(terms))
+    if match_mode == MATCH_MODE_TOKEN:
+        # clean text: words separated by single spaces
+        alternation = f"(?:^| )(?:{alternation})(?= |$)"
+    
+    return clean_series.str.contains(alternation, regex=True, na=False).astype(bool)
+
+
+def evaluate_match_sets_vectorized(
+    text_series: pd.Series,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets, None]
+) -> pd.DataFrame:
+    """
+    Every match set for a whole text column at once, same results as
+    run_sets_of_match_tests() per row:
+    - the column is cleaned once (the matcher's clean function, one
+      translate() pass per cell; pandas str methods on object columns
+      loop per cell too, and the regex chain would be four passes)
+    - cells that are not str (None, NaN, numbers) are False in every set
+    - required terms: one mask from one compiled alternation
+    - optional terms: one mask per distinct term, summed to a count
+      (a term listed twice counts twice, as in the loop)
+    - set mask: required | (count >= n_terms)
+    
+    Args:
+        text_series: Text column
+        match_sets: Match sets, CompiledMatchSets, or None for the installed ones
+        
+    Returns:
+        pd.DataFrame: One boolean match_set_{set_id} column per set, same index
+    """
+    import pandas as pd
+    matcher, set_errors, match_set_list = resolve_match_sets(match_sets)
+    match_mode = getattr(matcher, "match_mode", MATCH_MODE_SUBSTRING)
+    
+    # cells that are not str (None, NaN, numbers) match nothing, in every engine;
+    # they are not cleaned (clean_string() would turn NaN into "nan")
+    is_text = text_series.map(lambda value: isinstance(value, str)).astype(bool)
+    clean_series = text_series.astype(object).where(is_text, None)
+    if matcher.clean_function:
+        clean_series = clean_series.map(matcher.clean_function, na_action='ignore')
+    
+    compiled_sets = {
+        set_id: (required_term_ids, optional_term_ids, n_terms)
+        for set_id, required_term_ids, optional_term_ids, n_terms in matcher.match_sets
+    }
+    
+    # optional term masks, shared by every set that lists the term
+    term_masks: Dict[int, pd.Series] = {}
+    
+    match_columns = {}
+    for set_id, set_description in match_set_list:
+        column_name = f'match_set_{set_id}'
+        if set_id in set_errors or set_id not in compiled_sets:
+            if set_id in set_errors:
+                logger.error(f"Error processing match set {set_id}: {set_errors[set_id]}")
+            match_columns[column_name] = pd.Series(False, index=text_series.index)
+            continue
+        
+        required_term_ids, optional_term_ids, n_terms = compiled_sets[set_id]
+        set_mask = any_term_mask(
+            clean_series, is_text, [matcher.terms[term_id] for term_id in required_term_ids], match_mode
+        )
+        
+        if optional_term_ids:
+            optional_count = pd.Series(0, index=text_series.index)
+            for term_id in optional_term_ids:
+                if term_id not in term_masks:
+                    term_masks[term_id] = any_term_mask(clean_series, is_text, [matcher.terms[term_id]], match_mode)
+                optional_count += term_masks[term_id]
+            # the loop only checks the count after a term is found
+            set_mask = set_mask | ((optional_count >= n_terms) & (optional_count > 0))
+        
+        match_columns[column_name] = set_mask
+        logger.debug(f"Match set {set_id} ({set_description}): {int(set_mask.sum())} rows")
+    
+    return pd.DataFrame(match_columns, index=text_series.index)
+
+
+def get_worker_install(
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets]
+) -> Tuple[Optional[Callable], Tuple[Any, ...], Union[List[Tuple[str, str]], CompiledMatchSets, None]]:
+    """
+    How match sets reach the workers: CompiledMatchSets are pickled once
+    per worker by the pool initializer and tasks use the installed copy
+    (match_sets None), a MATCH_SETS list goes with each task.
+    
+    Args:
+        match_sets: Match sets, or CompiledMatchSets
+        
+    Returns:
+        tuple: (install function or None, install args, match_sets for the tasks)
+    """
+    if isinstance(match_sets, CompiledMatchSets):
+        return install_compiled_match_sets, (match_sets,), None
+    return None, (), match_sets
+
+
+def write_quarantine_file(
+    quarantine_path: str,
+    texts: Any,
+    quarantined: List[Tuple[int, BaseException]],
+    index_labels: Any = None
+):
+    """
+    Writes the quarantined rows as CSV: row position, index label, error, text.
+    
+    Args:
+        quarantine_path: Output file
+        texts: Text column (a sequence) the row positions refer to
+        quarantined: (row position, error) tuples
+        index_labels: Row labels (a DataFrame index), None for the row positions
+    """
+    with open(quarantine_path, 'w', newline='', encoding='utf-8') as quarantine_file:
+        quarantine_writer = csv.writer(quarantine_file)
+        quarantine_writer.writerow(['row_position', 'index', 'error', 'text'])
+        for row_position, error in sorted(quarantined, key=lambda item: item[0]):
+            quarantine_writer.writerow([
+                row_position,
+                row_position if index_labels is None else index_labels[row_position],
+                f"{type(error).__name__}: {error}",
+                texts[row_position],
+            ])
+
+
+def run_match_batches(
+    texts: Any,
+    submit_batch: Callable,
+    result_function: Callable,
+    batch_rows: int,
+    n_workers: int,
+    start_method: Optional[str],
+    install: Tuple[Optional[Callable], Tuple[Any, ...]],
+    max_batch_retries: int = DEFAULT_MAX_BATCH_RETRIES,
+    quarantine_path: Optional[str] = None,
+    run_report: Optional[Dict[str, Any]] = None,
+    index_labels: Any = None
+) -> List[int]:
+    """
+    Runs a column's row ranges in bootstrapped workers with per-batch
+    failure isolation (batch_recovery_v1): a failing batch is retried,
+    then bisected down to the rows that fail on their own, which are
+    quarantined to a file; every other batch keeps running in parallel.
+    
+    Args:
+        texts: Text column, a sequence (row count, quarantine file contents)
+        submit_batch: submit_batch(executor, start, stop) -> Future
+        result_function: result_function(start, stop, result) for each batch that succeeds
+        batch_rows: Rows per batch
+        n_workers: Number of worker processes
+        start_method: "fork", "spawn", "forkserver" or None for the default
+        install: (install function or None, install args), from get_worker_install()
+        max_batch_retries: Re-runs of a failing batch before it is bisected
+        quarantine_path: Quarantine CSV, None for DEFAULT_QUARANTINE_PATH (only written if rows fail)
+        run_report: Optional dict, updated with the failure counts and the quarantine path
+        index_labels: Row labels for the quarantine file, None for the row positions
+        
+    Returns:
+        list: Row positions of the quarantined rows
+    """
+    install_function, install_args = install
+    startups = []
+    
+    def create_executor():
+        executor, startup = create_bootstrapped_executor(n_workers, install_function, install_args, start_method)
+        startups.append(startup)
+        return executor, n_workers
+    
+    quarantined: List[Tuple[int, BaseException]] = []
+    started_at = datetime.now(datetime_UTC)
+    recovery_report = run_range_batches(
+        create_executor,
+        submit_batch,
+        len(texts),
+        batch_rows,
+        result_function,
+        lambda row_position, error: quarantined.append((row_position, error)),
+        max_batch_retries,
+    )
+    logger.info(format_bootstrap_report(collect_bootstrap_reports(startups[-1], timeout=1.0)))
+    
+    recovery_report["quarantine_path"] = None
+    if quarantined:
+        quarantine_path = quarantine_path or DEFAULT_QUARANTINE_PATH.format(
+            timestamp=started_at.strftime('%Y%m%dT%H%M%SZ')
+        )
+        write_quarantine_file(quarantine_path, texts, quarantined, index_labels)
+        recovery_report["quarantine_path"] = quarantine_path
+        logger.warning(f"{len(quarantined)} rows quarantined to {quarantine_path}")
+    
+    logger.info(format_recovery_report(recovery_report))
+    if run_report is not None:
+        run_report.update(recovery_report)
+    
+    return [row_position for row_position, _ in quarantined]
+
+
+def shared_match_flags(
+    texts: Any,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets],
+    n_workers: int = 4,
+    start_method: Optional[str] = None,
+    batch_rows: int = DEFAULT_SHARED_BATCH_ROWS,
+    max_batch_retries: int = DEFAULT_MAX_BATCH_RETRIES,
+    quarantine_path: Optional[str] = None,
+    run_report: Optional[Dict[str, Any]] = None,
+    index_labels: Any = None
+) -> Tuple[List[str], Dict[str, bytearray]]:
+    """
+    The stdlib part of the shared engine: run_sets_of_match_tests() per text
+    in worker processes, texts in a memory-mapped file (shared_text_column_v1),
+    failures isolated per batch (run_match_batches()).
+    
+    Args:
+        texts: Text column, a sequence; cells that are not str are False
+        match_sets: Match sets, or CompiledMatchSets
+        n_workers: Number of worker processes
+        start_method: "fork", "spawn", "forkserver" or None for the default
+        batch_rows: Rows per task
+        max_batch_retries: Re-runs of a failing batch before it is bisected
+        quarantine_path: Quarantine CSV, None for DEFAULT_QUARANTINE_PATH
+        run_report: Optional dict, updated with the failure counts
+        index_labels: Row labels for the quarantine file, None for the row positions
+        
+    Returns:
+        tuple: (set ids, {set_id: bytearray of 0/1, one byte per text})
+    """
+    _, _, match_set_list = resolve_match_sets(match_sets)
+    set_ids = [set_id for set_id, _ in match_set_list]
+    
+    install_function, install_args, row_match_sets = get_worker_install(match_sets)
+    row_function = partial(run_sets_of_match_tests, row_match_sets)
+    flags = {set_id: bytearray(len(texts)) for set_id in set_ids}
+    
+    def store_flags(start: int, stop: int, result: Tuple[int, Tuple[bytes, ...]]):
+        _, batch_flags = result
+        for set_id, set_flags in zip(set_ids, batch_flags):
+            flags[set_id][start:stop] = set_flags
+    
+    with SharedTextColumn.create(texts) as column:
+        task_function = partial(flag_row_range, column.handle, row_function=row_function, result_names=tuple(set_ids))
+        run_match_batches(
+            texts,
+            lambda executor, start, stop: executor.submit(task_function, start, stop),
+            store_flags,
+            batch_rows,
+            n_workers,
+            start_method,
+            (install_function, install_args),
+            max_batch_retries,
+            quarantine_path,
+            run_report,
+            index_labels,
+        )
+    
+    return set_ids, flags
+
+
+def evaluate_match_sets_shared(
+    text_series: pd.Series,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets],
+    n_workers: int = 4,
+    start_method: Optional[str] = None,
+    batch_rows: int = DEFAULT_SHARED_BATCH_ROWS,
+    max_batch_retries: int = DEFAULT_MAX_BATCH_RETRIES,
+    quarantine_path: Optional[str] = None,
+    run_report: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """
+    run_sets_of_match_tests() per row in worker processes, without
+    pickling the rows (shared_text_column_v1):
+    - only the text column is written, once, to a memory-mapped file
+      (offsets + utf-8 bytes), and each task is a row range of it
+    - each worker returns one byte (0 / 1) per row and match set
+    - the flags are wrapped as numpy bool arrays without a copy
+    
+    Cells that are not str (None, NaN) are False, as in every engine,
+    and so are quarantined rows (run_match_batches()).
+    
+    Args:
+        text_series: Text column
+        match_sets: Match sets, or CompiledMatchSets
+        n_workers: Number of worker processes
+        start_method: "fork", "spawn", "forkserver" or None for the default
+        batch_rows: Rows per task
+        max_batch_retries: Re-runs of a failing batch before it is bisected
+        quarantine_path: Quarantine CSV, None for DEFAULT_QUARANTINE_PATH
+        run_report: Optional dict, updated with the failure counts
+        
+    Returns:
+        pd.DataFrame: One boolean match_set_{set_id} column per set, same index
+    """
+    import numpy as np
+    import pandas as pd
+    
+    set_ids, flags = shared_match_flags(
+        text_series.to_numpy(dtype=object),
+        match_sets,
+        n_workers,
+        start_method,
+        batch_rows,
+        max_batch_retries,
+        quarantine_path,
+        run_report,
+        index_labels=text_series.index,
+    )
+    
+    return pd.DataFrame(
+        {f'match_set_{set_id}': np.frombuffer(flags[set_id], dtype=bool) for set_id in set_ids},
+        index=text_series.index
+    )
+
+
 def add_pattern_match_columns(
     df: pd.DataFrame, 
     text_column: str, 
-    match_sets: List[Tuple[str, str]],
-    n_workers: int = 4
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets],
+    n_workers: int = 4,
+    start_method: Optional[str] = None,
+    engine: str = ENGINE_VECTORIZED,
+    max_batch_retries: int = DEFAULT_MAX_BATCH_RETRIES,
+    quarantine_path: Optional[str] = None,
+    run_report: Optional[Dict[str, Any]] = None
 ) -> pd.DataFrame:
     """
     Add pattern match result columns to a DataFrame in a parallel-safe manner.
     
+    engine "vectorized" (default): the whole column in this process,
+    cleaned once, one boolean mask per set, and all result columns
+    attached in one assignment (evaluate_match_sets_vectorized()).
+    
+    engine "shared": rows in worker processes, but only the text column
+    is shared with them (a memory-mapped file, not pickled per batch),
+    and only one byte per row and set comes back; the result columns
+    are joined onto df with one concat() (evaluate_match_sets_shared()).
+    
+    engine "rows": batches in worker processes, iterrows() per batch.
+    CompiledMatchSets (from a JSON / TOML config) are sent to each worker
+    once by the pool initializer (worker_bootstrap_v1), not with every batch,
+    so the same job runs under fork, spawn and forkserver.
+    
+    Cells that are not str (None, NaN, numbers) match no set, with every engine.
+    
+    Failures are isolated per batch in both worker engines (run_match_batches()):
+    a batch that raises, or whose worker dies, is retried, then bisected down
+    to the rows that fail on their own; those are quarantined to a CSV and
+    left unmatched (False, or NaN with "rows"), the rest of the job stays
+    parallel. If the vectorized engine raises, the frame is run again with
+    the shared engine; only a failure to start the workers falls back to
+    serial processing of the whole frame.
+    
     Args:
         df: Input DataFrame
         text_column: Column containing text to analyze
-        match_sets: Match sets to apply
-        n_workers: Number of parallel workers
+        match_sets: Match sets to apply, or CompiledMatchSets
+        n_workers: Number of parallel workers ("rows" and "shared" engines)
+        start_method: "fork", "spawn", "forkserver" or None for the default ("rows" and "shared" engines)
+        engine: "vectorized", "shared" or "rows"
+        max_batch_retries: Re-runs of a failing batch before it is bisected ("rows" and "shared" engines)
+        quarantine_path: Quarantine CSV, None for DEFAULT_QUARANTINE_PATH (only written if rows fail)
+        run_report: Optional dict, updated with the failure counts ("rows" and "shared" engines)
         
     Returns:
         pd.DataFrame: DataFrame with added match result columns
     """
+    import pandas as pd
     try:
         # Validate inputs
         if text_column not in df.columns:
             raise ValueError(f"Text column '{text_column}' not found in DataFrame")
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}")
+        
+        if engine == ENGINE_VECTORIZED:
+            match_columns = evaluate_match_sets_vectorized(df[text_column], match_sets)
+            # all result columns in one assignment
+            return df.assign(**match_columns)
+        
+        if engine == ENGINE_SHARED:
+            match_columns = evaluate_match_sets_shared(
+                df[text_column],
+                match_sets,
+                n_workers,
+                start_method,
+                max_batch_retries=max_batch_retries,
+                quarantine_path=quarantine_path,
+                run_report=run_report,
+            )
+            if match_columns.columns.isin(df.columns).any():
+                # re-run on a tagged frame: replace the old columns
+                return df.assign(**match_columns)
+            # one concat for all flag columns (not copied with copy-on-write, pandas 3)
+            return pd.concat([df, match_columns], axis=1)
             
-        # Split DataFrame into batches for parallel processing
-        df_splits = np.array_split(df, n_workers * 2)
+        if df.empty:
+            # no workers for no rows
+            return process_batch(df, text_column, match_sets)
+        
+        # Batches of rows for parallel processing (about 2 per worker)
+        batch_rows = max(1, -(-len(df) // (n_workers * 2)))
+        
+        install_function, install_args, batch_match_sets = get_worker_install(match_sets)
         
         # Create a partial function with fixed parameters
-        process_func = partial(process_batch, text_column=text_column, match_sets=match_sets)
+        process_func = partial(
+            process_batch, text_column=text_column, match_sets=batch_match_sets, raise_errors=True
+        )
         
-        # Process batches in parallel
-        with ProcessPoolExecutor(max_workers=n_workers) as executor:
-            results = list(executor.map(process_func, df_splits))
-            
-        # Combine results
-        result_df = pd.concat(results, ignore_index=False)
+        # Processed batches by start row, in parallel, failures isolated per batch
+        results: Dict[int, pd.DataFrame] = {}
+        
+        def store_batch(start: int, stop: int, batch_df: pd.DataFrame):
+            results[start] = batch_df
+        
+        quarantined_rows = run_match_batches(
+            df[text_column].to_numpy(dtype=object),
+            lambda executor, start, stop: executor.submit(process_func, df.iloc[start:stop]),
+            store_batch,
+            batch_rows,
+            n_workers,
+            start_method,
+            (install_function, install_args),
+            max_batch_retries,
+            quarantine_path,
+            run_report,
+            index_labels=df.index,
+        )
+        for row_position in quarantined_rows:
+            # kept as they were, without match results
+            results[row_position] = df.iloc[row_position:row_position + 1]
+        
+        # Combine results, in row order
+        result_df = pd.concat([results[start] for start in sorted(results)], ignore_index=False)
         
         # Ensure the result has the same index as the input
         return result_df
     
     except Exception as e:
         logger.error(f"Error in parallel processing: {str(e)}")
+        if engine == ENGINE_VECTORIZED and n_workers > 1 and text_column in df.columns:
+            # batches in workers, a failure only costs its batch
+            logger.info("Falling back to the shared engine")
+            return add_pattern_match_columns(
+                df, text_column, match_sets, n_workers, start_method, ENGINE_SHARED,
+                max_batch_retries, quarantine_path, run_report
+            )
         # Fallback to serial processing
         logger.info("Falling back to serial processing")
         return process_batch(df, text_column, match_sets)
 
 
+def tag_text_chunk(
+    text_series: pd.Series,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets, None]
+) -> pd.DataFrame:
+    """
+    Pool task of stream_pattern_match_csv(): the match columns of one chunk's
+    text column (vectorized engine), only those are pickled back.
+    
+    Args:
+        text_series: Text column of the chunk
+        match_sets: Match sets, or None for the CompiledMatchSets installed in this worker
+        
+    Returns:
+        pd.DataFrame: match_set_{set_id} columns, same index
+    """
+    # n_workers=1: a pool worker cannot start workers of its own for the fallback
+    return add_pattern_match_columns(
+        text_series.to_frame(), text_series.name, match_sets, n_workers=1, engine=ENGINE_VECTORIZED
+    ).drop(columns=[text_series.name])
+
+
+class ChunkOutputWriter:
+    """
+    Appends tagged chunks to a .csv or .parquet file, written under a temp
+    name and renamed into place by commit(), so an interrupted run does
+    not leave a truncated output behind.
+    
+    Args:
+        output_path: Output file
+        output_format: "csv" or "parquet"
+    """
+    
+    def __init__(self, output_path: str, output_format: str):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}")
+        
+        self.output_path = output_path
+        self.output_format = output_format
+        self.temp_path = f"{output_path}.tmp{os.getpid()}"
+        self._csv_file = None
+        self._parquet_writer = None
+        
+        if output_format == OUTPUT_FORMAT_PARQUET:
+            try:
+                import pyarrow  # optional, only for parquet output
+                import pyarrow.parquet
+            except ImportError as e:
+                raise ImportError("parquet output needs pyarrow (pip install pyarrow)") from e
+            self._pyarrow = pyarrow
+        else:
+            self._csv_file = open(self.temp_path, 'w', newline='', encoding='utf-8')
+    
+    def write(self, chunk_df: pd.DataFrame):
+        """Appends one chunk (its index written as the row number column)."""
+        if self.output_format == OUTPUT_FORMAT_CSV:
+            chunk_df.to_csv(
+                self._csv_file,
+                header=self._csv_file.tell() == 0,
+                index=True,
+                index_label=STREAM_ROW_NUMBER_COLUMN,
+            )
+            return
+        
+        table = self._pyarrow.Table.from_pandas(
+            chunk_df.rename_axis(STREAM_ROW_NUMBER_COLUMN).reset_index(), preserve_index=False
+        )
+        if self._parquet_writer is None:
+            # one row group per chunk, the schema of the first chunk
+            self._parquet_writer = self._pyarrow.parquet.ParquetWriter(self.temp_path, table.schema)
+        self._parquet_writer.write_table(table)
+    
+    def close(self):
+        """Closes the temp file (commit() or discard() it next)."""
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+    
+    def commit(self):
+        """Closes the temp file and renames it to output_path."""
+        self.close()
+        if not os.path.exists(self.temp_path):
+            # no chunk written (parquet): an empty output
+            open(self.temp_path, 'wb').close()
+        os.replace(self.temp_path, self.output_path)
+    
+    def discard(self):
+        """Closes and removes the temp file."""
+        self.close()
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+
+def stream_pattern_match_csv(
+    input_path: str,
+    output_path: str,
+    text_column: str,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets],
+    keep_columns: Tuple[str, ...] = (),
+    chunk_rows: int = DEFAULT_STREAM_CHUNK_ROWS,
+    n_workers: int = 4,
+    start_method: Optional[str] = None,
+    output_format: Optional[str] = None,
+    max_in_flight: Optional[int] = None,
+    encoding: str = 'utf-8'
+) -> Dict[str, Any]:
+    """
+    Tags a CSV of any size with match_set_{set_id} columns, chunk by chunk,
+    without loading it into one DataFrame.
+    
+    - read_csv(chunksize=chunk_rows, usecols=...): only the text column and
+      keep_columns are parsed, as str (no type inference, so values are
+      written back as they were read and every chunk has the same dtypes)
+    - each chunk's text column goes to a worker (tag_text_chunk(), the
+      vectorized engine of add_pattern_match_columns()), only the boolean
+      match columns come back, and the parent joins them onto its chunk
+    - up to max_in_flight chunks are in the workers while the parent reads
+      the next one (parallel_pipeline_v1), and chunks are written in input
+      order, so peak memory is ~max_in_flight x chunk_rows rows,
+      whatever the file size
+    - output: .csv (appended) or .parquet (one row group per chunk, pyarrow),
+      with the source row number as the first column
+    
+    With n_workers <= 1 chunks are tagged in this process.
+    
+    Args:
+        input_path: Input CSV
+        output_path: Output .csv or .parquet
+        text_column: Column containing text to analyze
+        match_sets: Match sets to apply, or CompiledMatchSets
+        keep_columns: Other input columns copied to the output (e.g. an id)
+        chunk_rows: Rows per chunk
+        n_workers: Number of worker processes
+        start_method: "fork", "spawn", "forkserver" or None for the default
+        output_format: "csv" or "parquet", None to use the output extension
+        max_in_flight: Chunks in the workers at a time, defaults to 2 per worker
+        encoding: Input encoding
+        
+    Returns:
+        dict: Run report (rows, chunks, seconds, rows matched per set, peak RSS)
+    """
+    import pandas as pd
+    if output_format is None:
+        output_format = (
+            OUTPUT_FORMAT_PARQUET if output_path.lower().endswith('.parquet') else OUTPUT_FORMAT_CSV
+        )
+    
+    use_columns = [text_column] + [column for column in keep_columns if column != text_column]
+    reader = pd.read_csv(
+        input_path,
+        usecols=use_columns,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=max(1, chunk_rows),
+        encoding=encoding,
+    )
+    
+    report: Dict[str, Any] = {
+        "rows": 0,
+        "chunks": 0,
+        "matched_rows": Counter(),
+    }
+    
+    def write_chunk(tagged_df: pd.DataFrame):
+        writer.write(tagged_df)
+        report["rows"] += len(tagged_df)
+        report["chunks"] += 1
+        for column in tagged_df.columns:
+            if column.startswith('match_set_'):
+                report["matched_rows"][column] += int(tagged_df[column].sum())
+    
+    start_time = time.perf_counter()
+    writer = ChunkOutputWriter(output_path, output_format)
+    try:
+        with reader:
+            if n_workers <= 1:
+                for chunk_df in reader:
+                    write_chunk(add_pattern_match_columns(
+                        chunk_df[use_columns], text_column, match_sets, engine=ENGINE_VECTORIZED
+                    ))
+            else:
+                install_function, install_args, chunk_match_sets = get_worker_install(match_sets)
+                
+                # chunks in the workers, joined with their match columns when those come back
+                pending_chunks: Dict[int, pd.DataFrame] = {}
+                
+                def iter_text_chunks():
+                    for sequence_number, chunk_df in enumerate(reader):
+                        pending_chunks[sequence_number] = chunk_df[use_columns]
+                        yield sequence_number, chunk_df[text_column]
+                
+                pool, startup = create_bootstrapped_pool(n_workers, install_function, install_args, start_method)
+                with pool:
+                    for sequence_number, match_columns in iter_pipelined_chunks(
+                        pool,
+                        partial(tag_text_chunk, match_sets=chunk_match_sets),
+                        iter_text_chunks(),
+                        max_in_flight if max_in_flight is not None else n_workers * 2,
+                        ordered=True,
+                    ):
+                        write_chunk(pd.concat(
+                            [pending_chunks.pop(sequence_number), match_columns], axis=1
+                        ))
+                    logger.info(format_bootstrap_report(collect_bootstrap_reports(startup, timeout=1.0)))
+        
+        writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+    
+    report["seconds"] = time.perf_counter() - start_time
+    # ru_maxrss: KB on Linux (this process, not the workers)
+    report["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    report["matched_rows"] = dict(report["matched_rows"])
+    return report
+
+
+def format_stream_report(report: Dict[str, Any]) -> str:
+    """
+    Args:
+        report: From stream_pattern_match_csv()
+        
+    Returns:
+        str: One line summary
+    """
+    seconds = report["seconds"]
+    rows_per_second = report["rows"] / seconds if seconds else 0.0
+    matched = ", ".join(f"{column} {count:,}" for column, count in report["matched_rows"].items())
+    return (
+        f"Stream: {report['rows']:,} rows in {report['chunks']} chunks, {seconds:.2f} s "
+        f"({rows_per_second:,.0f} rows/s), matched: {matched or 'none'}, "
+        f"parent peak RSS {report['peak_rss_mb']:,.0f} MB"
+    )
+
+
+def pandas_available() -> bool:
+    """
+    Returns:
+        bool: True if pandas is installed (checked without importing it)
+    """
+    return find_spec("pandas") is not None
+
+
+def match_flags_in_process(
+    texts: Any,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets, None]
+) -> Tuple[List[str], Dict[str, bytearray]]:
+    """
+    run_sets_of_match_tests() per text, in this process.
+    
+    Args:
+        texts: Text column, a sequence; cells that are not str are False
+        match_sets: Match sets, CompiledMatchSets, or None for the installed ones
+        
+    Returns:
+        tuple: (set ids, {set_id: bytearray of 0/1, one byte per text})
+    """
+    _, _, match_set_list = resolve_match_sets(match_sets)
+    set_ids = [set_id for set_id, _ in match_set_list]
+    flags = {set_id: bytearray(len(texts)) for set_id in set_ids}
+    
+    for position, text in enumerate(texts):
+        if not isinstance(text, str):
+            continue
+        set_results = run_sets_of_match_tests(match_sets, text)
+        for set_id in set_ids:
+            if set_results.get(set_id):
+                flags[set_id][position] = 1
+    
+    return set_ids, flags
+
+
+def flag_text_chunk(
+    texts: List[str],
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets, None]
+) -> Tuple[bytes, ...]:
+    """
+    Pool task of stream_pattern_match_csv_python(): one bytes object
+    of 0/1 per match set (in set order) for a chunk of texts.
+    """
+    set_ids, flags = match_flags_in_process(texts, match_sets)
+    return tuple(bytes(flags[set_id]) for set_id in set_ids)
+
+
+def add_pattern_match_fields(
+    records: List[Dict[str, Any]],
+    text_field: str,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets],
+    n_workers: int = 4,
+    start_method: Optional[str] = None,
+    max_batch_retries: int = DEFAULT_MAX_BATCH_RETRIES,
+    quarantine_path: Optional[str] = None,
+    run_report: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    add_pattern_match_columns() for a list of dicts (e.g. csv.DictReader rows),
+    stdlib only (engine "python"), neither pandas nor numpy is imported.
+    
+    Each record is copied with a match_set_{set_id} bool per set added,
+    the same results as the shared engine:
+    - n_workers <= 1, or fewer than PYTHON_ENGINE_PARALLEL_MIN_ROWS records:
+      in this process
+    - else: worker processes, texts in a memory-mapped file, failures
+      isolated per batch and quarantined (shared_match_flags())
+    
+    A record without the text field, or whose text is not a str, is False.
+    
+    Args:
+        records: Input records, not modified
+        text_field: Field containing text to analyze
+        match_sets: Match sets to apply, or CompiledMatchSets
+        n_workers: Number of worker processes
+        start_method: "fork", "spawn", "forkserver" or None for the default
+        max_batch_retries: Re-runs of a failing batch before it is bisected
+        quarantine_path: Quarantine CSV, None for DEFAULT_QUARANTINE_PATH (only written if rows fail)
+        run_report: Optional dict, updated with the failure counts (worker processes only)
+        
+    Returns:
+        list: New records with the match fields
+    """
+    if records and text_field not in records[0]:
+        raise ValueError(f"Text field '{text_field}' not found in records")
+    
+    texts = [record.get(text_field) for record in records]
+    try:
+        if n_workers > 1 and len(texts) >= PYTHON_ENGINE_PARALLEL_MIN_ROWS:
+            set_ids, flags = shared_match_flags(
+                texts,
+                match_sets,
+                n_workers,
+                start_method,
+                max_batch_retries=max_batch_retries,
+                quarantine_path=quarantine_path,
+                run_report=run_report,
+            )
+        else:
+            set_ids, flags = match_flags_in_process(texts, match_sets)
+    
+    except Exception as e:
+        logger.error(f"Error in parallel processing: {str(e)}")
+        logger.info("Falling back to serial processing")
+        set_ids, flags = match_flags_in_process(texts, match_sets)
+    
+    match_fields = [(f'match_set_{set_id}', flags[set_id]) for set_id in set_ids]
+    tagged_records = []
+    for position, record in enumerate(records):
+        tagged_record = dict(record)
+        for field_name, set_flags in match_fields:
+            tagged_record[field_name] = set_flags[position] == 1
+        tagged_records.append(tagged_record)
+    
+    return tagged_records
+
+
+def stream_pattern_match_csv_python(
+    input_path: str,
+    output_path: str,
+    text_column: str,
+    match_sets: Union[List[Tuple[str, str]], CompiledMatchSets],
+    keep_columns: Tuple[str, ...] = (),
+    chunk_rows: int = DEFAULT_STREAM_CHUNK_ROWS,
+    n_workers: int = 4,
+    start_method: Optional[str] = None,
+    max_in_flight: Optional[int] = None,
+    encoding: str = 'utf-8'
+) -> Dict[str, Any]:
+    """
+    stream_pattern_match_csv() with the csv module instead of pandas
+    (engine "python"): the same .csv output (row number, the text column,
+    keep_columns, match_set_{set_id} True / False) and report.
+    
+    Chunks of chunk_rows rows are read with csv.reader, their texts
+    matched in the workers (flag_text_chunk(), one byte per row and set
+    back), up to max_in_flight at a time, and written in input order.
+    Blank lines are skipped, short rows padded with '' (as read_csv does).
+    
+    Args:
+        input_path: Input CSV
+        output_path: Output .csv (anything else is a ValueError)
+        text_column: Column containing text to analyze
+        match_sets: Match sets to apply, or CompiledMatchSets
+        keep_columns: Other input columns copied to the output (e.g. an id)
+        chunk_rows: Rows per chunk
+        n_workers: Number of worker processes, <= 1 to match in this process
+        start_method: "fork", "spawn", "forkserver" or None for the default
+        max_in_flight: Chunks in the workers at a time, defaults to 2 per worker
+        encoding: Input encoding
+        
+    Returns:
+        dict: Run report (rows, chunks, seconds, rows matched per set, peak RSS)
+    """
+    if not output_path.lower().endswith('.csv'):
+        raise ValueError(
+            f"the python engine writes .csv only, not {output_path} "
+            "(parquet output needs pandas and pyarrow: stream_pattern_match_csv())"
+        )
+    
+    _, _, match_set_list = resolve_match_sets(match_sets)
+    match_columns = [f'match_set_{set_id}' for set_id, _ in match_set_list]
+    use_columns = [text_column] + [column for column in keep_columns if column != text_column]
+    chunk_rows = max(1, chunk_rows)
+    
+    report: Dict[str, Any] = {
+        "rows": 0,
+        "chunks": 0,
+        "matched_rows": Counter(),
+    }
+    
+    start_time = time.perf_counter()
+    temp_path = f"{output_path}.tmp{os.getpid()}"
+    try:
+        with open(input_path, 'r', newline='', encoding=encoding) as input_file, \
+                open(temp_path, 'w', newline='', encoding='utf-8') as output_file:
+            reader = csv.reader(input_file)
+            header = next(reader, [])
+            missing_columns = [column for column in use_columns if column not in header]
+            if missing_columns:
+                raise ValueError(f"Columns {missing_columns} not found in {input_path}")
+            column_positions = [header.index(column) for column in use_columns]
+            
+            writer = csv.writer(output_file)
+            writer.writerow([STREAM_ROW_NUMBER_COLUMN] + use_columns + match_columns)
+            
+            # chunks read but not written yet, by sequence number
+            pending_chunks: Dict[int, List[List[str]]] = {}
+            
+            def iter_text_chunks() -> Iterable[Tuple[int, List[str]]]:
+                chunk: List[List[str]] = []
+                sequence_number = 0
+                for row in reader:
+                    if not row:
+                        continue
+                    chunk.append([row[position] if position < len(row) else '' for position in column_positions])
+                    if len(chunk) == chunk_rows:
+                        pending_chunks[sequence_number] = chunk
+                        yield sequence_number, [values[0] for values in chunk]
+                        chunk = []
+                        sequence_number += 1
+                if chunk:
+                    pending_chunks[sequence_number] = chunk
+                    yield sequence_number, [values[0] for values in chunk]
+            
+            def write_chunk(sequence_number: int, chunk_flags: Tuple[bytes, ...]):
+                chunk = pending_chunks.pop(sequence_number)
+                row_number = report["rows"]
+                for position, values in enumerate(chunk):
+                    writer.writerow([row_number + position] + values + [set_flags[position] == 1 for set_flags in chunk_flags])
+                for column, set_flags in zip(match_columns, chunk_flags):
+                    report["matched_rows"][column] += set_flags.count(1)
+                report["rows"] += len(chunk)
+                report["chunks"] += 1
+            
+            if n_workers <= 1:
+                for sequence_number, texts in iter_text_chunks():
+                    write_chunk(sequence_number, flag_text_chunk(texts, match_sets))
+            else:
+                install_function, install_args, chunk_match_sets = get_worker_install(match_sets)
+                pool, startup = create_bootstrapped_pool(n_workers, install_function, install_args, start_method)
+                with pool:
+                    for sequence_number, chunk_flags in iter_pipelined_chunks(
+                        pool,
+                        partial(flag_text_chunk, match_sets=chunk_match_sets),
+                        iter_text_chunks(),
+                        max_in_flight if max_in_flight is not None else n_workers * 2,
+                        ordered=True,
+                    ):
+                        write_chunk(sequence_number, chunk_flags)
+                    logger.info(format_bootstrap_report(collect_bootstrap_reports(startup, timeout=1.0)))
+        
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    
+    report["seconds"] = time.perf_counter() - start_time
+    # ru_maxrss: KB on Linux (this process, not the workers)
+    report["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    report["matched_rows"] = dict(report["matched_rows"])
+    return report
+
+
+# Sample data for the examples
+EXAMPLE_RECORDS = [
+    {'id': 1, 'text': "My cat loves to play with yarn"},
+    {'id': 2, 'text': "I had eggs and toast for breakfast with orange juice"},
+    {'id': 3, 'text': "Animal rights advocates and pet owners agree on many issues"},
+    {'id': 4, 'text': "No matching content here"},
+]
+
+
+def example_python_usage(match_set_config: Optional[str] = None):
+    """
+    Example of the stdlib engine on a list of dicts (no pandas import).
+    
+    Args:
+        match_set_config: Optional .json / .toml match-set config path,
+                          used instead of the module MATCH_SETS
+    """
+    match_sets = compile_match_set_config(match_set_config) if match_set_config else MATCH_SETS
+    
+    tagged_records = add_pattern_match_fields(EXAMPLE_RECORDS, 'text', match_sets)
+    
+    print("Records with match fields:")
+    for record in tagged_records:
+        print(record)
+
+
 # Example usage for pandas integration
-def example_pandas_usage():
+def example_pandas_usage(
+    match_set_config: Optional[str] = None,
+    start_method: Optional[str] = None,
+    engine: str = ENGINE_VECTORIZED
+):
     """
     Example of how to use this module with pandas DataFrames.
+    
+    Args:
+        match_set_config: Optional .json / .toml match-set config path,
+                          used instead of the module MATCH_SETS
+        start_method: Worker start method, or None for the default
+        engine: "vectorized", "shared" or "rows"
     """
-    # Sample data
-    data = {
-        'id': [1, 2, 3, 4],
-        'text': [
-            "My cat loves to play with yarn",
-            "I had eggs and toast for breakfast with orange juice",
-            "Animal rights advocates and pet owners agree on many issues",
-            "No matching content here"
-        ]
-    }
+    import pandas as pd
     
     # Create DataFrame
-    df = pd.DataFrame(data)
+    df = pd.DataFrame(EXAMPLE_RECORDS)
+    
+    # Compiled once, here, from the config (if any)
+    match_sets = MATCH_SETS
+    if match_set_config:
+        match_sets = compile_match_set_config(match_set_config)
     
     # Add pattern match columns
     result_df = add_pattern_match_columns(
         df=df,
         text_column='text',
-        match_sets=MATCH_SETS,
-        n_workers=2
+        match_sets=match_sets,
+        n_workers=2,
+        start_method=start_method,
+        engine=engine
     )
     
     print("Original DataFrame:")
@@ -362,7 +1478,297 @@ def example_pandas_usage():
     print(result_df)
 
 
+#############
+# Benchmark
+#############
+
+BENCHMARK_WORDS = [
+    "my", "cat", "loves", "pets", "animal", "rights", "eggs", "toast", "oj", "for",
+    "breakfast", "the", "owners", "agree", "catalog", "legs", "toaster", "and", "no", "content",
+]
+
+
+def make_benchmark_frame(row_count: int, seed: int = 3) -> pd.DataFrame:
+    """Text column of 5 to 25 words (match-set terms, and words that contain them)."""
+    import pandas as pd
+    random_generator = random.Random(seed)
+    texts = [
+        ' '.join(random_generator.choices(BENCHMARK_WORDS, k=random_generator.randint(5, 25)))
+        for _ in range(row_count)
+    ]
+    return pd.DataFrame({'id': range(row_count), 'text': texts})
+
+
+def benchmark_engines(
+    row_count: int = 1_000_000,
+    match_set_config: Optional[str] = None,
+    n_workers: int = 4,
+    start_method: Optional[str] = None
+):
+    """
+    Times the vectorized engine against the iterrows() path (process_batch(),
+    serial, so both use one core) on the same frame, then the shared engine
+    (n_workers processes), and checks the results agree.
+    
+    Args:
+        row_count: Rows in the benchmark frame
+        match_set_config: Optional match-set config instead of MATCH_SETS
+        n_workers: Worker processes of the shared engine
+        start_method: Worker start method, or None for the default
+    """
+    match_sets = compile_match_set_config(match_set_config) if match_set_config else MATCH_SETS
+    df = make_benchmark_frame(row_count)
+    print(f"{row_count:,} rows, {len(resolve_match_sets(match_sets)[2])} match sets")
+    
+    start_time = time.perf_counter()
+    vectorized_df = add_pattern_match_columns(df, 'text', match_sets, engine=ENGINE_VECTORIZED)
+    vectorized_seconds = time.perf_counter() - start_time
+    print(f"  vectorized: {vectorized_seconds:8.2f} s  {row_count / vectorized_seconds:>12,.0f} rows/s")
+    
+    start_time = time.perf_counter()
+    rows_df = process_batch(df, 'text', match_sets)
+    rows_seconds = time.perf_counter() - start_time
+    print(f"  iterrows:   {rows_seconds:8.2f} s  {row_count / rows_seconds:>12,.0f} rows/s")
+    
+    print(f"  speedup: {rows_seconds / vectorized_seconds:.1f}x")
+    
+    start_time = time.perf_counter()
+    shared_df = add_pattern_match_columns(df, 'text', match_sets, n_workers, start_method, engine=ENGINE_SHARED)
+    shared_seconds = time.perf_counter() - start_time
+    print(f"  shared ({n_workers} workers): {shared_seconds:8.2f} s  {row_count / shared_seconds:>12,.0f} rows/s")
+    
+    match_columns = [column for column in vectorized_df.columns if column.startswith('match_set_')]
+    for column in match_columns:
+        if not (rows_df[column].astype(bool) == vectorized_df[column]).all():
+            print(f"Warning: results differ in {column}")
+        if not (shared_df[column] == vectorized_df[column]).all():
+            print(f"Warning: shared engine results differ in {column}")
+
+
+# appended to the check frame: missing, empty, not str, case and punctuation
+EQUIVALENCE_CHECK_TEXTS = [
+    None, float('nan'), "", "   ", 123,
+    "My CAT!!", "toast&OJ... EGGS", "animal-rights: pets, cat", "catalog legs toaster",
+    "banana phone",
+]
+
+# also checked, next to the match sets under test: terms found in the cleaned
+# str() of the cells that are not str ("nan", "None"), which match no set in
+# every engine ("123" has no such term: cleaning drops digits)
+EQUIVALENCE_CHECK_CONFIG = {
+    "n_terms": 1,
+    "match_sets": [
+        {"id": "not_str_an", "description": "Finds nan", "required": ["an"]},
+        {"id": "not_str_one", "description": "Finds None", "optional": ["one", "phone"]},
+    ],
+}
+
+
+def check_engine_equivalence(
+    row_count: int = 20_000,
+    match_set_config: Optional[str] = None,
+    n_workers: int = 2,
+    start_method: Optional[str] = None
+) -> bool:
+    """
+    Runs the shared, rows and python engines on the same frame as the
+    vectorized engine (make_benchmark_frame() rows plus EQUIVALENCE_CHECK_TEXTS)
+    and prints whether their match columns agree, for the match sets and for
+    EQUIVALENCE_CHECK_CONFIG; then checks every pandas engine keeps the match
+    columns on an empty frame.
+    
+    Args:
+        row_count: Benchmark rows in the check frame (the python engine uses
+                   its workers from PYTHON_ENGINE_PARALLEL_MIN_ROWS rows)
+        match_set_config: Optional match-set config instead of MATCH_SETS
+        n_workers: Worker processes of the shared, rows and python engines
+        start_method: Worker start method, or None for the default
+        
+    Returns:
+        bool: True if all engines agree
+    """
+    import pandas as pd
+    match_sets = compile_match_set_config(match_set_config) if match_set_config else MATCH_SETS
+    edge_df = pd.DataFrame({
+        'id': range(row_count, row_count + len(EQUIVALENCE_CHECK_TEXTS)),
+        'text': pd.Series(EQUIVALENCE_CHECK_TEXTS, dtype=object),
+    })
+    df = pd.concat([make_benchmark_frame(row_count), edge_df], ignore_index=True)
+    
+    def run_python_engine(frame: pd.DataFrame, engine_match_sets) -> pd.DataFrame:
+        tagged_records = add_pattern_match_fields(
+            frame.to_dict('records'), 'text', engine_match_sets, n_workers, start_method
+        )
+        return pd.DataFrame(tagged_records, index=frame.index)
+    
+    def run_pandas_engine(frame: pd.DataFrame, engine_match_sets, engine: str) -> pd.DataFrame:
+        return add_pattern_match_columns(frame, 'text', engine_match_sets, n_workers, start_method, engine=engine)
+    
+    engine_functions = [
+        (ENGINE_SHARED, partial(run_pandas_engine, engine=ENGINE_SHARED)),
+        (ENGINE_ROWS, partial(run_pandas_engine, engine=ENGINE_ROWS)),
+        (ENGINE_PYTHON, run_python_engine),
+    ]
+    
+    all_agree = True
+    check_match_sets = [
+        ("match sets", match_sets),
+        ("check sets", compile_match_set_config(EQUIVALENCE_CHECK_CONFIG)),
+    ]
+    for label, checked_match_sets in check_match_sets:
+        reference_df = add_pattern_match_columns(df, 'text', checked_match_sets, engine=ENGINE_VECTORIZED)
+        match_columns = [column for column in reference_df.columns if column.startswith('match_set_')]
+        print(f"{label}: {len(df):,} rows ({len(EQUIVALENCE_CHECK_TEXTS)} edge cases), "
+              f"{len(match_columns)} match sets, against the {ENGINE_VECTORIZED} engine")
+        
+        for engine, engine_function in engine_functions:
+            engine_df = engine_function(df, checked_match_sets)
+            differing_columns = [
+                column for column in match_columns
+                if column not in engine_df.columns
+                or not (engine_df[column].astype(bool) == reference_df[column]).all()
+            ]
+            all_agree = all_agree and not differing_columns
+            print(f"  {engine:<10} {'agrees' if not differing_columns else 'differs in ' + ', '.join(differing_columns)}")
+    
+    # (the python engine has no records to add fields to)
+    empty_df = df.iloc[0:0]
+    match_columns = [f'match_set_{set_id}' for set_id, _ in resolve_match_sets(match_sets)[2]]
+    for engine in ENGINES:
+        engine_df = run_pandas_engine(empty_df, match_sets, engine=engine)
+        missing_columns = [column for column in match_columns if column not in engine_df.columns]
+        all_agree = all_agree and not missing_columns
+        print(f"  {engine:<10} empty frame: "
+              f"{'match columns kept' if not missing_columns else 'missing ' + ', '.join(missing_columns)}")
+    
+    return all_agree
+
+
+# timed in a fresh interpreter each, see benchmark_import_time()
+IMPORT_BENCHMARK_STATEMENTS = [
+    ("interpreter only", "pass"),
+    ("this module", "import {module}"),
+    ("numpy", "import numpy"),
+    ("pandas", "import pandas"),
+    ("this module + pandas path", "import {module}; {module}.make_benchmark_frame(1)"),
+]
+
+
+def benchmark_import_time(repeats: int = 5):
+    """
+    Prints the startup cost of this module, and of the deferred pandas /
+    numpy imports, each timed in a new interpreter (best of repeats),
+    plus the wall time of a whole short CLI run (the stdlib example).
+    
+    Args:
+        repeats: Runs per statement
+    """
+    module_directory = os.path.dirname(os.path.abspath(__file__))
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    
+    def best_seconds(command: List[str], timed_in_child: bool) -> float:
+        best = None
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            completed = subprocess.run(command, cwd=module_directory, capture_output=True, text=True, check=True)
+            seconds = float(completed.stdout.split()[-1]) if timed_in_child else time.perf_counter() - start_time
+            best = seconds if best is None else min(best, seconds)
+        return best
+    
+    print(f"best of {repeats}, new interpreter each")
+    for label, statement in IMPORT_BENCHMARK_STATEMENTS:
+        if ("numpy" in label and find_spec("numpy") is None) or ("pandas" in label and not pandas_available()):
+            print(f"  {label:<28} not installed")
+            continue
+        timed_code = (
+            "import time; start_time = time.perf_counter(); "
+            f"{statement.format(module=module)}; "
+            "print(time.perf_counter() - start_time)"
+        )
+        seconds = best_seconds([sys.executable, "-c", timed_code], timed_in_child=True)
+        print(f"  {label:<28} {seconds * 1000:8.1f} ms")
+    
+    # the module must not pull pandas / numpy in by itself
+    lazy_check = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(sorted({{'pandas', 'numpy'}} & set(sys.modules)))"],
+        cwd=module_directory, capture_output=True, text=True, check=True,
+    )
+    print(f"  loaded by 'import {module}': {lazy_check.stdout.strip()}")
+    
+    cli_seconds = best_seconds(
+        [sys.executable, os.path.basename(__file__), "--engine", ENGINE_PYTHON], timed_in_child=False
+    )
+    print(f"  CLI run, --engine {ENGINE_PYTHON:<14} {cli_seconds * 1000:8.1f} ms (wall, process start to exit)")
+
+
 if __name__ == "__main__":
     # Your test code here
-    import numpy as np  # For DataFrame splitting
-    example_pandas_usage()
+    parser = argparse.ArgumentParser(description='Pattern match columns example')
+    parser.add_argument('--config', '-m', help='Match-set config (.json or .toml)', required=False)
+    parser.add_argument('--start-method', choices=['fork', 'spawn', 'forkserver'], default=None,
+                        help='Worker start method (default: platform default)')
+    parser.add_argument('--engine', choices=ENGINES + (ENGINE_PYTHON,), default=None,
+                        help='Whole-column masks, rows in workers with a shared text column, '
+                             'iterrows() per batch in workers, or stdlib only (no pandas) '
+                             '(default: vectorized, python if pandas is not installed)')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Time the vectorized and shared engines against the iterrows() path')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Benchmark rows')
+    parser.add_argument('--check', action='store_true',
+                        help='Check the shared, rows and python engines agree with the vectorized one')
+    parser.add_argument('--import-benchmark', action='store_true',
+                        help='Time the startup imports (module, numpy, pandas) and a short CLI run')
+    parser.add_argument('--input', '-i', help='Stream this CSV to --output instead of the example')
+    parser.add_argument('--output', '-o', help='Tagged output (.csv, or .parquet with pyarrow)')
+    parser.add_argument('--text-column', '-t', default='text', help='Column to match (streaming)')
+    parser.add_argument('--keep-column', '-k', action='append', default=[],
+                        help='Input column copied to the output (repeatable, streaming)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_STREAM_CHUNK_ROWS,
+                        help='Rows per chunk (streaming)')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes (streaming)')
+    args = parser.parse_args()
+    
+    engine = args.engine or (ENGINE_VECTORIZED if pandas_available() else ENGINE_PYTHON)
+    uses_pandas = args.benchmark or args.check or engine != ENGINE_PYTHON
+    if uses_pandas and not args.import_benchmark and not pandas_available():
+        if args.benchmark or args.check:
+            parser.error(f"--{'benchmark' if args.benchmark else 'check'} needs pandas (pip install pandas)")
+        parser.error(f"--engine {engine} needs pandas (pip install pandas), or use --engine {ENGINE_PYTHON}")
+    if args.input and args.output and engine == ENGINE_PYTHON and not args.output.lower().endswith('.csv'):
+        parser.error(
+            f"--engine {ENGINE_PYTHON} writes .csv only"
+            + ("" if pandas_available() else " (pandas is not installed)")
+            + "; .parquet output needs pandas and pyarrow"
+        )
+    
+    if args.import_benchmark:
+        benchmark_import_time()
+    elif args.input:
+        if not args.output:
+            parser.error('--input needs --output')
+        stream_match_sets = compile_match_set_config(args.config) if args.config else MATCH_SETS
+        stream_function = stream_pattern_match_csv_python if engine == ENGINE_PYTHON else stream_pattern_match_csv
+        try:
+            stream_report = stream_function(
+                args.input,
+                args.output,
+                args.text_column,
+                stream_match_sets,
+                keep_columns=tuple(args.keep_column),
+                chunk_rows=args.chunk_rows,
+                n_workers=args.workers,
+                start_method=args.start_method,
+            )
+        except ImportError as e:
+            # e.g. .parquet output without pyarrow
+            parser.exit(1, f"Error: {e}\n")
+        print(format_stream_report(stream_report))
+    elif args.benchmark:
+        benchmark_engines(args.rows, args.config, start_method=args.start_method)
+    elif args.check:
+        if not check_engine_equivalence(match_set_config=args.config, start_method=args.start_method):
+            parser.exit(1, "Error: engine results differ\n")
+    elif engine == ENGINE_PYTHON:
+        example_python_usage(args.config)
+    else:
+        example_pandas_usage(args.config, args.start_method, engine)
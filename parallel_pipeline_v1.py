@@ -0,0 +1,268 @@
+# vanilla python tool: pipelined chunk scheduler for multiprocessing.Pool
+# keeps a bounded number of chunks in flight, results by chunk sequence number
+
+import queue
+import functools
+import multiprocessing
+from itertools import islice
+
+"""
+- parallel
+- vanilla python, not pandas
+
+Replaces the blocking loop:
+
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        chunk_results = pool.map(function, chunk)   # all workers wait here
+
+where every worker sits idle while the parent reads the next chunk,
+and every chunk waits for its slowest row.
+
+Here up to max_in_flight chunks are submitted with apply_async:
+the parent reads the next chunk while the workers process the others,
+and a new chunk is only submitted when a result has been taken (backpressure),
+so memory stays bounded by max_in_flight chunks no matter the file size.
+(Pool.imap_unordered() would read the whole input iterable ahead, unbounded.)
+
+Each chunk carries a sequence number:
+- ordered=False: results in completion order (for sums / counts)
+- ordered=True:  results reassembled in chunk order (for row order outputs);
+                 chunks that finish early wait in a buffer that counts
+                 towards max_in_flight, so this is bounded too
+
+Partial aggregation (pipelined_group_counts):
+for {group_name: count} row results (count_pattern_matches_in_text),
+each worker folds its whole chunk into one list of counts indexed by group,
+so one short list per chunk is pickled back instead of one dict per row,
+and the parent only adds up those lists: memory O(groups), not O(rows).
+
+Use:
+    with Pool(processes=n) as pool:
+        for chunk_results in iter_pipelined_map(pool, row_function, reader, ordered=True):
+            results.extend(chunk_results)
+
+        group_counts, none_count = pipelined_group_counts(pool, row_function, reader, group_names)
+"""
+
+# chunks in flight per worker process (one being processed, one queued)
+IN_FLIGHT_CHUNKS_PER_PROCESS = 2
+
+
+def iter_sequenced_chunks(iterable, chunk_size):
+    """
+    Cuts an iterable into lists of chunk_size items, numbered from 0.
+
+    Args:
+        iterable: Rows / lines / items
+        chunk_size (int): Items per chunk
+
+    Yields:
+        tuple: (sequence_number, chunk list)
+    """
+    iterator = iter(iterable)
+    sequence_number = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield sequence_number, chunk
+        sequence_number += 1
+
+
+def map_chunk(chunk, row_function):
+    """
+    Pool task: applies row_function to every item of a chunk.
+    None results are dropped in the worker, so they are never pickled back.
+
+    Args:
+        chunk (list): Items to process
+        row_function (callable): Module level (picklable) function for one item
+
+    Returns:
+        list: Results that are not None, in chunk order
+    """
+    return [result for result in map(row_function, chunk) if result is not None]
+
+
+def iter_pipelined_chunks(pool, chunk_function, sequenced_chunks, max_in_flight=None, ordered=False):
+    """
+    Runs chunk_function on each chunk in the pool, with at most
+    max_in_flight chunks submitted or waiting for reassembly at a time.
+
+    Args:
+        pool (multiprocessing.Pool): Open pool
+        chunk_function (callable): Picklable function(chunk) -> chunk result
+        sequenced_chunks (iterable): (sequence_number, chunk) tuples, numbered from 0
+        max_in_flight (int): Chunk limit, defaults to IN_FLIGHT_CHUNKS_PER_PROCESS per cpu
+        ordered (bool): Yield in sequence order instead of completion order
+
+    Yields:
+        tuple: (sequence_number, chunk result)
+    """
+    if max_in_flight is None:
+        max_in_flight = multiprocessing.cpu_count() * IN_FLIGHT_CHUNKS_PER_PROCESS
+    max_in_flight = max(1, max_in_flight)
+
+    # filled by the pool's result thread: (sequence_number, result, error)
+    completed_chunks = queue.Queue()
+    chunk_iterator = iter(sequenced_chunks)
+    chunks_exhausted = False
+    in_flight_count = 0
+
+    # ordered mode: finished chunks waiting for an earlier one
+    waiting_results = {}
+    next_sequence_number = 0
+
+    def put_result(result, sequence_number):
+        completed_chunks.put((sequence_number, result, None))
+
+    def put_error(error, sequence_number):
+        completed_chunks.put((sequence_number, None, error))
+
+    while True:
+        # fill the window (buffered results count towards it)
+        while not chunks_exhausted and in_flight_count + len(waiting_results) < max_in_flight:
+            next_chunk = next(chunk_iterator, None)
+            if next_chunk is None:
+                chunks_exhausted = True
+                break
+
+            sequence_number, chunk = next_chunk
+            pool.apply_async(
+                chunk_function,
+                (chunk,),
+                callback=functools.partial(put_result, sequence_number=sequence_number),
+                error_callback=functools.partial(put_error, sequence_number=sequence_number),
+            )
+            in_flight_count += 1
+
+        if in_flight_count == 0:
+            break
+
+        sequence_number, result, error = completed_chunks.get()
+        in_flight_count -= 1
+
+        if error is not None:
+            raise error
+
+        if not ordered:
+            yield sequence_number, result
+            continue
+
+        waiting_results[sequence_number] = result
+        while next_sequence_number in waiting_results:
+            yield next_sequence_number, waiting_results.pop(next_sequence_number)
+            next_sequence_number += 1
+
+
+def iter_pipelined_map(pool, row_function, iterable, chunk_size=1000, max_in_flight=None, ordered=False):
+    """
+    Pipelined replacement for a pool.map() per chunk loop.
+
+    Args:
+        pool (multiprocessing.Pool): Open pool
+        row_function (callable): Module level (picklable) function for one item
+        iterable: Rows / lines / items, read lazily by the parent
+        chunk_size (int): Items per chunk
+        max_in_flight (int): Chunk limit, defaults to IN_FLIGHT_CHUNKS_PER_PROCESS per cpu
+        ordered (bool): Yield chunks in input order instead of completion order
+
+    Yields:
+        list: Results of one chunk (None results dropped)
+    """
+    chunk_function = functools.partial(map_chunk, row_function=row_function)
+
+    for _, chunk_results in iter_pipelined_chunks(
+        pool,
+        chunk_function,
+        iter_sequenced_chunks(iterable, chunk_size),
+        max_in_flight,
+        ordered,
+    ):
+        yield chunk_results
+
+
+def count_chunk_groups(chunk, row_function, group_names, stats_function=None):
+    """
+    Pool task: folds the {group_name: count} results of a chunk
+    into one partial count per group.
+
+    Args:
+        chunk (list): Items to process
+        row_function (callable): Module level (picklable) function for one item,
+                                 returning a {group_name: count} dict or None
+        group_names (tuple): Group names, the order of the partial counts
+        stats_function (callable): Module level function called in the worker
+                                   after the chunk, its result is sent back too
+
+    Returns:
+        tuple: (list of counts indexed like group_names, number of None results),
+               plus the stats_function() result if given
+    """
+    group_positions = {group_name: position for position, group_name in enumerate(group_names)}
+    partial_counts = [0] * len(group_names)
+    none_count = 0
+
+    for item in chunk:
+        row_result = row_function(item)
+        if row_result is None:
+            none_count += 1
+            continue
+
+        for group_name, count in row_result.items():
+            if count:
+                partial_counts[group_positions[group_name]] += count
+
+    if stats_function is not None:
+        return partial_counts, none_count, stats_function()
+    return partial_counts, none_count
+
+
+def pipelined_group_counts(pool, row_function, iterable, group_names, chunk_size=1000, max_in_flight=None,
+                           stats_function=None, merge_stats_function=None):
+    """
+    Pipelined group counting with worker-side partial aggregation.
+
+    Optional per-chunk worker stats: stats_function() runs in the worker
+    after each chunk, merge_stats_function(stats) in the parent for each result.
+
+    Args:
+        pool (multiprocessing.Pool): Open pool
+        row_function (callable): Module level (picklable) function for one item,
+                                 returning a {group_name: count} dict or None
+        iterable: Rows / lines / items, read lazily by the parent
+        group_names (list): Group names to count
+        chunk_size (int): Items per chunk
+        max_in_flight (int): Chunk limit, defaults to IN_FLIGHT_CHUNKS_PER_PROCESS per cpu
+        stats_function (callable): Module level (picklable) worker stats function, or None
+        merge_stats_function (callable): Parent function taking each chunk's stats
+
+    Returns:
+        tuple: ({group_name: total count}, number of None results)
+    """
+    group_names = tuple(group_names)
+    chunk_function = functools.partial(
+        count_chunk_groups,
+        row_function=row_function,
+        group_names=group_names,
+        stats_function=stats_function,
+    )
+
+    total_counts = [0] * len(group_names)
+    total_none_count = 0
+
+    for _, chunk_result in iter_pipelined_chunks(
+        pool,
+        chunk_function,
+        iter_sequenced_chunks(iterable, chunk_size),
+        max_in_flight,
+    ):
+        partial_counts, none_count = chunk_result[:2]
+        for position, count in enumerate(partial_counts):
+            total_counts[position] += count
+        total_none_count += none_count
+        if stats_function is not None and merge_stats_function is not None:
+            merge_stats_function(chunk_result[2])
+
+    return dict(zip(group_names, total_counts)), total_none_count
@@ -0,0 +1,478 @@
+# vanilla python .csv tool: persistent row offset index
+# build-once sidecar file of row / csv record start byte offsets, memory-mapped
+
+import os
+import mmap
+import struct
+from array import array
+from csv_record_parser_v1 import csv_line_ends_in_quotes
+
+"""
+- vanilla python
+- not parallel
+- build once, reuse: index is a sidecar file next to the input file
+  e.g. nightly_export.csv -> nightly_export.csv.rowidx
+
+Index file layout (native byte order, machine-local):
+    header: magic (8 bytes), source size, source mtime_ns, row count
+    body:   one unsigned 64-bit start offset per row
+
+The header records the size and mtime of the source file,
+so a stale index (source rewritten/appended) is detected
+and rebuilt instead of returning the wrong row.
+
+Two kinds of index:
+1. physical lines (.rowidx): rows are split on b'\\n' only
+   (a lone '\\r' is not a row break)
+2. logical csv records (.recidx): a newline inside a quoted field
+   does not end the record, and blank lines are skipped
+   (same as csv_column_to_temp_file)
+
+Use:
+    row_string = read_indexed_row("nightly_export.csv", 40000000)
+    record_string = read_indexed_csv_record("nightly_export.csv", 40000000)
+"""
+
+ROW_INDEX_SUFFIX = ".rowidx"
+ROW_INDEX_MAGIC = b"ROWIDX01"
+
+CSV_RECORD_INDEX_SUFFIX = ".recidx"
+# 02: field-start quote rule (RECIDX01 indexes used quote parity, they are rebuilt)
+CSV_RECORD_INDEX_MAGIC = b"RECIDX02"
+
+# bytes that do not make a line non-blank (same set as bytes.strip())
+BLANK_LINE_BYTES = frozenset(b" \t\n\r\x0b\x0c")
+
+# magic, source size, source mtime_ns, row count
+ROW_INDEX_HEADER = struct.Struct("=8sQQQ")
+
+# bytes read per block while building an index
+INDEX_BUILD_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def default_index_path(file_path, suffix=ROW_INDEX_SUFFIX):
+    """
+    Returns the sidecar index path for an input file.
+
+    Args:
+        file_path (str): Path to the source file
+        suffix (str): Sidecar file suffix
+
+    Returns:
+        str: Path of the index file
+    """
+    return f"{file_path}{suffix}"
+
+
+def scan_line_offsets(file_obj, offsets):
+    """
+    Appends the start offset of every physical line to offsets.
+
+    Args:
+        file_obj: Source file opened in binary mode, positioned at 0
+        offsets (array): array('Q') to append row start offsets to
+
+    Returns:
+        int: Total number of bytes scanned
+    """
+    position = 0
+    while True:
+        block = file_obj.read(INDEX_BUILD_BLOCK_SIZE)
+        if not block:
+            break
+
+        if position == 0:
+            offsets.append(0)
+
+        newline_position = block.find(b'\n')
+        while newline_position != -1:
+            offsets.append(position + newline_position + 1)
+            newline_position = block.find(b'\n', newline_position + 1)
+
+        position += len(block)
+
+    # a trailing newline does not start another row
+    if offsets and offsets[-1] == position:
+        offsets.pop()
+
+    return position
+
+
+def scan_csv_record_offsets(file_obj, offsets):
+    """
+    Appends the start offset of every logical csv record to offsets.
+
+    Quote-state aware, with the manual parser's own rule
+    (csv_record_parser_v1.csv_line_ends_in_quotes(): a quote only opens
+    a field at a field start, "" is an escaped quote), so a stray quote
+    such as 5" screen does not merge the rows after it; a newline only
+    ends a record when outside a quoted field.
+    Lines without a quote do not change the quote state and are not parsed.
+
+    Blank (whitespace only) lines between records are skipped,
+    so record numbers match the rows of csv_column_to_temp_file().
+
+    Args:
+        file_obj: Source file opened in binary mode, positioned at 0
+        offsets (array): array('Q') to append record start offsets to
+
+    Returns:
+        int: Total number of bytes scanned
+    """
+    position = 0
+    in_quotes = False
+    record_start = 0
+    record_has_content = False
+
+    for line in file_obj:
+        position += len(line)
+
+        # only strip when the line starts with whitespace
+        if not record_has_content and (line[0] not in BLANK_LINE_BYTES or line.strip()):
+            record_has_content = True
+
+        if b'"' in line:
+            line_end = len(line) - 1 if line.endswith(b'\n') else len(line)
+            in_quotes = csv_line_ends_in_quotes(line, in_quotes, 0, line_end)
+
+        if not in_quotes:
+            if record_has_content:
+                offsets.append(record_start)
+            record_start = position
+            record_has_content = False
+
+    # last record without a line end (or in an unterminated quoted field)
+    if record_has_content:
+        offsets.append(record_start)
+
+    return position
+
+
+def build_row_offset_index(
+    file_path,
+    index_path=None,
+    magic=ROW_INDEX_MAGIC,
+    scan_function=scan_line_offsets,
+):
+    """
+    Scans the source file once and writes the sidecar offset index.
+
+    The index is written to a temporary file and moved into place,
+    so a reader never sees a half-written index.
+
+    Args:
+        file_path (str): Path to the source file
+        index_path (str): Path for the index file, defaults to <file_path>.rowidx
+        magic (bytes): 8 byte marker for the kind of index
+        scan_function (callable): Function(file_obj, offsets) that fills offsets
+
+    Returns:
+        str: Path to the index file, or None on failure
+    """
+    if index_path is None:
+        index_path = default_index_path(file_path)
+
+    temp_index_path = f"{index_path}.tmp{os.getpid()}"
+
+    try:
+        # stat before scanning: if the file changes during the scan
+        # the recorded size/mtime will not match and it gets rebuilt
+        source_stat = os.stat(file_path)
+
+        offsets = array('Q')
+        with open(file_path, 'rb') as source_file:
+            scan_function(source_file, offsets)
+
+        with open(temp_index_path, 'wb') as index_file:
+            index_file.write(ROW_INDEX_HEADER.pack(
+                magic,
+                source_stat.st_size,
+                source_stat.st_mtime_ns,
+                len(offsets),
+            ))
+            offsets.tofile(index_file)
+
+        os.replace(temp_index_path, index_path)
+        return index_path
+
+    except Exception as e:
+        print(f"Error building row offset index for {file_path}: {str(e)}")
+        if os.path.exists(temp_index_path):
+            os.remove(temp_index_path)
+        return None
+
+
+class RowOffsetIndex:
+    """
+    Read-only, memory-mapped view of a row offset index file.
+
+    Offsets are read straight from the mapping, nothing is loaded
+    into Python objects, so opening a 40M row index is instant.
+
+    Use:
+        with RowOffsetIndex("data.csv.rowidx") as row_index:
+            start, end = row_index.row_span(12)
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self._file = open(index_path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        try:
+            (
+                self.magic,
+                self.source_size,
+                self.source_mtime_ns,
+                self.row_count,
+            ) = ROW_INDEX_HEADER.unpack_from(self._mmap, 0)
+
+            body_size = len(self._mmap) - ROW_INDEX_HEADER.size
+            if body_size != self.row_count * 8:
+                raise ValueError(f"corrupt index {index_path}: expected {self.row_count} offsets")
+
+            self._offsets = memoryview(self._mmap)[ROW_INDEX_HEADER.size:].cast('Q')
+
+        except Exception:
+            self._mmap.close()
+            self._file.close()
+            raise
+
+    def __len__(self):
+        return self.row_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Releases the mapping and the index file handle.
+        """
+        if self._offsets is not None:
+            self._offsets.release()
+            self._offsets = None
+            self._mmap.close()
+            self._file.close()
+
+    def is_fresh_for(self, file_path):
+        """
+        Checks the recorded source size and mtime against the file on disk.
+
+        Args:
+            file_path (str): Path to the source file
+
+        Returns:
+            bool: True if the index still describes the file
+        """
+        try:
+            source_stat = os.stat(file_path)
+        except OSError:
+            return False
+        return (
+            source_stat.st_size == self.source_size
+            and source_stat.st_mtime_ns == self.source_mtime_ns
+        )
+
+    def row_offset(self, row_number):
+        """
+        Returns the byte offset where a row starts (0 indexed).
+        """
+        return self._offsets[row_number]
+
+    def row_span(self, row_number):
+        """
+        Returns (start, end) byte offsets of a row, end exclusive.
+
+        Args:
+            row_number (int): 0 indexed row number
+
+        Returns:
+            tuple: (start_offset, end_offset)
+        """
+        start = self._offsets[row_number]
+        if row_number + 1 < self.row_count:
+            end = self._offsets[row_number + 1]
+        else:
+            end = self.source_size
+        return start, end
+
+
+def open_row_offset_index(
+    file_path,
+    index_path=None,
+    magic=ROW_INDEX_MAGIC,
+    scan_function=scan_line_offsets,
+    rebuild_if_stale=True,
+):
+    """
+    Opens the sidecar index for a file, building or rebuilding it
+    when it is missing, of the wrong kind, or stale (size/mtime changed).
+
+    Args:
+        file_path (str): Path to the source file
+        index_path (str): Path of the index file, defaults to <file_path>.rowidx
+        magic (bytes): 8 byte marker for the kind of index
+        scan_function (callable): Function(file_obj, offsets) used to (re)build
+        rebuild_if_stale (bool): If False, return None instead of rebuilding
+
+    Returns:
+        RowOffsetIndex: open index (caller closes), or None on failure
+    """
+    if index_path is None:
+        index_path = default_index_path(file_path)
+
+    try:
+        if os.path.exists(index_path):
+            row_index = RowOffsetIndex(index_path)
+            if row_index.magic == magic and row_index.is_fresh_for(file_path):
+                return row_index
+            row_index.close()
+
+            if not rebuild_if_stale:
+                return None
+            print(f"Row offset index is stale, rebuilding -> {index_path}")
+
+        elif not rebuild_if_stale:
+            return None
+
+        if build_row_offset_index(file_path, index_path, magic, scan_function) is None:
+            return None
+
+        return RowOffsetIndex(index_path)
+
+    except Exception as e:
+        print(f"Error opening row offset index {index_path}: {str(e)}")
+        return None
+
+
+def read_row_bytes(file_obj, row_index, row_number):
+    """
+    Seeks to a row and reads its raw bytes.
+
+    Args:
+        file_obj: Source file opened in binary mode
+        row_index (RowOffsetIndex): Open index for the source file
+        row_number (int): 0 indexed row number
+
+    Returns:
+        bytes: Raw row bytes including the line ending, or None if out of range
+    """
+    if row_number < 0 or row_number >= len(row_index):
+        return None
+
+    start, end = row_index.row_span(row_number)
+    file_obj.seek(start)
+    return file_obj.read(end - start)
+
+
+def read_indexed_text(
+    file_path,
+    row_number,
+    index_path=None,
+    magic=ROW_INDEX_MAGIC,
+    scan_function=scan_line_offsets,
+):
+    """
+    Returns one row/record of a file using a sidecar offset index:
+    one seek and one small read, no scan of the rows before it.
+
+    Args:
+        file_path (str): Path to the source file
+        row_number (int): 0 indexed row/record number
+        index_path (str): Path of the index file
+        magic (bytes): 8 byte marker for the kind of index
+        scan_function (callable): Function(file_obj, offsets) used to (re)build
+
+    Returns:
+        str: The row text (stripped), '' if past the last row,
+             or None if the index is unavailable
+    """
+    row_index = open_row_offset_index(file_path, index_path, magic, scan_function)
+    if row_index is None:
+        return None
+
+    try:
+        with row_index:
+            with open(file_path, 'rb') as source_file:
+                row_bytes = read_row_bytes(source_file, row_index, row_number)
+
+        if row_bytes is None:
+            return ''
+        return row_bytes.decode('utf-8').strip()
+
+    except Exception as e:
+        print(f"Error reading indexed row {row_number} of {file_path}: {str(e)}")
+        return None
+
+
+def read_indexed_row(file_path, target_row, index_path=None):
+    """
+    Returns one physical line of a file using the .rowidx sidecar index.
+
+    Args:
+        file_path (str): Path to the source file
+        target_row (int): 0 indexed row number (first line is row 0)
+        index_path (str): Path of the index file, defaults to <file_path>.rowidx
+
+    Returns:
+        str: The row text (stripped), '' if past the last row,
+             or None if the index is unavailable
+    """
+    return read_indexed_text(file_path, target_row, index_path)
+
+
+def open_csv_record_index(file_path, index_path=None, rebuild_if_stale=True):
+    """
+    Opens (building if needed) the quote-aware .recidx record index.
+
+    Args:
+        file_path (str): Path to the csv file
+        index_path (str): Path of the index file, defaults to <file_path>.recidx
+        rebuild_if_stale (bool): If False, return None instead of rebuilding
+
+    Returns:
+        RowOffsetIndex: open index (caller closes), or None on failure
+    """
+    if index_path is None:
+        index_path = default_index_path(file_path, CSV_RECORD_INDEX_SUFFIX)
+
+    return open_row_offset_index(
+        file_path,
+        index_path,
+        CSV_RECORD_INDEX_MAGIC,
+        scan_csv_record_offsets,
+        rebuild_if_stale,
+    )
+
+
+def read_indexed_csv_record(file_path, record_number, index_path=None):
+    """
+    Returns one logical csv record (may contain quoted newlines)
+    using the quote-aware .recidx sidecar index.
+
+    Args:
+        file_path (str): Path to the csv file
+        record_number (int): 0 indexed record number (header is record 0)
+        index_path (str): Path of the index file, defaults to <file_path>.recidx
+
+    Returns:
+        str: The record text (stripped), '' if past the last record,
+             or None if the index is unavailable
+    """
+    if index_path is None:
+        index_path = default_index_path(file_path, CSV_RECORD_INDEX_SUFFIX)
+
+    return read_indexed_text(
+        file_path,
+        record_number,
+        index_path,
+        CSV_RECORD_INDEX_MAGIC,
+        scan_csv_record_offsets,
+    )
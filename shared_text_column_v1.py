@@ -0,0 +1,421 @@
+# vanilla python tool: zero-pickle text column for process pool workers
+# one memory-mapped file of offsets + utf-8 bytes, workers return 0/1 flag bytes
+
+import os
+import sys
+import mmap
+import time
+import pickle
+import random
+import struct
+import argparse
+import tempfile
+import functools
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from multi_term_matcher_v1 import MultiTermMatcher
+from text_cleaning_v1 import clean_text_ascii
+
+"""
+- parallel
+- vanilla python, not pandas (the "shared" engine of
+  pandas_cascading_filter_functions_alt_v2 is built on it)
+
+Sending a batch of rows to a worker pickles the batch (for a DataFrame
+slice: every column), and the worker pickles its whole result back.
+Only the text column is read, and only a few booleans per row come back.
+
+Here the text column is written once to a memory-mapped file:
+    header: magic (8 bytes), token (16 bytes), row count, data size
+    offsets: row count + 1 unsigned 64-bit offsets into the data
+    missing: one byte per row, 1 if the cell was not a str (None, NaN, ...)
+    data: the cells, utf-8 (surrogatepass), back to back
+
+A task is then only (handle, start row, stop row): the handle is the path
+and a random token, ~100 bytes whatever the batch size. Each worker maps
+the file once (read only, cached per worker, see attach_text_column())
+and decodes just its rows from the shared page cache. It returns one
+bytes object per result name, 1 byte per row (0 or 1), which the parent
+copies into preallocated bytearrays, e.g. for numpy.frombuffer(flags, bool).
+
+A mapped file rather than multiprocessing.shared_memory: on 3.11 each
+process that attaches a SharedMemory block registers it with the resource
+tracker, which unlinks (or warns about) it when that process exits,
+and the same file layout works for a path on /dev/shm (RAM) or on disk
+when the column does not fit in /dev/shm (64MB in a default container).
+
+Missing cells are not sent to the row function, their flags stay 0.
+
+Use:
+    with SharedTextColumn.create(texts) as column:
+        flags = map_text_column(executor, column, row_function, ["1", "2"])
+
+Benchmark (bytes pickled and wall time, list batches vs shared column):
+    python shared_text_column_v1.py
+"""
+
+SHARED_TEXT_COLUMN_MAGIC = b"TXTCOL01"
+
+# magic, token, row count, data size
+SHARED_TEXT_COLUMN_HEADER = struct.Struct("=8s16sQQ")
+
+# rows encoded per write while creating the file
+SHARED_TEXT_COLUMN_WRITE_ROWS = 10000
+
+# rows per worker task
+DEFAULT_SHARED_BATCH_ROWS = 20000
+
+# mapped columns kept open per worker (the oldest is closed first)
+WORKER_ATTACHED_COLUMNS_MAX = 4
+
+# set in each worker by attach_text_column(), path -> SharedTextColumn
+WORKER_ATTACHED_COLUMNS = {}
+
+
+class SharedTextColumn:
+    """
+    Read-only mapping of a text column file (see create()).
+
+    Args:
+        path (str): Column file
+        owner (bool): Unlink the file on close() (the process that created it)
+    """
+
+    def __init__(self, path, owner=False):
+        self.path = path
+        self.owner = owner
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        try:
+            magic, self.token, self.row_count, data_size = SHARED_TEXT_COLUMN_HEADER.unpack_from(self._mmap, 0)
+            if magic != SHARED_TEXT_COLUMN_MAGIC:
+                raise ValueError(f"not a text column file: {path}")
+
+            offsets_start = SHARED_TEXT_COLUMN_HEADER.size
+            missing_start = offsets_start + (self.row_count + 1) * 8
+            self._data_start = missing_start + self.row_count
+            if len(self._mmap) != self._data_start + data_size:
+                raise ValueError(f"corrupt text column {path}: expected {self.row_count} rows, {data_size} bytes")
+
+            view = memoryview(self._mmap)
+            self._offsets = view[offsets_start:missing_start].cast('Q')
+            self._missing = view[missing_start:self._data_start]
+            view.release()
+
+        except Exception:
+            self._mmap.close()
+            self._file.close()
+            raise
+
+    @classmethod
+    def create(cls, texts, path=None, directory=None):
+        """
+        Writes a text column file and maps it.
+
+        Args:
+            texts (sequence): Cell values, len() known (list, pandas Series values, ...)
+            path (str): File to write, or None for a new temp file (unlinked on close())
+            directory (str): Temp file directory, e.g. "/dev/shm", None for the default
+
+        Returns:
+            SharedTextColumn: Mapping of the new file
+        """
+        owner = path is None
+        if owner:
+            file_descriptor, path = tempfile.mkstemp(suffix=".txtcol", dir=directory)
+            os.close(file_descriptor)
+
+        row_count = len(texts)
+        offsets = array('Q', [0])
+        missing = bytearray(row_count)
+        data_start = SHARED_TEXT_COLUMN_HEADER.size + (row_count + 1) * 8 + row_count
+        data_size = 0
+
+        try:
+            with open(path, 'wb') as column_file:
+                column_file.seek(data_start)
+
+                for block_start in range(0, row_count, SHARED_TEXT_COLUMN_WRITE_ROWS):
+                    pieces = []
+                    for row_number in range(block_start, min(block_start + SHARED_TEXT_COLUMN_WRITE_ROWS, row_count)):
+                        value = texts[row_number]
+                        if isinstance(value, str):
+                            piece = value.encode('utf-8', 'surrogatepass')
+                            data_size += len(piece)
+                            pieces.append(piece)
+                        else:
+                            missing[row_number] = 1
+                        offsets.append(data_size)
+                    column_file.write(b''.join(pieces))
+
+                column_file.seek(0)
+                column_file.write(SHARED_TEXT_COLUMN_HEADER.pack(
+                    SHARED_TEXT_COLUMN_MAGIC, os.urandom(16), row_count, data_size
+                ))
+                column_file.write(offsets.tobytes())
+                column_file.write(missing)
+
+            return cls(path, owner=owner)
+
+        except Exception:
+            if owner:
+                os.unlink(path)
+            raise
+
+    @property
+    def handle(self):
+        """(path, token): all a worker needs to attach, pickled with every task."""
+        return self.path, self.token
+
+    def __len__(self):
+        return self.row_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Releases the mapping, and unlinks the file if this process created it
+        (workers that still have it mapped keep their pages until they close).
+        """
+        if self._offsets is not None:
+            self._offsets.release()
+            self._missing.release()
+            self._offsets = None
+            self._missing = None
+            self._mmap.close()
+            self._file.close()
+            if self.owner:
+                os.unlink(self.path)
+
+    def text(self, row_number):
+        """
+        Returns:
+            str: The cell, or None if it was not a str
+        """
+        if self._missing[row_number]:
+            return None
+        start = self._data_start + self._offsets[row_number]
+        end = self._data_start + self._offsets[row_number + 1]
+        return self._mmap[start:end].decode('utf-8', 'surrogatepass')
+
+    def iter_texts(self, start, stop):
+        """
+        Yields the cells of rows start..stop-1, decoded from one slice of the mapping.
+
+        Yields:
+            str: Cell, or None if it was not a str
+        """
+        offsets = self._offsets
+        missing = self._missing
+        block_start = offsets[start]
+        block = self._mmap[self._data_start + block_start:self._data_start + offsets[stop]]
+
+        for row_number in range(start, stop):
+            if missing[row_number]:
+                yield None
+            else:
+                yield block[offsets[row_number] - block_start:offsets[row_number + 1] - block_start].decode(
+                    'utf-8', 'surrogatepass'
+                )
+
+
+def attach_text_column(handle):
+    """
+    This worker's mapping of a column, opened on first use
+    (and again if the path now holds another column).
+
+    Args:
+        handle (tuple): SharedTextColumn.handle
+
+    Returns:
+        SharedTextColumn: Mapping, kept open for the next task
+    """
+    path, token = handle
+    column = WORKER_ATTACHED_COLUMNS.get(path)
+    if column is not None and column.token != token:
+        column.close()
+        column = None
+        del WORKER_ATTACHED_COLUMNS[path]
+
+    if column is None:
+        while len(WORKER_ATTACHED_COLUMNS) >= WORKER_ATTACHED_COLUMNS_MAX:
+            oldest_path = next(iter(WORKER_ATTACHED_COLUMNS))
+            WORKER_ATTACHED_COLUMNS.pop(oldest_path).close()
+        column = SharedTextColumn(path)
+        if column.token != token:
+            column.close()
+            raise ValueError(f"text column {path} was replaced")
+        WORKER_ATTACHED_COLUMNS[path] = column
+
+    return column
+
+
+def flag_row_range(handle, start, stop, row_function, result_names):
+    """
+    Worker task: row_function for rows start..stop-1 of a shared column.
+
+    Args:
+        handle (tuple): SharedTextColumn.handle
+        start (int): First row
+        stop (int): Row after the last
+        row_function (callable): Module level (picklable) function for one text,
+                                 returning a dict (or None), its truthy values are 1
+        result_names (tuple): Result names, the order of the returned flags
+
+    Returns:
+        tuple: (start, tuple of bytes, one per result name, 1 byte (0 or 1) per row)
+    """
+    column = attach_text_column(handle)
+    flags = [bytearray(stop - start) for _ in result_names]
+
+    for position, text in enumerate(column.iter_texts(start, stop)):
+        if text is None:
+            continue
+        row_result = row_function(text)
+        if not row_result:
+            continue
+        for result_flags, result_name in zip(flags, result_names):
+            if row_result.get(result_name):
+                result_flags[position] = 1
+
+    return start, tuple(bytes(result_flags) for result_flags in flags)
+
+
+def map_text_column(executor, column, row_function, result_names, batch_rows=DEFAULT_SHARED_BATCH_ROWS):
+    """
+    Flags of every row of a shared column, computed in the executor's workers.
+
+    Args:
+        executor (ProcessPoolExecutor): Open executor
+        column (SharedTextColumn): Column created by this process
+        row_function (callable): Module level (picklable) function for one text
+        result_names (list): Result names (keys of the row_function dicts)
+        batch_rows (int): Rows per task
+
+    Returns:
+        dict: {result_name: bytearray of 0/1, one byte per row}
+    """
+    result_names = tuple(result_names)
+    flags = {result_name: bytearray(len(column)) for result_name in result_names}
+
+    futures = [
+        executor.submit(
+            flag_row_range, column.handle, start, min(start + batch_rows, len(column)), row_function, result_names
+        )
+        for start in range(0, len(column), max(1, batch_rows))
+    ]
+    for future in as_completed(futures):
+        start, batch_flags = future.result()
+        for result_name, result_flags in zip(result_names, batch_flags):
+            flags[result_name][start:start + len(result_flags)] = result_flags
+
+    return flags
+
+
+#############
+# Benchmark
+#############
+
+# compiled on first use in each worker
+BENCHMARK_MATCHER = None
+
+
+def benchmark_row_function(text):
+    """Benchmark row function: clean + match, result per match set."""
+    global BENCHMARK_MATCHER
+    if BENCHMARK_MATCHER is None:
+        BENCHMARK_MATCHER = MultiTermMatcher(
+            match_sets=[("1", ["cat"], ["pets", "animal rights"], 2), ("2", ["eggs"], ["toast", "oj"], 2)],
+            clean_function=clean_text_ascii,
+        )
+    matcher = BENCHMARK_MATCHER
+    return matcher.evaluate_match_sets(matcher.prepare_row(text).found_term_ids)
+
+
+def flag_text_batch(texts, row_function, result_names):
+    """Benchmark task without the shared column: the batch itself is pickled, lists of bools come back."""
+    results = [row_function(text) if isinstance(text, str) else None for text in texts]
+    return [[bool(row_result and row_result.get(result_name)) for row_result in results] for result_name in result_names]
+
+
+def benchmark_shared_column(row_count=500000, processes=None, batch_rows=DEFAULT_SHARED_BATCH_ROWS):
+    """
+    Prints the bytes pickled to and from the workers and the wall time,
+    for list batches and for the shared column, and checks they agree.
+    """
+    processes = processes or os.cpu_count()
+    random_generator = random.Random(7)
+    words = ["my", "cat", "pets", "animal", "rights", "eggs", "toast", "oj", "catalog", "legs", "the", "breakfast"]
+    texts = [
+        ' '.join(random_generator.choices(words, k=random_generator.randint(5, 40)))
+        for _ in range(row_count)
+    ]
+    result_names = ("1", "2")
+    batch_starts = range(0, row_count, batch_rows)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # warm up: start the workers, compile the matcher
+        list(executor.map(benchmark_row_function, texts[:processes * 4]))
+
+        start_time = time.perf_counter()
+        task_function = functools.partial(flag_text_batch, row_function=benchmark_row_function, result_names=result_names)
+        batch_results = list(executor.map(task_function, (texts[start:start + batch_rows] for start in batch_starts)))
+        list_seconds = time.perf_counter() - start_time
+        list_flags = {
+            result_name: [flag for batch_result in batch_results for flag in batch_result[position]]
+            for position, result_name in enumerate(result_names)
+        }
+        list_sent = sum(len(pickle.dumps(texts[start:start + batch_rows])) for start in batch_starts)
+        list_received = sum(len(pickle.dumps(batch_result)) for batch_result in batch_results)
+
+        start_time = time.perf_counter()
+        with SharedTextColumn.create(texts) as column:
+            create_seconds = time.perf_counter() - start_time
+            shared_flags = map_text_column(executor, column, benchmark_row_function, result_names, batch_rows)
+            shared_sent = sum(
+                len(pickle.dumps((column.handle, start, start + batch_rows, benchmark_row_function, result_names)))
+                for start in batch_starts
+            )
+        shared_seconds = time.perf_counter() - start_time
+        shared_received = len(batch_starts) * len(pickle.dumps((0, tuple(bytes(batch_rows) for _ in result_names))))
+
+    print(f"{row_count:,} rows, {processes} processes, {len(batch_starts)} batches of {batch_rows:,}")
+    print(f"{'':>14} {'sent KB':>10} {'received KB':>12} {'wall s':>8}")
+    print(f"{'list batches':>14} {list_sent / 1024:>10,.0f} {list_received / 1024:>12,.0f} {list_seconds:>8.2f}")
+    print(f"{'shared column':>14} {shared_sent / 1024:>10,.1f} {shared_received / 1024:>12,.0f} {shared_seconds:>8.2f}"
+          f"  (of which {create_seconds:.2f} s writing the column)")
+
+    for result_name in result_names:
+        if list_flags[result_name] != [bool(flag) for flag in shared_flags[result_name]]:
+            print(f"Warning: results differ for {result_name}")
+
+
+def main():
+    """
+    Runs the shared column benchmark.
+    """
+    parser = argparse.ArgumentParser(description='List batches vs shared text column benchmark')
+    parser.add_argument('--rows', '-r', type=int, default=500000, help='Rows')
+    parser.add_argument('--processes', '-p', type=int, default=None, help='Worker processes')
+    parser.add_argument('--batch-rows', '-b', type=int, default=DEFAULT_SHARED_BATCH_ROWS, help='Rows per task')
+    args = parser.parse_args()
+
+    try:
+        benchmark_shared_column(args.rows, args.processes, args.batch_rows)
+    except Exception as e:
+        print(f"Error in benchmark: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# vanilla python tool: translate-table text cleaning
+# fast path for clean_string(), ASCII mode (same output) and Unicode-letter mode
+
+import re
+import sys
+import time
+import random
+import tracemalloc
+import unicodedata
+
+"""
+- vanilla python, not pandas
+- no regex per call: precomputed str.translate() tables
+
+clean_string() did three passes and several temporary strings per call:
+    re.sub(r'[^a-zA-Z\\s]', '', text)  ->  .lower()  ->  ' '.join(.split())
+
+Here one translate() pass keeps / lowercases letters, turns every
+whitespace character into ' ' and deletes the rest, then one
+split/join pass collapses the spaces.
+
+Modes:
+- "ascii":   exactly the same output as the regex clean_string()
+             (a-z kept, A-Z lowercased, all other characters dropped,
+             \\s is the same set as str.isspace() / str.split())
+             ASCII text goes through translate()'s ASCII fast path;
+             other text first has its Unicode spaces turned into ' '
+             (split/join) and the remaining non-ASCII characters
+             dropped with encode('ascii', 'ignore')
+- "unicode": keeps the letters of every script, lowercased
+             (str.isalpha(), plus combining marks so words like
+             "café" with a decomposed accent or Devanagari vowel signs
+             stay whole), digits / punctuation / symbols dropped;
+             the table is filled per distinct character, once per process
+
+Benchmark (regex vs translate, per-row latency and temporary memory):
+    python text_cleaning_v1.py
+"""
+
+CLEAN_MODE_ASCII = "ascii"
+CLEAN_MODE_UNICODE = "unicode"
+CLEAN_MODES = (CLEAN_MODE_ASCII, CLEAN_MODE_UNICODE)
+
+# every character str.split() / regex \s treat as whitespace (str.isspace())
+WHITESPACE_CHARACTERS = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+
+
+def build_ascii_clean_table():
+    """
+    Translate table for ASCII characters:
+    a-z kept, A-Z lowercased, whitespace to ' ', all others deleted.
+
+    Returns:
+        dict: {codepoint: str or None}
+    """
+    clean_table = {}
+    for codepoint in range(128):
+        character = chr(codepoint)
+        if 'a' <= character <= 'z':
+            continue
+        if 'A' <= character <= 'Z':
+            clean_table[codepoint] = character.lower()
+        elif character.isspace():
+            clean_table[codepoint] = ' '
+        else:
+            clean_table[codepoint] = None
+    return clean_table
+
+
+ASCII_CLEAN_TABLE = build_ascii_clean_table()
+
+
+class UnicodeCleanTable(dict):
+    """
+    Translate table for the Unicode-letter mode, filled on first sight
+    of each character (str.translate() looks up every character).
+    """
+
+    def __missing__(self, codepoint):
+        character = chr(codepoint)
+
+        if character.isalpha():
+            mapped = character.lower()
+        elif unicodedata.category(character).startswith('M'):
+            # combining marks belong to the letter before them
+            mapped = character
+        elif character.isspace():
+            mapped = ' '
+        else:
+            mapped = None
+
+        self[codepoint] = mapped
+        return mapped
+
+
+UNICODE_CLEAN_TABLE = UnicodeCleanTable(ASCII_CLEAN_TABLE)
+
+
+def clean_text_ascii(text):
+    """
+    Same output as re.sub(r'[^a-zA-Z\\s]', '', text).lower() with spaces collapsed.
+
+    Args:
+        text (str): Text to clean
+
+    Returns:
+        str: Lowercase a-z words separated by single spaces
+    """
+    if not text.isascii():
+        # Unicode spaces to ' ' (split), then drop the non-ASCII rest
+        text = ' '.join(text.split()).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(text.translate(ASCII_CLEAN_TABLE).split())
+
+
+def clean_text_unicode(text):
+    """
+    Keeps the letters of every script (lowercased), drops digits,
+    punctuation and symbols, collapses whitespace.
+
+    Args:
+        text (str): Text to clean
+
+    Returns:
+        str: Lowercase words separated by single spaces
+    """
+    if text.isascii():
+        return ' '.join(text.translate(ASCII_CLEAN_TABLE).split())
+    return ' '.join(text.translate(UNICODE_CLEAN_TABLE).split())
+
+
+def get_clean_text_function(clean_mode=CLEAN_MODE_ASCII):
+    """
+    Args:
+        clean_mode (str): "ascii" or "unicode"
+
+    Returns:
+        callable: clean_text_ascii or clean_text_unicode
+    """
+    if clean_mode == CLEAN_MODE_ASCII:
+        return clean_text_ascii
+    if clean_mode == CLEAN_MODE_UNICODE:
+        return clean_text_unicode
+    raise ValueError(f"clean_mode must be one of {CLEAN_MODES}")
+
+
+#############
+# Benchmark
+#############
+
+def clean_text_regex(text):
+    """The regex clean_string() baseline."""
+    cleaned = re.sub(r'[^a-zA-Z\s]', '', text)
+    return ' '.join(cleaned.lower().split())
+
+
+def make_benchmark_texts(row_count=20000, seed=3):
+    """Support-ticket like rows: ASCII, and mixed with accents, other scripts, digits, symbols."""
+    random_generator = random.Random(seed)
+    ascii_words = ["Please", "cancel", "my", "subscription", "refund", "order", "#4521", "ASAP!!", "thanks,", "e-mail"]
+    other_words = ["Bitte", "kündigen", "Rückerstattung", "café", "reembolso", "отмена", "заказ", "返金", "रद्द", "1.234,50€", " "]
+
+    ascii_texts = [
+        ' '.join(random_generator.choice(ascii_words) for _ in range(random_generator.randint(5, 60)))
+        for _ in range(row_count)
+    ]
+    mixed_texts = [
+        ' '.join(random_generator.choice(ascii_words + other_words) for _ in range(random_generator.randint(5, 60)))
+        for _ in range(row_count)
+    ]
+    return ascii_texts, mixed_texts
+
+
+def check_ascii_mode(texts):
+    """
+    Compares clean_text_ascii() to the regex version: every codepoint, then the texts.
+
+    Returns:
+        int: Number of differences
+    """
+    difference_count = 0
+
+    whitespace_characters = ''.join(
+        chr(codepoint) for codepoint in range(sys.maxunicode + 1) if chr(codepoint).isspace()
+    )
+    if whitespace_characters != WHITESPACE_CHARACTERS:
+        difference_count += 1
+
+    all_characters = ''.join(chr(codepoint) for codepoint in range(sys.maxunicode + 1) if not 0xD800 <= codepoint <= 0xDFFF)
+    for block_start in range(0, len(all_characters), 1024):
+        block = all_characters[block_start:block_start + 1024]
+        if clean_text_ascii(block) != clean_text_regex(block):
+            difference_count += 1
+
+    for text in texts:
+        if clean_text_ascii(text) != clean_text_regex(text):
+            difference_count += 1
+
+    return difference_count
+
+
+def measure_cleaner(clean_function, texts, repeats=3):
+    """
+    Returns:
+        tuple: (best microseconds per row, peak temporary bytes for one long row)
+    """
+    best_seconds = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for text in texts:
+            clean_function(text)
+        seconds = time.perf_counter() - start_time
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    long_text = ' '.join(texts[:2000])
+    tracemalloc.start()
+    clean_function(long_text)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best_seconds / len(texts) * 1e6, peak_bytes
+
+
+def benchmark_cleaners():
+    """
+    Prints per-row latency and temporary memory of the regex and translate cleaners.
+    """
+    ascii_texts, mixed_texts = make_benchmark_texts()
+
+    difference_count = check_ascii_mode(ascii_texts + mixed_texts)
+    print(f"ascii mode vs regex: {difference_count} differences (all codepoints + {len(ascii_texts) * 2} rows)")
+
+    print(f"{'rows':>7} {'cleaner':>18} {'us/row':>8} {'peak KB, long row':>18}")
+    for rows_name, texts in (("ascii", ascii_texts), ("mixed", mixed_texts)):
+        for cleaner_name, clean_function in (
+            ("regex", clean_text_regex),
+            ("translate ascii", clean_text_ascii),
+            ("translate unicode", clean_text_unicode),
+        ):
+            microseconds, peak_bytes = measure_cleaner(clean_function, texts)
+            print(f"{rows_name:>7} {cleaner_name:>18} {microseconds:>8.2f} {peak_bytes / 1024:>18,.0f}")
+
+    print(f"unicode mode example: {clean_text_unicode('Bitte KÜNDIGEN: Rückerstattung #4521, отмена! 返金')!r}")
+
+
+def main():
+    """
+    Runs the cleaner benchmark.
+    """
+    try:
+        benchmark_cleaners()
+    except Exception as e:
+        print(f"Error in benchmark: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# vanilla python tool: word-boundary (token-set) matching mode
+# single-word terms are set lookups, phrases contiguous token checks
+
+import sys
+import time
+import random
+import argparse
+
+from multi_term_matcher_v1 import MultiTermMatcher, MATCH_MODE_SUBSTRING, make_benchmark_words, min_seconds
+
+"""
+- vanilla python, not pandas
+- same API as MultiTermMatcher (multi_term_matcher_v1): find_term_ids(),
+  prepare_row(), evaluate_match_sets(), first_matching_group(),
+  so it drops in wherever a matcher is used
+
+Substring matching (`term in clean_text`) finds "cat" in "education"
+and "cancel" in "cancellationfree", so term lists get over-specified
+(" cat ", "cat food", ...) to compensate, which makes them slower.
+
+Token mode: the clean text is split into words once per row,
+- a single-word term matches a whole word: one set intersection of the
+  row's word set with all single-word terms (C loop over the smaller side,
+  so the cost does not grow with the vocabulary)
+- a phrase ("money back") matches a contiguous run of whole words:
+  phrases are indexed by their first word, and only positions where
+  such a word occurs are compared
+- a term that cleans to no words is in every text (as with `in` and '')
+
+Words are the space-separated pieces of the cleaned text, so what a word
+is follows the clean mode (text_cleaning_v1): punctuation is dropped, not
+split on ("cancellation-free" is the one word "cancellationfree",
+"e-mail" is "email"). The row's words stay str (a set lookup hashes each
+word once, the same work as interning it to an id).
+
+Use:
+    matcher = create_term_matcher(match_sets, aggregation_groups, clean_function, MATCH_MODE_TOKEN)
+    prepared_row = matcher.prepare_row(text)
+    group_name = matcher.first_matching_group(prepared_row.found_term_ids)
+
+Benchmark (rows/sec, substring scan vs token sets, growing vocabularies):
+    python token_matcher_v1.py
+"""
+
+MATCH_MODE_TOKEN = "token"
+MATCH_MODES = (MATCH_MODE_SUBSTRING, MATCH_MODE_TOKEN)
+
+
+class TokenSetMatcher(MultiTermMatcher):
+    """
+    MultiTermMatcher with whole-word / whole-phrase semantics.
+
+    Args:
+        match_sets (list): (set_id, required_terms, optional_terms, n_terms) tuples
+        aggregation_groups (list): (group_name, terms) tuples, first match wins
+        clean_function (callable): Cleans a term the same way as the text,
+                                   or None if the terms are already clean
+    """
+
+    match_mode = MATCH_MODE_TOKEN
+
+    def _compile_terms(self):
+        """Indexes self.terms by word: single words, and phrases by their first word."""
+        always_term_ids = []
+        single_word_ids = {}
+        phrase_starts = {}
+
+        for term_id, term in enumerate(self.terms):
+            words = term.split()
+            if not words:
+                always_term_ids.append(term_id)
+            elif len(words) == 1:
+                # " cat" and "cat" (terms not cleaned) are the same word
+                single_word_ids.setdefault(words[0], []).append(term_id)
+            else:
+                phrase_starts.setdefault(words[0], []).append((words, term_id))
+
+        self._always_term_ids = frozenset(always_term_ids)
+        self._single_word_ids = {word: tuple(term_ids) for word, term_ids in single_word_ids.items()}
+        self._single_words = frozenset(self._single_word_ids)
+        self._phrase_starts = {word: tuple(phrases) for word, phrases in phrase_starts.items()}
+        self._phrase_first_words = frozenset(self._phrase_starts)
+
+    def find_term_ids(self, clean_text):
+        """
+        The ids of every term whose words are in the text.
+
+        Args:
+            clean_text (str): Text cleaned with the same clean_function as the terms
+
+        Returns:
+            set: Term ids (positions in self.terms)
+        """
+        found_term_ids = set(self._always_term_ids)
+
+        words = clean_text.split()
+        word_set = set(words)
+
+        single_word_ids = self._single_word_ids
+        for word in word_set.intersection(self._single_words):
+            found_term_ids.update(single_word_ids[word])
+
+        if not word_set.isdisjoint(self._phrase_first_words):
+            phrase_starts = self._phrase_starts
+            for position, word in enumerate(words):
+                phrases = phrase_starts.get(word)
+                if phrases is None:
+                    continue
+                for phrase_words, term_id in phrases:
+                    if term_id not in found_term_ids and words[position:position + len(phrase_words)] == phrase_words:
+                        found_term_ids.add(term_id)
+
+        return found_term_ids
+
+    def find_term_positions(self, clean_text):
+        """
+        One pass over the words: the word positions of every term found.
+
+        Args:
+            clean_text (str): Text cleaned with the same clean_function as the terms
+
+        Returns:
+            dict: {term id: ascending word positions (phrases: their first word)}
+        """
+        term_positions = {term_id: [] for term_id in self._always_term_ids}
+
+        words = clean_text.split()
+        single_word_ids = self._single_word_ids
+        phrase_starts = self._phrase_starts
+
+        for position, word in enumerate(words):
+            term_ids = single_word_ids.get(word)
+            if term_ids is not None:
+                for term_id in term_ids:
+                    term_positions.setdefault(term_id, []).append(position)
+
+            phrases = phrase_starts.get(word)
+            if phrases is not None:
+                for phrase_words, term_id in phrases:
+                    if words[position:position + len(phrase_words)] == phrase_words:
+                        term_positions.setdefault(term_id, []).append(position)
+
+        return term_positions
+
+
+def create_term_matcher(match_sets=(), aggregation_groups=(), clean_function=None,
+                        match_mode=MATCH_MODE_SUBSTRING):
+    """
+    Compiles a matcher for a match mode.
+
+    Args:
+        match_sets (list): (set_id, required_terms, optional_terms, n_terms) tuples
+        aggregation_groups (list): (group_name, terms) tuples, first match wins
+        clean_function (callable): Cleans terms the same way as the text, or None
+        match_mode (str): "substring" or "token"
+
+    Returns:
+        MultiTermMatcher: MultiTermMatcher or TokenSetMatcher
+    """
+    if match_mode not in MATCH_MODES:
+        raise ValueError(f"match_mode must be one of {MATCH_MODES}")
+
+    matcher_class = TokenSetMatcher if match_mode == MATCH_MODE_TOKEN else MultiTermMatcher
+    return matcher_class(match_sets, aggregation_groups, clean_function)
+
+
+#############
+# Benchmark
+#############
+
+def benchmark_token_matcher(row_count=3000, repeats=3):
+    """
+    Prints rows/sec of the substring scan and the token sets as the
+    vocabulary grows, and how many rows the substring mode counts
+    only because a term is inside a longer word.
+    """
+    vocabulary = make_benchmark_words(60000)
+    random_generator = random.Random(13)
+    texts = [
+        ' '.join(random_generator.choice(vocabulary) for _ in range(60))
+        for _ in range(row_count)
+    ]
+
+    print(f"{row_count} rows of ~60 words, 2 groups, 1 in 10 terms a two-word phrase")
+    print(f"{'terms':>7} {'substring r/s':>14} {'token r/s':>12} {'rows matched (substring / token)':>34}")
+
+    for term_count in (10, 200, 2000, 50000):
+        terms = random_generator.sample(vocabulary, term_count)
+        terms = [
+            f"{term} {random_generator.choice(vocabulary)}" if position % 10 == 9 else term
+            for position, term in enumerate(terms)
+        ]
+        aggregation_groups = [("a", terms[::2]), ("b", terms[1::2])]
+
+        timings = {}
+        results = {}
+        for match_mode in MATCH_MODES:
+            matcher = create_term_matcher(aggregation_groups=aggregation_groups, match_mode=match_mode)
+            for _ in range(repeats):
+                start_time = time.perf_counter()
+                results[match_mode] = [matcher.first_matching_group(matcher.find_term_ids(text)) for text in texts]
+                timings[match_mode] = min_seconds(timings.get(match_mode), time.perf_counter() - start_time)
+
+        substring_rows = sum(group_name is not None for group_name in results[MATCH_MODE_SUBSTRING])
+        token_rows = sum(group_name is not None for group_name in results[MATCH_MODE_TOKEN])
+        print(
+            f"{term_count:>7}"
+            f" {row_count / timings[MATCH_MODE_SUBSTRING]:>14,.0f}"
+            f" {row_count / timings[MATCH_MODE_TOKEN]:>12,.0f}"
+            f" {f'{substring_rows} / {token_rows}':>34}"
+        )
+
+
+def main():
+    """
+    Runs the token matcher benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Substring vs token-set matching benchmark')
+    parser.add_argument('--rows', '-r', type=int, default=3000, help='Rows per run')
+    args = parser.parse_args()
+
+    try:
+        benchmark_token_matcher(args.rows)
+    except Exception as e:
+        print(f"Error in benchmark: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
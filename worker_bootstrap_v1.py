@@ -0,0 +1,266 @@
+# vanilla python tool: worker bootstrap for process pools
+# installs compiled state once per worker, same under fork / spawn / forkserver
+
+import sys
+import time
+import pickle
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+- parallel
+- vanilla python, not pandas
+
+Without an initializer, each worker finds its state in module globals:
+under fork it inherits whatever the parent had set (a --unicode flag,
+a matcher compiled from a config), but under spawn / forkserver
+the module is imported fresh, so state set at runtime is silently lost,
+and anything not cached is re-derived per task.
+
+Here the pool is created with bootstrap_worker() as initializer:
+the parent compiles its state once (matcher, clean mode, ...),
+each worker receives it once (pickled under spawn / forkserver,
+inherited under fork) and an install function puts it in place
+before the first task. Each worker also reports when it started
+and how long its install took, so the startup cost per start method
+is visible in the run report.
+
+Use:
+    pool, startup = create_bootstrapped_pool(n, install_pattern_matcher, (matcher, mode), "spawn")
+    with pool:
+        ...
+        print(format_bootstrap_report(collect_bootstrap_reports(startup)))
+
+    (create_bootstrapped_executor() is the same for ProcessPoolExecutor)
+
+Benchmark (startup per start method, growing compiled state):
+    python worker_bootstrap_v1.py
+"""
+
+# how long collect_bootstrap_reports() waits for workers that have not reported yet
+BOOTSTRAP_REPORT_TIMEOUT = 60.0
+
+# set in each worker by bootstrap_worker()
+WORKER_BOOTSTRAP_REPORT = None
+
+
+def bootstrap_worker(install_function, install_args, report_queue, pool_created_at):
+    """
+    Pool initializer: installs the compiled state in this worker, once,
+    and reports the start time and install time to the parent.
+
+    Args:
+        install_function (callable): Module level function(*install_args), or None
+        install_args (tuple): Compiled state for install_function
+        report_queue (SimpleQueue): Parent's report queue
+        pool_created_at (float): time.time() when the parent created the pool
+    """
+    global WORKER_BOOTSTRAP_REPORT
+
+    # process start, imports and unpickling of the state happen before this line
+    started_at = time.time()
+
+    install_start = time.perf_counter()
+    if install_function is not None:
+        install_function(*install_args)
+    install_seconds = time.perf_counter() - install_start
+
+    WORKER_BOOTSTRAP_REPORT = {
+        "pid": multiprocessing.current_process().pid,
+        "start_seconds": started_at - pool_created_at,
+        "install_seconds": install_seconds,
+    }
+    report_queue.put(WORKER_BOOTSTRAP_REPORT)
+
+
+def prepare_worker_bootstrap(processes, install_function=None, install_args=(), start_method=None):
+    """
+    Context and initializer arguments for a bootstrapped pool / executor.
+
+    Args:
+        processes (int): Worker processes
+        install_function (callable): Module level (picklable) function(*install_args), or None
+        install_args (tuple): Compiled state, picklable
+        start_method (str): "fork", "spawn", "forkserver" or None for the default
+
+    Returns:
+        dict: {"context", "initargs", "report_queue", "processes", "start_method", "state_bytes"}
+    """
+    context = multiprocessing.get_context(start_method)
+    install_args = tuple(install_args)
+    report_queue = context.SimpleQueue()
+
+    return {
+        "context": context,
+        "initargs": (install_function, install_args, report_queue, time.time()),
+        "report_queue": report_queue,
+        "processes": processes,
+        "start_method": context.get_start_method(),
+        # sent to every worker under spawn / forkserver
+        "state_bytes": len(pickle.dumps(install_args)),
+    }
+
+
+def create_bootstrapped_pool(processes, install_function=None, install_args=(), start_method=None):
+    """
+    multiprocessing.Pool whose workers run install_function(*install_args) once.
+
+    Args:
+        processes (int): Worker processes
+        install_function (callable): Module level (picklable) function, or None
+        install_args (tuple): Compiled state, picklable
+        start_method (str): "fork", "spawn", "forkserver" or None for the default
+
+    Returns:
+        tuple: (Pool, startup dict for collect_bootstrap_reports())
+    """
+    startup = prepare_worker_bootstrap(processes, install_function, install_args, start_method)
+    pool = startup["context"].Pool(
+        processes=processes,
+        initializer=bootstrap_worker,
+        initargs=startup["initargs"],
+    )
+    return pool, startup
+
+
+def create_bootstrapped_executor(max_workers, install_function=None, install_args=(), start_method=None):
+    """
+    ProcessPoolExecutor whose workers run install_function(*install_args) once.
+
+    Args:
+        max_workers (int): Worker processes
+        install_function (callable): Module level (picklable) function, or None
+        install_args (tuple): Compiled state, picklable
+        start_method (str): "fork", "spawn", "forkserver" or None for the default
+
+    Returns:
+        tuple: (ProcessPoolExecutor, startup dict for collect_bootstrap_reports())
+    """
+    startup = prepare_worker_bootstrap(max_workers, install_function, install_args, start_method)
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=startup["context"],
+        initializer=bootstrap_worker,
+        initargs=startup["initargs"],
+    )
+    return executor, startup
+
+
+def collect_bootstrap_reports(startup, timeout=BOOTSTRAP_REPORT_TIMEOUT):
+    """
+    Reads the workers' bootstrap reports (call while the pool is open).
+
+    Waits up to timeout seconds for workers that have not reported yet
+    (a ProcessPoolExecutor may start fewer workers than max_workers).
+
+    Args:
+        startup (dict): From create_bootstrapped_pool() / create_bootstrapped_executor()
+        timeout (float): Seconds to wait for missing reports
+
+    Returns:
+        dict: {"start_method", "workers", "state_bytes", "first_ready_seconds",
+               "all_ready_seconds", "max_install_seconds"}
+    """
+    reports = startup.setdefault("reports", [])
+    report_queue = startup["report_queue"]
+    deadline = time.monotonic() + timeout
+
+    while len(reports) < startup["processes"]:
+        if report_queue.empty():
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.005)
+            continue
+        reports.append(report_queue.get())
+
+    start_seconds = [report["start_seconds"] for report in reports]
+    return {
+        "start_method": startup["start_method"],
+        "workers": len(reports),
+        "state_bytes": startup["state_bytes"],
+        "first_ready_seconds": min(start_seconds, default=0.0),
+        "all_ready_seconds": max(start_seconds, default=0.0),
+        "max_install_seconds": max((report["install_seconds"] for report in reports), default=0.0),
+    }
+
+
+def format_bootstrap_report(summary):
+    """
+    Args:
+        summary (dict): From collect_bootstrap_reports()
+
+    Returns:
+        str: One line for the run report
+    """
+    return (
+        f"Worker startup ({summary['start_method']}): {summary['workers']} workers, "
+        f"first ready {summary['first_ready_seconds']:.3f} s, all ready {summary['all_ready_seconds']:.3f} s, "
+        f"install {summary['max_install_seconds'] * 1000:.1f} ms max, "
+        f"{summary['state_bytes']:,} bytes of state"
+    )
+
+
+#############
+# Benchmark
+#############
+
+# installed by install_benchmark_state()
+BENCHMARK_STATE = None
+
+
+def install_benchmark_state(benchmark_state):
+    """Benchmark install function."""
+    global BENCHMARK_STATE
+    BENCHMARK_STATE = benchmark_state
+
+
+def benchmark_task(text):
+    """Benchmark task: uses the installed matcher."""
+    matcher = BENCHMARK_STATE
+    return matcher.first_matching_group(matcher.find_term_ids(text))
+
+
+def benchmark_startup(processes=4, term_counts=(10, 2000, 50000)):
+    """
+    Prints worker startup per start method, for growing compiled matchers.
+    """
+    from multi_term_matcher_v1 import MultiTermMatcher, make_benchmark_words
+
+    print(f"{processes} workers, time from Pool() to worker ready (process start, imports, unpickled state)")
+    print(f"{'method':>11} {'terms':>7} {'state KB':>9} {'first ready s':>14} {'all ready s':>12} {'install ms':>11}")
+
+    for start_method in multiprocessing.get_all_start_methods():
+        for term_count in term_counts:
+            words = make_benchmark_words(term_count)
+            matcher = MultiTermMatcher(aggregation_groups=[("a", words[::2]), ("b", words[1::2])])
+
+            pool, startup = create_bootstrapped_pool(processes, install_benchmark_state, (matcher,), start_method)
+            with pool:
+                pool.map(benchmark_task, words[:processes * 4], chunksize=1)
+                summary = collect_bootstrap_reports(startup)
+
+            print(
+                f"{summary['start_method']:>11} {term_count:>7} {summary['state_bytes'] / 1024:>9,.0f}"
+                f" {summary['first_ready_seconds']:>14.3f} {summary['all_ready_seconds']:>12.3f}"
+                f" {summary['max_install_seconds'] * 1000:>11.2f}"
+            )
+
+
+def main():
+    """
+    Runs the worker startup benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Worker startup per start method')
+    parser.add_argument('--processes', '-p', type=int, default=4, help='Worker processes')
+    args = parser.parse_args()
+
+    try:
+        benchmark_startup(args.processes)
+    except Exception as e:
+        print(f"Error in benchmark: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()